@@ -0,0 +1 @@
+{ python3 benchmarks/bench_links.py && python3 benchmarks/bench_nodes.py && python3 benchmarks/bench_suite.py; } | tee bench_output.txt
@@ -0,0 +1,62 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from textnode import TextNode, TextType
+import splitmarkdown as sp
+
+"""
+Times split_nodes_link, split_nodes_image and text_to_textnodes on single
+paragraphs holding more and more links (and images).
+The time per link must stay flat : a quadratic splitter sees it grow with
+the size of the paragraph. Exits with an error if it grows more than MAX_GROWTH times.
+"""
+
+SIZES = [500, 1000, 2000, 4000, 8000]
+MAX_GROWTH = 3.0
+
+"""
+Takes a number of links.
+Returns a paragraph with that many links and as many images, between words.
+"""
+def paragraph(links):
+    return "".join(f"word {i} [link {i}](https://example.com/{i}) and ![image {i}](/images/{i}.png) " for i in range(links))
+
+"""
+Takes a function and its argument.
+Returns the best time of a few runs, in seconds.
+"""
+def best_time(function, argument, runs = 5):
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        function(argument)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    benchmarks = {
+        "split_nodes_link": lambda text: sp.split_nodes_link([TextNode(text, TextType.TEXT)]),
+        "split_nodes_image": lambda text: sp.split_nodes_image([TextNode(text, TextType.TEXT)]),
+        "text_to_textnodes": sp.text_to_textnodes,
+    }
+    failed = False
+    for name, function in benchmarks.items():
+        print(name)
+        per_link = []
+        for size in SIZES:
+            elapsed = best_time(function, paragraph(size))
+            per_link.append(elapsed / size)
+            print(f"  {size:>6} links : {elapsed * 1000:8.2f} ms  {elapsed / size * 1e6:6.2f} us/link")
+        growth = per_link[-1] / per_link[0]
+        print(f"  growth of the time per link : x{growth:.2f}")
+        if growth > MAX_GROWTH:
+            print(f"  NOT LINEAR (more than x{MAX_GROWTH})")
+            failed = True
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import splitmarkdown as sp
+from htmlnode import HTMLNode
+from textnode import TextNode
+
+"""
+Measures the memory held by the node trees of parsed pages, in bytes per node :
+TextNodes (the inline parse) and HTMLNodes (the tree rendered by the pages).
+The markdown strings themselves are allocated before the measure.
+The slotted node classes are then compared with reference classes keeping their
+attributes in a __dict__, like the node classes before they got __slots__ : both
+measure copies of the same parsed trees, sharing their strings, so the figures
+differ only by the layout of the nodes.
+"""
+
+PAGES = 200
+
+"""
+Takes a page number.
+Returns a markdown page mixing every kind of block and inline element.
+"""
+def page(number):
+    return "\n\n".join([
+        f"# Page {number}",
+        f"Some **bold** and _italic_ text with `code`, a [link](/pages/{number}) and ![an image](/images/{number}.png).",
+        "## Section",
+        "- first **item**\n- second _item_\n- third [item](/x)",
+        "1. one\n2. two\n3. three",
+        "> a quote with **bold** words",
+        "```\nsome code\n```",
+    ])
+
+"""
+A TextNode without __slots__, as a reference.
+"""
+class ReferenceTextNode:
+    def __init__(self, text, text_type, url = None):
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+
+"""
+An HTMLNode without __slots__, as a reference.
+"""
+class ReferenceHTMLNode:
+    def __init__(self, tag = None, value = None, children = None, props = None):
+        self.tag = tag
+        self.value = value
+        self.children = children
+        self.props = props
+
+"""
+Takes a list of TextNodes and a text node class.
+Returns copies of the nodes made of that class.
+"""
+def copy_text_nodes(nodes, node_class):
+    return [node_class(node.text, node.text_type, node.url) for node in nodes]
+
+"""
+Takes an HTMLNode and an html node class.
+Returns a copy of its tree made of that class.
+"""
+def copy_tree(node, node_class):
+    children = None if node.children is None else [copy_tree(child, node_class) for child in node.children]
+    return node_class(node.tag, node.value, children, node.props)
+
+"""
+Takes a node.
+Returns the number of nodes of its tree.
+"""
+def count_nodes(node):
+    if node.children is None:
+        return 1
+    return 1 + sum(count_nodes(child) for child in node.children)
+
+"""
+Takes a function building a list of nodes and a function counting them.
+Returns the bytes allocated per node.
+"""
+def bytes_per_node(build, count):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    nodes = build()
+    allocated = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return allocated / count(nodes)
+
+def main():
+    pages = [page(number) for number in range(PAGES)]
+    paragraphs = [markdown.split("\n\n")[1] for markdown in pages]
+    count_text_nodes = lambda nodes: sum(len(item) for item in nodes)
+    count_html_nodes = lambda nodes: sum(count_nodes(node) for node in nodes)
+    text_nodes = bytes_per_node(lambda: [sp.text_to_textnodes(text) for text in paragraphs], count_text_nodes)
+    html_nodes = bytes_per_node(lambda: [sp.markdown_to_html_node(markdown) for markdown in pages], count_html_nodes)
+    print(f"TextNode : {text_nodes:7.1f} bytes/node")
+    print(f"HTMLNode : {html_nodes:7.1f} bytes/node")
+    parsed_text = [sp.text_to_textnodes(text) for text in paragraphs]
+    parsed_trees = [sp.markdown_to_html_node(markdown) for markdown in pages]
+    for name, copy, parsed, node_class, reference_class, count in [
+        ("TextNode", copy_text_nodes, parsed_text, TextNode, ReferenceTextNode, count_text_nodes),
+        ("HTMLNode", copy_tree, parsed_trees, HTMLNode, ReferenceHTMLNode, count_html_nodes),
+    ]:
+        slotted = bytes_per_node(lambda: [copy(item, node_class) for item in parsed], count)
+        reference = bytes_per_node(lambda: [copy(item, reference_class) for item in parsed], count)
+        print(f"{name} copies : {reference:7.1f} bytes/node without slots, {slotted:7.1f} with slots")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
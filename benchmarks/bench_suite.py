@@ -0,0 +1,164 @@
+import argparse
+import contextlib
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import corpus
+import main as generator
+import splitmarkdown as sp
+import templates
+
+"""
+Times the main stages of the generator on a synthetic corpus (see corpus.py) :
+- markdown_to_html_node and ParentNode.to_html on one large document,
+- text_to_textnodes on every line of inline text of that document,
+- generate_pages_recursive and copy_from_to on a whole site.
+Each benchmark keeps the best time of a few runs.
+
+The results can be saved as a baseline (--save-baseline). When a baseline saved
+with the same parameters exists, each result is compared with it, and the suite
+exits with an error if one of them is more than threshold times slower.
+Baselines are only comparable on the same machine.
+"""
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_THRESHOLD = 1.25
+
+"""
+Takes a function and the number of runs, and an optional function run before
+each run, out of the timing.
+Returns the best time of the runs, in seconds.
+"""
+def best_time(function, runs : int, setup = None) -> float:
+    best = None
+    for _ in range(runs):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+"""
+Takes a function.
+Returns it running with its output discarded : the build functions print each file.
+"""
+def quiet(function):
+    def run():
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            function()
+    return run
+
+"""
+Takes the parsed arguments and a working directory.
+Returns the benchmarks, as (name, function, setup, bytes processed) tuples.
+"""
+def benchmarks(args, work : str) -> list:
+    content, static, template = corpus.generate(os.path.join(work, "site"), args.pages, args.page_size * 1024, args.depth, args.mix, args.links, args.assets, args.seed)
+    document = corpus.document(random.Random(args.seed), "Large document", args.document_size * 1024 * 1024, args.mix, args.links)
+    tree = sp.markdown_to_html_node(document)
+    lines = [line for _, block_lines in sp.iter_blocks(document.split("\n")) for line in block_lines if not line.startswith("```")]
+    site_bytes = sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(content) for name in names)
+    static_bytes = sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(static) for name in names)
+
+    public = os.path.join(work, "public")
+    def clean_public():
+        shutil.rmtree(public, ignore_errors=True)
+        os.makedirs(public)
+        templates.clear_cache()
+
+    return [
+        ("markdown_to_html_node", lambda: sp.markdown_to_html_node(document), None, len(document)),
+        ("text_to_textnodes", lambda: [sp.text_to_textnodes(line) for line in lines], None, sum(len(line) for line in lines)),
+        ("ParentNode.to_html", lambda: tree.to_html(), None, len(document)),
+        ("generate_pages_recursive", quiet(lambda: generator.generate_pages_recursive(content, template, public, "/")), clean_public, site_bytes),
+        ("copy_from_to", quiet(lambda: generator.copy_from_to(static, public)), clean_public, static_bytes),
+    ]
+
+"""
+Takes the parsed arguments.
+Returns the parameters the results depend on, saved with the baseline.
+"""
+def config(args) -> dict:
+    return {
+        "pages": args.pages,
+        "page_size_kb": args.page_size,
+        "document_size_mb": args.document_size,
+        "depth": args.depth,
+        "mix": args.mix or corpus.DEFAULT_MIX,
+        "links": args.links,
+        "assets": args.assets,
+        "seed": args.seed,
+        "runs": args.runs,
+    }
+
+"""
+Takes the path of a baseline and the current parameters.
+Returns the saved results, or None if there is no baseline for those parameters.
+"""
+def load_baseline(path : str, parameters : dict):
+    try:
+        with open(path, "r") as baseline_file:
+            baseline = json.load(baseline_file)
+    except (OSError, ValueError):
+        return None
+    if baseline.get("config") != parameters:
+        print(f"The baseline {path} was saved with other parameters : not compared")
+        return None
+    return baseline["results"]
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="bench_suite.py", description="Benchmark the generator on a synthetic corpus.")
+    parser.add_argument("--pages", type=int, default=200, help="number of pages of the site (default: 200)")
+    parser.add_argument("--page-size", type=int, default=8, metavar="KB", help="size of each page (default: 8 KB)")
+    parser.add_argument("--document-size", type=int, default=4, metavar="MB", help="size of the large document (default: 4 MB)")
+    parser.add_argument("--depth", type=int, default=2, help="depth of the directories of the pages (default: 2)")
+    parser.add_argument("--mix", type=corpus.parse_mix, default=None, help="block mix, like paragraph=6,code=1")
+    parser.add_argument("--links", type=float, default=corpus.DEFAULT_LINK_DENSITY, help="share of the words that are links or images")
+    parser.add_argument("--assets", type=int, default=200, help="number of static files (default: 200)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the corpus (default: 0)")
+    parser.add_argument("--runs", type=int, default=3, help="runs of each benchmark, the best one is kept (default: 3)")
+    parser.add_argument("--work", default=None, help="directory of the corpus, kept across runs (default: a temporary directory)")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="path of the baseline")
+    parser.add_argument("--save-baseline", action="store_true", help="save the results as the baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help=f"slowdown from the baseline reported as a regression (default: x{DEFAULT_THRESHOLD})")
+    return parser.parse_args(argv)
+
+def main(argv):
+    args = parse_args(argv)
+    parameters = config(args)
+    with tempfile.TemporaryDirectory() as tmp:
+        work = args.work if args.work is not None else tmp
+        results = {}
+        for name, function, setup, size in benchmarks(args, work):
+            elapsed = best_time(function, args.runs, setup)
+            results[name] = elapsed
+            print(f"{name:<26} {elapsed * 1000:10.2f} ms  {size / elapsed / (1024 * 1024):8.2f} MB/s")
+
+    failed = False
+    baseline = None if args.save_baseline else load_baseline(args.baseline, parameters)
+    if baseline is not None:
+        print(f"Compared with {args.baseline} :")
+        for name, elapsed in results.items():
+            if name not in baseline:
+                continue
+            ratio = elapsed / baseline[name]
+            regression = ratio > args.threshold
+            failed = failed or regression
+            print(f"  {name:<26} x{ratio:5.2f}" + (f"  REGRESSION (more than x{args.threshold})" if regression else ""))
+    if args.save_baseline:
+        with open(args.baseline, "w") as baseline_file:
+            json.dump({"config": parameters, "results": results}, baseline_file, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,181 @@
+import argparse
+import os
+import random
+import shutil
+import sys
+
+"""
+Generates a synthetic site to benchmark the generator on : markdown pages in
+nested directories, static files and a template. The corpus only depends on its
+parameters and its seed, so two runs (or two machines) build the same content :
+- the number of pages and the depth of the directories they are spread in,
+- the size of each page, from a few lines up to tens of megabytes,
+- the mix of blocks (how often each kind of block is drawn),
+- the link density (the share of words that are links or images).
+"""
+
+VOCABULARY = (
+    "the of and to in is was that for on with as his by at from it an were which "
+    "ring hobbit wizard elf dwarf shire mountain river forest road king sword "
+    "journey shadow light council tower gate song tale age fellowship"
+).split()
+
+# How often each kind of block is drawn, by default
+DEFAULT_MIX = {"paragraph": 6, "heading": 1, "unordered_list": 2, "ordered_list": 1, "quote": 1, "code": 1}
+
+DEFAULT_LINK_DENSITY = 0.05
+
+"""
+Takes a "kind=weight,kind=weight" string.
+Returns the block mix it describes.
+Raises a ValueError for an unknown kind of block.
+"""
+def parse_mix(text : str) -> dict:
+    mix = {}
+    for item in text.split(","):
+        kind, _, weight = item.partition("=")
+        kind = kind.strip()
+        if kind not in DEFAULT_MIX:
+            raise ValueError(f"Unknown kind of block : {kind}")
+        mix[kind] = float(weight)
+    return mix
+
+"""
+Takes a random generator, a number of words and the link density.
+Returns a line of inline text : words, some bold, italic or code, and links and images.
+"""
+def inline_text(rng : random.Random, words : int, link_density : float) -> str:
+    parts = []
+    for _ in range(words):
+        word = rng.choice(VOCABULARY)
+        draw = rng.random()
+        if draw < link_density:
+            if rng.random() < 0.8:
+                parts.append(f"[{word}](/{rng.choice(VOCABULARY)}/{rng.randrange(1000)})")
+            else:
+                parts.append(f"![{word}](/images/{rng.randrange(100)}.png)")
+        elif draw < link_density + 0.03:
+            parts.append(f"**{word}**")
+        elif draw < link_density + 0.05:
+            parts.append(f"_{word}_")
+        elif draw < link_density + 0.06:
+            parts.append(f"`{word}`")
+        else:
+            parts.append(word)
+    return " ".join(parts)
+
+"""
+Takes a random generator, a kind of block and the link density.
+Returns the markdown of one block of that kind.
+"""
+def block(rng : random.Random, kind : str, link_density : float) -> str:
+    if kind == "heading":
+        return "#" * rng.randint(2, 4) + " " + inline_text(rng, rng.randint(2, 6), 0)
+    if kind == "unordered_list":
+        return "\n".join("- " + inline_text(rng, rng.randint(3, 12), link_density) for _ in range(rng.randint(2, 6)))
+    if kind == "ordered_list":
+        return "\n".join(f"{number}. " + inline_text(rng, rng.randint(3, 12), link_density) for number in range(1, rng.randint(2, 12)))
+    if kind == "quote":
+        return "\n".join("> " + inline_text(rng, rng.randint(5, 15), link_density) for _ in range(rng.randint(1, 3)))
+    if kind == "code":
+        return "```\n" + "\n".join("    " * rng.randint(0, 2) + " ".join(rng.choices(VOCABULARY, k=rng.randint(2, 8))) for _ in range(rng.randint(2, 10))) + "\n```"
+    return "\n".join(inline_text(rng, rng.randint(8, 20), link_density) for _ in range(rng.randint(1, 5)))
+
+"""
+Takes a random generator, a title, a size in bytes, a block mix and the link density.
+Returns a markdown document with that title, of about that size.
+"""
+def document(rng : random.Random, title : str, size : int, mix : dict = None, link_density : float = DEFAULT_LINK_DENSITY) -> str:
+    mix = DEFAULT_MIX if mix is None else mix
+    kinds = list(mix)
+    weights = [mix[kind] for kind in kinds]
+    blocks = [f"# {title}"]
+    length = len(blocks[0])
+    while length < size:
+        text = block(rng, rng.choices(kinds, weights)[0], link_density)
+        blocks.append(text)
+        length += len(text) + 2
+    return "\n\n".join(blocks) + "\n"
+
+"""
+Takes the number of a page and the depth of the directories.
+Returns the relative path of its markdown file : the pages are spread in
+directories of 4 subdirectories each, depth levels deep.
+"""
+def page_path(number : int, depth : int) -> str:
+    parts = []
+    rest = number
+    for level in range(depth):
+        parts.append(f"section-{level}-{rest % 4}")
+        rest //= 4
+    return os.path.join(*parts, f"page-{number}", "index.md") if depth > 0 else os.path.join(f"page-{number}", "index.md")
+
+TEMPLATE = """<!doctype html>
+<html>
+  <head>
+    <title>{{ Title }}</title>
+    <link href="/index.css" rel="stylesheet" />
+  </head>
+  <body>
+    <article>{{ Content }}</article>
+  </body>
+</html>
+"""
+
+"""
+Takes the root directory of the corpus and its parameters : the number of pages,
+the size of each page in bytes, the depth of the directories, the block mix,
+the link density, the number of static files and the seed.
+Writes content/, static/ and template.html under the root, unless the corpus is
+already there with the same parameters. A corpus generated with other parameters
+is deleted first, so none of its files are left among the new ones.
+Returns the paths of the content directory, the static directory and the template.
+"""
+def generate(root : str, pages : int = 100, page_size : int = 8192, depth : int = 2, mix : dict = None, link_density : float = DEFAULT_LINK_DENSITY, assets : int = 50, seed : int = 0) -> tuple:
+    content = os.path.join(root, "content")
+    static = os.path.join(root, "static")
+    template = os.path.join(root, "template.html")
+    stamp_path = os.path.join(root, "corpus.txt")
+    stamp = repr((pages, page_size, depth, sorted((mix or DEFAULT_MIX).items()), link_density, assets, seed))
+    if os.path.isfile(stamp_path):
+        with open(stamp_path, "r") as stamp_file:
+            if stamp_file.read() == stamp:
+                return content, static, template
+    for directory in (content, static):
+        shutil.rmtree(directory, ignore_errors=True)
+
+    rng = random.Random(seed)
+    for number in range(pages):
+        path = os.path.join(content, page_path(number, depth))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as page_file:
+            page_file.write(document(rng, f"Page {number}", page_size, mix, link_density))
+    os.makedirs(os.path.join(static, "images"), exist_ok=True)
+    with open(os.path.join(static, "index.css"), "w") as css_file:
+        css_file.write("".join(f".block-{number} {{\n  margin: {number}px;\n  color: #{number % 256:02x}{number % 256:02x}{number % 256:02x};\n}}\n" for number in range(500)))
+    for number in range(assets):
+        with open(os.path.join(static, "images", f"{number}.png"), "wb") as image_file:
+            image_file.write(rng.randbytes(4096))
+    with open(template, "w") as template_file:
+        template_file.write(TEMPLATE)
+    with open(stamp_path, "w") as stamp_file:
+        stamp_file.write(stamp)
+    return content, static, template
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="corpus.py", description="Generate a synthetic site to benchmark the generator on.")
+    parser.add_argument("root", help="directory of the corpus")
+    parser.add_argument("--pages", type=int, default=100, help="number of pages (default: 100)")
+    parser.add_argument("--page-size", type=int, default=8, metavar="KB", help="size of each page (default: 8 KB)")
+    parser.add_argument("--depth", type=int, default=2, help="depth of the directories of the pages (default: 2)")
+    parser.add_argument("--mix", type=parse_mix, default=None, help="block mix, like paragraph=6,code=1 (default: " + ",".join(f"{kind}={weight}" for kind, weight in DEFAULT_MIX.items()) + ")")
+    parser.add_argument("--links", type=float, default=DEFAULT_LINK_DENSITY, help=f"share of the words that are links or images (default: {DEFAULT_LINK_DENSITY})")
+    parser.add_argument("--assets", type=int, default=50, help="number of static files (default: 50)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the corpus (default: 0)")
+    args = parser.parse_args(argv)
+    generate(args.root, args.pages, args.page_size * 1024, args.depth, args.mix, args.links, args.assets, args.seed)
+    print(f"Corpus of {args.pages} pages written to {args.root}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
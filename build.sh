@@ -1 +1 @@
-python3 src/main.py "/static-site-generator/" "docs"
\ No newline at end of file
+python3 src/main.py --target docs:/static-site-generator/ --target public:/
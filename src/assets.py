@@ -0,0 +1,367 @@
+import errno
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+import atomicfile
+import manifest as mf
+import minify as mn
+
+"""
+The static assets (images, stylesheets...) are copied as is from the
+static directory to the destination directory.
+Instead of wiping the destination and copying everything again, the assets
+can be synced : only the new or changed files are copied, and only the files
+that vanished from the source are deleted.
+The stylesheets can also be minified on the way (see place_minified).
+"""
+
+############################################ Placement strategies
+
+"""
+A file can be placed in the destination in several ways, from the cheapest
+to the most expensive :
+- hardlink : the destination is another name of the source file, nothing is copied.
+  The two paths share the same content, so it must never be edited in place.
+- reflink : the filesystem shares the data blocks until one side is modified (btrfs, xfs...).
+- copy_file_range : the kernel copies the bytes (or sendfile when unavailable), without
+  passing them through user space.
+- copy : a plain shutil.copy.
+Each strategy falls back on the next ones when the filesystem does not support it
+or when the source and the destination are on different filesystems.
+A reflink failing on a filesystem fails for every file : once it failed on the
+device of a destination directory, it is not attempted there again by the same
+place_files call (see DEVICE_WIDE_METHODS).
+"""
+STRATEGIES = ["auto","hardlink","reflink","copy_file_range","copy"]
+
+FALLBACKS = {
+    "auto": ["reflink","copy_file_range","copy"],
+    "hardlink": ["hardlink","reflink","copy_file_range","copy"],
+    "reflink": ["reflink","copy_file_range","copy"],
+    "copy_file_range": ["copy_file_range","copy"],
+    "copy": ["copy"],
+}
+
+# ioctl request to clone a whole file, from linux/fs.h
+FICLONE = 0x40049409
+
+# Errors meaning "this method is not possible here", as opposed to a real failure
+UNSUPPORTED_ERRNOS = {errno.EXDEV, errno.EOPNOTSUPP, errno.ENOTSUP, errno.EINVAL, errno.ENOSYS, errno.ENOTTY, errno.EPERM, errno.EMLINK}
+
+# The methods whose support depends on the filesystem only, not on the file
+# (a hardlink can fail on a single file, when it has too many links)
+DEVICE_WIDE_METHODS = ("reflink",)
+
+def place_hardlink(source_path : str, dest_path : str):
+    os.link(source_path,dest_path)
+
+def place_reflink(source_path : str, dest_path : str):
+    if fcntl is None:
+        raise OSError(errno.ENOTSUP,"reflinks are not supported on this platform")
+    with open(source_path,"rb") as source_file, open(dest_path,"wb") as dest_file:
+        fcntl.ioctl(dest_file.fileno(),FICLONE,source_file.fileno())
+    shutil.copymode(source_path,dest_path)
+
+def place_copy_file_range(source_path : str, dest_path : str):
+    with open(source_path,"rb") as source_file, open(dest_path,"wb") as dest_file:
+        source_fd = source_file.fileno()
+        dest_fd = dest_file.fileno()
+        remaining = os.fstat(source_fd).st_size
+        use_sendfile = not hasattr(os,"copy_file_range")
+        while remaining > 0:
+            if not use_sendfile:
+                try:
+                    sent = os.copy_file_range(source_fd,dest_fd,remaining)
+                except OSError as error:
+                    if error.errno not in UNSUPPORTED_ERRNOS:
+                        raise
+                    use_sendfile = True
+                    continue
+            else:
+                sent = os.sendfile(dest_fd,source_fd,None,remaining)
+            if sent == 0:
+                break
+            remaining -= sent
+    shutil.copymode(source_path,dest_path)
+
+def place_copy(source_path : str, dest_path : str):
+    shutil.copy(source_path,dest_path)
+
+PLACE_METHODS = {
+    "hardlink": place_hardlink,
+    "reflink": place_reflink,
+    "copy_file_range": place_copy_file_range,
+    "copy": place_copy,
+}
+
+"""
+The files minified when placed with minify, by extension.
+"""
+MINIFIERS = {".css": mn.minify_css}
+
+def is_minifiable(path : str) -> bool:
+    return os.path.splitext(path)[1].lower() in MINIFIERS
+
+"""
+Takes a source file path and a destination file path.
+Writes the minified content of the source to the destination atomically (see
+atomicfile), so a destination hardlinked to the source is never written through.
+"""
+def place_minified(source_path : str, dest_path : str):
+    with open(source_path,"r",encoding="utf-8") as source_file:
+        content = source_file.read()
+    atomicfile.write_file(dest_path,MINIFIERS[os.path.splitext(source_path)[1].lower()](content),"w","utf-8")
+
+"""
+Takes a source file path, a destination file path, a placement strategy,
+whether the file is minified, and optionally the set of the methods known to
+fail on the filesystem of the destination.
+Places the file with the first method of the strategy that works, and returns its name,
+or "minify" if the file was minified (see MINIFIERS).
+The methods of the set are skipped, and a method of DEVICE_WIDE_METHODS that
+turns out not to be supported is added to it.
+Any existing destination file is unlinked first, so a hardlinked destination
+never gets written through.
+"""
+def place_file(source_path : str, dest_path : str, strategy : str = "auto", minify : bool = False, unsupported : set = None) -> str:
+    if strategy not in FALLBACKS:
+        raise ValueError(f"Unknown placement strategy : {strategy}")
+    if minify and is_minifiable(source_path):
+        place_minified(source_path,dest_path)
+        return "minify"
+    if os.path.lexists(dest_path):
+        os.remove(dest_path)
+    methods = FALLBACKS[strategy]
+    for method in methods[:-1]:
+        if unsupported is not None and method in unsupported:
+            continue
+        try:
+            PLACE_METHODS[method](source_path,dest_path)
+            return method
+        except OSError as error:
+            if error.errno not in UNSUPPORTED_ERRNOS:
+                raise
+            if unsupported is not None and method in DEVICE_WIDE_METHODS:
+                unsupported.add(method)
+            if os.path.lexists(dest_path):
+                os.remove(dest_path)
+    PLACE_METHODS[methods[-1]](source_path,dest_path)
+    return methods[-1]
+
+# Placing files is I/O bound and releases the GIL, so threads scale with the disk
+DEFAULT_JOBS = min(32,(os.cpu_count() or 1) + 4)
+
+"""
+Takes a list of (source path, destination path) pairs, a placement strategy,
+a number of threads, an optional function called on each pair once placed and
+whether the files are minified (see place_file).
+Creates all the destination directories first, parents before children,
+then places the files through a bounded thread pool. The methods that failed
+on the device of a directory are not attempted again on that device (see place_file).
+Returns the list of the results (the method used, or what after returned),
+in the order of the pairs whatever the order the threads finished in.
+"""
+def place_files(pairs : list[tuple[str,str]], strategy : str = "auto", jobs : int = DEFAULT_JOBS, after = None, minify : bool = False) -> list:
+    devices = {}
+    for directory in sorted({os.path.dirname(dest_path) for _, dest_path in pairs}):
+        os.makedirs(directory,exist_ok=True)
+        devices[directory] = os.stat(directory).st_dev
+    # The methods that failed on each device, shared by the threads
+    unsupported = {device: set() for device in devices.values()}
+    
+    def place(pair):
+        method = place_file(pair[0],pair[1],strategy,minify,unsupported[devices[os.path.dirname(pair[1])]])
+        if after is not None:
+            return after(pair,method)
+        return method
+    
+    if jobs <= 1 or len(pairs) <= 1:
+        return [place(pair) for pair in pairs]
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(place,pairs))
+
+"""
+Takes a strategy, a source directory and a destination directory.
+Returns the strategy without the methods that cannot work across two filesystems,
+so they are not attempted (and failed) again for every single file.
+"""
+def strategy_for(strategy : str, source : str, destination : str) -> str:
+    if strategy not in FALLBACKS:
+        raise ValueError(f"Unknown placement strategy : {strategy}")
+    if strategy in ("hardlink","reflink","auto"):
+        if os.stat(source).st_dev != os.stat(destination).st_dev:
+            return "copy_file_range"
+    return strategy
+
+############################################ Sync
+
+"""
+Counts what a sync did : the relative paths of the files that
+were copied, skipped because unchanged, and removed.
+"""
+class SyncReport:
+    def __init__(self):
+        self.copied = []
+        self.skipped = []
+        self.removed = []
+        self.methods = {}
+        # (destination path, bytes saved) of each minified file
+        self.minified = []
+
+    def summary(self):
+        summary = f"{len(self.copied)} copied, {len(self.skipped)} skipped, {len(self.removed)} removed"
+        if len(self.methods) > 0:
+            summary += " (" + ", ".join(f"{method}: {count}" for method, count in sorted(self.methods.items())) + ")"
+        if len(self.minified) > 0:
+            summary += f", {sum(saved for _, saved in self.minified)} bytes saved by minification"
+        return summary
+
+    def counts(self) -> dict:
+        return {"copied": len(self.copied), "skipped": len(self.skipped), "removed": len(self.removed)}
+
+    def __repr__(self):
+        return f"SyncReport({self.summary()})"
+
+"""
+Takes a root directory.
+Returns the sorted lists of the relative paths of every directory and every file below it.
+"""
+def list_tree(root : str) -> tuple[list[str],list[str]]:
+    dirs = []
+    files = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        for dirname in dirnames:
+            dirs.append(os.path.relpath(os.path.join(dirpath,dirname),root))
+        for filename in filenames:
+            files.append(os.path.relpath(os.path.join(dirpath,filename),root))
+    return sorted(dirs), sorted(files)
+
+"""
+Takes a root directory.
+Returns the sorted list of the relative paths of every file below it.
+"""
+def list_files(root : str) -> list[str]:
+    return list_tree(root)[1]
+
+"""
+Takes a list of placement methods (as returned by place_files).
+Returns how many times each one was used.
+"""
+def count_methods(methods : list[str]) -> dict:
+    counts = {}
+    for method in methods:
+        counts[method] = counts.get(method,0) + 1
+    return counts
+
+"""
+Takes the (source path, destination path) pairs placed and the methods used.
+Returns the (destination path, bytes saved) of each minified file.
+"""
+def minify_savings(pairs : list[tuple[str,str]], methods : list[str]) -> list:
+    return [(dest_path, os.path.getsize(source_path) - os.path.getsize(dest_path)) for (source_path, dest_path), method in zip(pairs,methods) if method == "minify"]
+
+"""
+Takes the manifest entry of a file, the stat of the source file,
+the destination path and whether contents are hashed.
+Returns True if the destination is still an up to date copy of the source
+(or an up to date minified copy, when the entry is for a minified file).
+"""
+def is_unchanged(entry : dict, source_path : str, stat : os.stat_result, dest_path : str, use_hash : bool) -> bool:
+    if entry is None or entry.get("size") != stat.st_size:
+        return False
+    try:
+        if os.stat(dest_path).st_size != entry.get("dest_size",stat.st_size):
+            return False
+    except FileNotFoundError:
+        return False
+    if entry.get("mtime_ns") == stat.st_mtime_ns:
+        return True
+    # Same size but touched : only the content hash can tell
+    if use_hash and "hash" in entry:
+        if mf.file_hash(source_path) == entry["hash"]:
+            entry["mtime_ns"] = stat.st_mtime_ns
+            return True
+    return False
+
+"""
+Takes a removed file path and the destination root.
+Deletes the parent directories left empty, up to the root.
+"""
+def prune_empty_dirs(path : str, root : str):
+    directory = os.path.dirname(os.path.abspath(path))
+    root = os.path.abspath(root)
+    while directory != root and directory.startswith(root + os.sep):
+        try:
+            os.rmdir(directory)
+        except OSError:
+            return
+        directory = os.path.dirname(directory)
+
+"""
+Takes a source directory, a destination directory and the manifest
+of the previous sync (a dictionary, updated in place).
+Copies the new or changed files, deletes from the destination the files
+that vanished from the source since the previous sync, and leaves any
+other file of the destination (the generated pages) untouched.
+With use_hash, a file whose mtime changed but whose content did not is skipped.
+The files are placed with the given strategy (see place_file), by jobs threads.
+With minify, the stylesheets are minified, and placed again when minify changed.
+With the SiteIndex of the source (see siteindex.scan), its files and their stats
+are taken from the index instead of listing the source again.
+Returns the SyncReport of the run.
+"""
+def sync_tree(source : str, destination : str, manifest : dict, use_hash : bool = False, strategy : str = "auto", jobs : int = DEFAULT_JOBS, minify : bool = False, site = None) -> SyncReport:
+    report = SyncReport()
+    os.makedirs(destination,exist_ok=True)
+    strategy = strategy_for(strategy,source,destination)
+    files = manifest.setdefault("files",{})
+    source_files = list_files(source) if site is None else site.files()
+    
+    to_place = []
+    for rel_path in source_files:
+        source_path = os.path.join(source,rel_path)
+        dest_path = os.path.join(destination,rel_path)
+        stat = os.stat(source_path) if site is None else site.entry(rel_path).stat()
+        entry = files.get(rel_path)
+        if entry is not None and entry.get("minified",False) != (minify and is_minifiable(rel_path)):
+            entry = None
+        if is_unchanged(entry, source_path, stat, dest_path, use_hash):
+            report.skipped.append(rel_path)
+        else:
+            to_place.append((rel_path,stat))
+    
+    def hash_placed(pair, method):
+        return method, mf.file_hash(pair[0]) if use_hash else None
+    
+    pairs = [(os.path.join(source,rel_path),os.path.join(destination,rel_path)) for rel_path, _ in to_place]
+    results = place_files(pairs,strategy,jobs,hash_placed,minify)
+    for (rel_path, stat), (method, digest) in zip(to_place,results):
+        entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        if digest is not None:
+            entry["hash"] = digest
+        if method == "minify":
+            entry["minified"] = True
+            entry["dest_size"] = os.path.getsize(os.path.join(destination,rel_path))
+        files[rel_path] = entry
+        report.copied.append(rel_path)
+    report.methods = count_methods([method for method, _ in results])
+    report.minified = minify_savings(pairs,[method for method, _ in results])
+    
+    present = set(source_files)
+    for rel_path in sorted(files):
+        if rel_path in present:
+            continue
+        dest_path = os.path.join(destination,rel_path)
+        if os.path.isfile(dest_path):
+            os.remove(dest_path)
+            prune_empty_dirs(dest_path,destination)
+        del files[rel_path]
+        report.removed.append(rel_path)
+    
+    return report
@@ -0,0 +1,42 @@
+import os
+
+"""
+The files of a build (pages, minified assets, manifests, cache entries...) are
+written atomically : to a temporary file next to them, renamed over them once
+complete. Readers never see a half-written file, an interrupted build never
+leaves one behind, and a file hardlinked to the previous build (see staging) is
+replaced instead of written through.
+"""
+
+TMP_SUFFIX = ".tmp"
+
+"""
+Takes the path of a file.
+Returns the path of its temporary file, unique per process, as the pages and
+the parse cache entries can be written by a pool of processes.
+"""
+def tmp_path_for(path : str) -> str:
+    return f"{path}.{os.getpid()}{TMP_SUFFIX}"
+
+"""
+Takes the path of a file, its content (a string or bytes, or an iterable of them
+written chunk by chunk), the mode to open it with ("w" or "wb") and its encoding.
+Writes the file atomically, creating its directory if needed. When writing fails,
+like a chunk raising while it is rendered, the temporary file is removed.
+"""
+def write_file(path : str, content, mode : str = "w", encoding : str = None):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = tmp_path_for(path)
+    try:
+        with open(tmp_path, mode, encoding=encoding) as tmp_file:
+            if isinstance(content, (str, bytes)):
+                tmp_file.write(content)
+            else:
+                tmp_file.writelines(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+import zlib
+
+import atomicfile
+from parsecache import PARSER_VERSION
+
+"""
+The block memo remembers the html of the blocks of markdown, by the hash of
+their text and the basepath, so when one paragraph of a large document changes,
+only that paragraph is parsed and rendered again (see splitmarkdown.DocumentStream).
+Headings are not memoized : their anchor id depends on the rest of the document.
+
+The memo stays in memory across the rebuilds of the watch command, and is saved
+in the build directory between runs. Its hits and misses are counted per build.
+"""
+
+DEFAULT_MAX_ENTRIES = 200000
+
+class BlockMemo:
+    def __init__(self, entries : dict = None, max_entries : int = DEFAULT_MAX_ENTRIES):
+        self.entries = {} if entries is None else entries
+        self.max_entries = max_entries
+        self.used = set()
+        self.hits = 0
+        self.misses = 0
+
+    """
+    Takes the lines of a block, the basepath its html is rendered for and
+    whether the html is minified.
+    Returns the key of the block.
+    """
+    def key(self, lines : list, basepath : str, minify : bool = False) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{basepath}\0".encode())
+        if minify:
+            digest.update(b"minify\0")
+        digest.update("\n".join(lines).encode())
+        return digest.hexdigest()
+
+    """
+    Takes a key.
+    Returns the [html, word count, bytes saved by the minification] of the block,
+    or None if it is not memoized.
+    """
+    def get(self, key : str):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.used.add(key)
+        return entry
+
+    def put(self, key : str, html : str, words : int, saved : int = 0) -> list:
+        entry = [html, words, saved]
+        self.entries[key] = entry
+        self.used.add(key)
+        return entry
+
+    """
+    Forgets the entries not used since the previous trim when there are more than
+    max_entries, then starts counting the hits and misses of a new build.
+    """
+    def trim(self):
+        if len(self.entries) > self.max_entries:
+            self.entries = {key: entry for key, entry in self.entries.items() if key in self.used}
+        self.used = set()
+        self.hits = 0
+        self.misses = 0
+
+    def summary(self) -> str:
+        return f"{self.hits} hits, {self.misses} misses"
+
+"""
+Takes the path of a saved memo.
+Returns the BlockMemo saved there, or an empty one if the file cannot be read or
+was saved by another version of the parser.
+"""
+def load_memo(path : str) -> BlockMemo:
+    try:
+        with open(path, "rb") as memo_file:
+            data = json.loads(zlib.decompress(memo_file.read()))
+    except (OSError, ValueError, zlib.error):
+        return BlockMemo()
+    if not isinstance(data, dict) or data.get("version") != PARSER_VERSION:
+        return BlockMemo()
+    return BlockMemo(data.get("entries", {}))
+
+"""
+Takes a path and a BlockMemo.
+Saves the memo, compressed and written atomically (see atomicfile).
+"""
+def save_memo(path : str, memo : BlockMemo):
+    atomicfile.write_file(path, zlib.compress(json.dumps({"version": PARSER_VERSION, "entries": memo.entries}).encode()), "wb")
+
+memos = {}
+
+"""
+Takes the path of a saved memo.
+Returns its BlockMemo, loaded once per process.
+"""
+def memo_for(path : str) -> BlockMemo:
+    key = os.path.abspath(path)
+    if key not in memos:
+        memos[key] = load_memo(path)
+    return memos[key]
@@ -0,0 +1,223 @@
+import json
+import sys
+import threading
+import time
+
+"""
+The build reports what it does as a stream of events instead of printing it :
+a stage starts, a file is generated or skipped, a stage finishes (with its
+duration and its counts), an error happens... Each event is sent to the sinks,
+which decide what is shown (see SINKS) :
+- summary (the default) : one line per stage, and the errors,
+- quiet : the errors only,
+- progress : a progress bar over the files of each stage, and one line per stage,
+- verbose : one line per file as well,
+- json : every event, as one JSON object per line.
+Every event has a level : DETAIL for the events of each file, SUMMARY for the
+events of each stage, ERROR for the errors. The events below the level of every
+sink are dropped right away, and the callers check enabled(DETAIL) before
+building the events of each file, so a build of 100k files does not pay for
+the lines it does not show.
+"""
+
+DETAIL = 10
+SUMMARY = 20
+ERROR = 40
+
+LEVEL_NAMES = {DETAIL: "detail", SUMMARY: "summary", ERROR: "error"}
+
+class Event:
+    __slots__ = ("kind", "stage", "level", "subject", "message", "seconds", "data", "time")
+
+    """
+    The kind is "start", "finish", "skip", "error" or "info". The stage is the part of
+    the build it comes from ("assets", "pages"...), the subject the file it is about
+    (or None), the message its readable description (or None), the seconds the
+    duration of what finished (or None) and the data its other fields, like counts.
+    """
+    def __init__(self, kind : str, stage : str, level : int = SUMMARY, subject : str = None, message : str = None, seconds : float = None, data : dict = None):
+        self.kind = kind
+        self.stage = stage
+        self.level = level
+        self.subject = subject
+        self.message = message
+        self.seconds = seconds
+        self.data = data
+        self.time = time.time()
+
+    def to_dict(self) -> dict:
+        event = {"time": round(self.time, 6), "kind": self.kind, "stage": self.stage, "level": LEVEL_NAMES.get(self.level, self.level)}
+        if self.subject is not None:
+            event["subject"] = self.subject
+        if self.message is not None:
+            event["message"] = self.message
+        if self.seconds is not None:
+            event["seconds"] = round(self.seconds, 6)
+        if self.data:
+            event.update(self.data)
+        return event
+
+    def __repr__(self):
+        return f"Event({self.kind}, {self.stage}, {self.subject}, {self.message})"
+
+"""
+Prints the message of each event from its level, one per line : stdout by default
+(looked up on each event, so it can be redirected), or the given stream.
+"""
+class TextSink:
+    def __init__(self, level : int = SUMMARY, stream = None):
+        self.level = level
+        self.stream = stream
+
+    def write(self, text : str):
+        print(text, file=self.stream if self.stream is not None else sys.stdout)
+
+    def handle(self, event : Event):
+        if event.message is None:
+            return
+        if event.kind == "error":
+            self.write(f"Error : {event.message}")
+        elif event.kind == "finish" and event.seconds is not None and event.level > DETAIL:
+            self.write(f"{event.message} ({event.seconds:.2f} s)")
+        else:
+            self.write(event.message)
+
+"""
+Draws a progress bar over the files of the running stage on stderr, redrawn in
+place, and prints the summary lines of the stages like a TextSink.
+The bar is redrawn at most every REDRAW_SECONDS (and on the last file), so the
+terminal is not flooded by a stage of 100k files.
+"""
+class ProgressSink(TextSink):
+    REDRAW_SECONDS = 0.1
+
+    def __init__(self, stream = None, bar_stream = None, width : int = 30):
+        super().__init__(SUMMARY, stream)
+        self.level = DETAIL
+        self.bar_stream = bar_stream
+        self.width = width
+        self.stage = None
+        self.total = None
+        self.done = 0
+        self.drawn = None
+        self.drawn_at = 0.0
+
+    def draw(self):
+        now = time.monotonic()
+        if now - self.drawn_at < self.REDRAW_SECONDS and self.done != self.total:
+            return
+        self.drawn_at = now
+        if self.total:
+            filled = self.width * min(self.done, self.total) // self.total
+            text = f"\r{self.stage} [{'#' * filled}{'.' * (self.width - filled)}] {self.done}/{self.total}"
+        else:
+            text = f"\r{self.stage} : {self.done}"
+        stream = self.bar_stream if self.bar_stream is not None else sys.stderr
+        stream.write(text)
+        stream.flush()
+        self.drawn = text
+
+    def clear(self):
+        if self.drawn is not None:
+            stream = self.bar_stream if self.bar_stream is not None else sys.stderr
+            stream.write("\r" + " " * len(self.drawn) + "\r")
+            stream.flush()
+            self.drawn = None
+
+    def handle(self, event : Event):
+        if event.level == DETAIL:
+            if event.stage == self.stage and event.kind in ("finish", "skip"):
+                self.done += 1
+                self.draw()
+            return
+        if event.kind == "start":
+            self.clear()
+            self.stage = event.stage
+            self.total = event.data.get("total") if event.data else None
+            self.done = 0
+            self.drawn_at = 0.0
+            return
+        if event.kind == "finish" and event.stage == self.stage:
+            self.clear()
+            self.stage = None
+        super().handle(event)
+
+"""
+Writes every event as a JSON object, one per line : stdout by default, or the given stream.
+"""
+class JsonLinesSink:
+    def __init__(self, stream = None):
+        self.level = DETAIL
+        self.stream = stream
+
+    def handle(self, event : Event):
+        stream = self.stream if self.stream is not None else sys.stdout
+        stream.write(json.dumps(event.to_dict()) + "\n")
+
+SINKS = {
+    "summary": lambda: [TextSink(SUMMARY)],
+    "quiet": lambda: [TextSink(ERROR, sys.stderr)],
+    "progress": lambda: [ProgressSink()],
+    "verbose": lambda: [TextSink(DETAIL)],
+    "json": lambda: [JsonLinesSink()],
+}
+
+sinks = SINKS["summary"]()
+# The lowest level any sink listens to
+lowest = SUMMARY
+# The sinks are not thread-safe : they handle one event at a time
+lock = threading.Lock()
+
+"""
+Takes a list of sinks.
+Sends the next events to them instead of the current ones.
+"""
+def set_sinks(new_sinks : list):
+    global sinks, lowest
+    sinks = new_sinks
+    lowest = min((sink.level for sink in sinks), default=ERROR + 1)
+
+"""
+Takes a level.
+Returns True if some sink listens to the events of that level.
+"""
+def enabled(level : int) -> bool:
+    return level >= lowest
+
+def emit(event : Event):
+    if event.level < lowest:
+        return
+    with lock:
+        for sink in sinks:
+            if event.level >= sink.level:
+                sink.handle(event)
+
+"""
+Takes a stage, and the number of files it is going to handle if known.
+Reports the start of the stage, and returns the time it started at, for finish.
+"""
+def start(stage : str, total : int = None) -> float:
+    emit(Event("start", stage, SUMMARY, data={"total": total} if total is not None else None))
+    return time.perf_counter()
+
+"""
+Takes a stage, the time it started at (see start), its summary and its counts.
+Reports the end of the stage, with its duration.
+"""
+def finish(stage : str, started : float, message : str, **data):
+    emit(Event("finish", stage, SUMMARY, message=message, seconds=time.perf_counter() - started, data=data))
+
+"""
+Takes a kind ("finish" or "skip"), a stage, the file it is about, its description
+and the time the work on the file started at (or None).
+Reports what happened to one file of a stage.
+"""
+def file(kind : str, stage : str, subject : str, message : str, started : float = None, **data):
+    seconds = time.perf_counter() - started if started is not None else None
+    emit(Event(kind, stage, DETAIL, subject, message, seconds, data))
+
+def info(stage : str, message : str, level : int = SUMMARY, subject : str = None, **data):
+    emit(Event("info", stage, level, subject, message, data=data))
+
+def error(stage : str, message : str, subject : str = None):
+    emit(Event("error", stage, ERROR, subject, message))
@@ -0,0 +1,38 @@
+import os
+import tempfile
+import unittest
+
+import events
+
+"""
+The shared fixture of the tests working on files : each test gets its own
+temporary directory, removed after it, and the events of the build are not
+shown, so the test run prints only its own report.
+"""
+class TempDirTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(events.set_sinks,events.sinks)
+        events.set_sinks([])
+
+    """
+    Takes the path of a file relative to the root (the temporary directory by
+    default) and its content.
+    Writes the file, creating its directories.
+    Returns its path.
+    """
+    def write(self, rel_path, content, root = None):
+        path = os.path.join(root if root is not None else self.tmp.name,rel_path)
+        os.makedirs(os.path.dirname(path),exist_ok=True)
+        with open(path,"w") as file:
+            file.write(content)
+        return path
+
+    """
+    Takes the path of a file relative to the root (the temporary directory by default).
+    Returns its content.
+    """
+    def read(self, rel_path, root = None):
+        with open(os.path.join(root if root is not None else self.tmp.name,rel_path),"r") as file:
+            return file.read()
@@ -0,0 +1,71 @@
+import itertools
+
+import splitmarkdown as sp
+
+"""
+Front matter is a block of metadata at the very beginning of a markdown page,
+between two --- lines, with one "key: value" per line :
+---
+title: Tom Bombadil
+date: 2024-03-01
+tags: [tolkien, characters]
+---
+Values are strings, or lists of strings when written between brackets.
+The front matter is not part of the content of the page. A first --- line that
+is never closed does not start a front matter : the page is read as it is.
+"""
+
+DELIMITER = "---"
+
+"""
+Takes the raw value of a front matter line.
+Returns it as a string (quotes removed), or as a list of strings if it is between brackets.
+"""
+def parse_value(value : str):
+    value = value.strip()
+    if value.startswith("[") and value.endswith("]"):
+        return [parse_value(item) for item in value[1:-1].split(",") if len(item.strip()) > 0]
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    return value
+
+"""
+Takes an iterable of lines, like a file opened in text mode.
+Reads the front matter, if the first line starts one, and nothing more.
+Returns the metadata dictionary (empty without front matter) and an iterator
+over the remaining lines, the content of the page.
+When the front matter is never closed, every line is content.
+"""
+def read_front_matter(lines):
+    lines = iter(lines)
+    first = next(lines, None)
+    if first is None:
+        return {}, iter(())
+    if first.rstrip() != DELIMITER:
+        return {}, itertools.chain([first], lines)
+    metadata = {}
+    read = [first]
+    for line in lines:
+        read.append(line)
+        line = line.rstrip()
+        if line == DELIMITER:
+            return metadata, lines
+        key, separator, value = line.partition(":")
+        if len(separator) > 0 and len(key.strip()) > 0:
+            metadata[key.strip()] = parse_value(value)
+    return {}, iter(read)
+
+"""
+Takes the path of a markdown page.
+Returns its metadata without parsing the page : the front matter, and the title
+of the first h1 heading when the front matter has none. The file is only read up
+to the end of the front matter, or up to that heading.
+"""
+def read_metadata(path : str) -> dict:
+    with open(path, "r") as markdown_file:
+        metadata, lines = read_front_matter(markdown_file)
+        if "title" not in metadata:
+            title = sp.find_title(lines)
+            if title is not None:
+                metadata["title"] = title
+    return metadata
@@ -1,3 +1,22 @@
+import sys
+
+from minify import PRESERVED_TAGS
+
+"""
+Attributes holding an url, rewritten for the basepath of the site when rendering.
+"""
+URL_ATTRIBUTES = ("href", "src")
+
+"""
+Takes an url and the basepath of the site (like "/static-site-generator/").
+Returns the url with the basepath applied if it is absolute to the site root ("/blog"),
+unchanged otherwise ("https://...", "//cdn...", "#anchor", "page.html").
+"""
+def rewrite_url(url : str, basepath : str) -> str:
+    if basepath is None or basepath == "/" or not url.startswith("/") or url.startswith("//"):
+        return url
+    return basepath + url[1:]
+
 """
 An HTMLNode "HTMLNode" represents a node in an HTML document tree.
 For example : a <p> tag and its contents, or an <a> tag and its contents. 
@@ -5,6 +24,8 @@ It can be block level or inline, and is designed to only output HTML.
 """
 
 class HTMLNode :
+    # Slots instead of a __dict__ per node : a page is made of thousands of nodes
+    __slots__ = ("tag", "value", "children", "props")
     
     """
     Each node has a tag, a value, children and properties.
@@ -12,24 +33,74 @@ class HTMLNode :
     The value is a string representing the value of the HTML tag (e.g. the text inside a paragraph).
     Children are a list of HTMLNode objects representing the children ot this node
     Properties are a dictionary of key-value pairs representing the attributes of the HTML tag. For example, a link (<a> tag) might have {"href": "https://www.google.com"}.
+    Tag names are interned, so the nodes share a single string per tag, and nodes without
+    attributes share None rather than holding an empty dictionary each.
     """
     def __init__(self, tag : str = None, value : str = None, children : list = None, props : dict = None):
-        self.tag = tag  # if None, it renders as raw text
+        self.tag = sys.intern(tag) if tag is not None else None  # if None, it renders as raw text
         self.value = value # if None, assuming to have children
         self.children = children # if None, assuming to have a value
-        self.props = props # if None, assuming to have no attributes
+        self.props = props if props else None # if None, assuming to have no attributes
+    
+    def to_html(self, basepath : str = None):
+        raise NotImplementedError
     
-    def to_html(self):
+    """
+    Takes the basepath of the site (or None) and a minify.Minifier (or None).
+    Returns what the node renders to : either its whole html string (for a leaf), or
+    a tuple (opening tag, children, closing tag) for a node with children.
+    Each subclass defines it.
+    """
+    def html_parts(self, basepath : str = None, minifier = None):
         raise NotImplementedError
     
     """
+    Takes the basepath of the site (or None), applied to the url attributes,
+    and a minify.Minifier (or None).
+    Yields the html of the node and all its descendants, chunk by chunk.
+    The tree is walked with an explicit stack instead of recursive calls, so
+    no intermediate string is built for the children and the depth is not
+    limited by the recursion limit.
+    With a Minifier, the whitespace of the text of the leaves is collapsed, except
+    inside the elements where it matters (like pre).
+    """
+    def iter_html(self, basepath : str = None, minifier = None):
+        stack = [self]
+        while len(stack) > 0:
+            item = stack.pop()
+            if isinstance(item, str):
+                yield item
+                continue
+            if minifier is not None and item.tag in PRESERVED_TAGS:
+                yield from item.iter_html(basepath)
+                continue
+            parts = item.html_parts(basepath, minifier)
+            if isinstance(parts, str):
+                yield parts
+                continue
+            opening, children, closing = parts
+            yield opening
+            stack.append(closing)
+            stack.extend(reversed(children))
+    
+    """
+    Takes a writable text file and the basepath of the site (or None).
+    Writes the html of the node into it, without building the whole string first.
+    """
+    def write_html(self, fp, basepath : str = None):
+        fp.writelines(self.iter_html(basepath))
+    
+    """
+    Takes the basepath of the site (or None).
     Returns a string that represents the HTML attributes of the node.
     """
-    def props_to_html(self):
+    def props_to_html(self, basepath : str = None):
         if self.props is None:
             return ""
         string = ""
         for key, value in self.props.items():
+            if basepath is not None and key in URL_ATTRIBUTES:
+                value = rewrite_url(value,basepath)
             string += f' {key}="{value}"'
         return string
     
@@ -11,6 +11,7 @@ In this next example, <p> is not a leaf node, but <b> is :
 </p>
 """
 class LeafNode(HTMLNode):
+    __slots__ = ()
     
     def __init__(self, tag: str, value: str, props: dict = None):
         super().__init__(tag=tag, value=value, children=None, props=props)
@@ -18,10 +19,17 @@ class LeafNode(HTMLNode):
     """
     Returns a string that represents the HTML tag string of the node.
     """
-    def to_html(self):
+    def to_html(self, basepath : str = None):
+        return self.html_parts(basepath)
+    
+    """
+    With a minify.Minifier, only the whitespace of the value is collapsed : the tag
+    and its attributes (like an alt or a title) are left as they are.
+    """
+    def html_parts(self, basepath : str = None, minifier = None):
         if self.value is None :
             raise ValueError("LeafNode must have a value")
+        value = self.value if minifier is None else minifier.text(self.value)
         if self.tag is None :
-            return self.value
-        return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
-    
\ No newline at end of file
+            return value
+        return f"<{self.tag}{self.props_to_html(basepath)}>{value}</{self.tag}>"
@@ -1,50 +1,289 @@
+import argparse
+import hashlib
+import itertools
 import os
 import shutil
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
 
+import assets
+import atomicfile
+import blockmemo
+import events
+import frontmatter as fm
+import manifest as mf
+import minify as mn
+import pageindex as pi
+import parsecache as pc
+import profiler
+import siteindex as si
 import splitmarkdown as sp
+import staging
+import templates
+
+CONTENT_DIR = "content"
+STATIC_DIR = "static"
+TEMPLATE_PATH = "template.html"
+BUILD_DIR = ".build"
+# Bump when a change of the generator changes the generated html, so every page is generated again
+# (and parsecache.PARSER_VERSION as well when the html of the bodies changes)
+GENERATOR_VERSION = 9
+TEMPLATE_OVERRIDE = si.TEMPLATE_NAME
+TOC_SLOT = "TableOfContents"
+LISTING_SLOT = "PageList"
+TAGS_DIR = "tags"
+FEED_PATH = "feed.xml"
+PROFILE_PATH = os.path.join(BUILD_DIR,"profile.json")
+# Pages sent to each process of a parallel build at a time (see generate_pages_parallel)
+PAGES_PER_JOB = 16
 
 """
 Takes a source directory and a destination directory.
 Deletes all the contents of the destination directory and
 copies each file of the source directory in the destination directory.
+The whole source tree is listed first, then the directories are created
+and the files placed by a pool of jobs threads.
+With minify, the stylesheets are minified (see assets.place_minified).
+With the SiteIndex of the source (see siteindex.scan), its tree is not listed again.
+Reports the copy as events of the assets stage (see events).
+Returns the SyncReport of the run.
 """
-def copy_from_to(source : str, destination : str, start : bool = True):
+def copy_from_to(source : str, destination : str, strategy : str = "auto", jobs : int = assets.DEFAULT_JOBS, minify : bool = False, site = None):
     if not os.path.exists(source) or not os.path.exists(destination):
         raise Exception
     
-    if start:
-        print("Destination directory content :")
-        print(" - ",destination," - ")
-        print(os.listdir(destination))
-        shutil.rmtree(destination)
-        os.mkdir(destination)
-        print("Content removed :")
-        print(" - ",destination," - ")
-        print(os.listdir(destination))
+    shutil.rmtree(destination)
+    os.mkdir(destination)
     
-    listdir = os.listdir(source)
-    files = [os.path.join(source,file) for file in listdir if os.path.isfile(os.path.join(source,file))]
-    dirs = [dir for dir in listdir if os.path.isdir(os.path.join(source,dir))]
-    print("Files to copy from "+source+" to "+destination+" :")
-    print(files)
-    print("Directories to copy from "+source+" to "+destination+" :")
-    print(dirs)
+    dirs, files = assets.list_tree(source) if site is None else site.tree()
+    started = events.start("assets",len(files))
+    for dir in dirs:
+        os.makedirs(os.path.join(destination,dir),exist_ok=True)
     
-    print("Copying files...")
-    for file in files:
-        shutil.copy(file,destination)
-        print(file+" copied from "+source+" to "+destination)
-    print("Files copied.")
+    strategy = assets.strategy_for(strategy,source,destination)
+    pairs = [(os.path.join(source,file),os.path.join(destination,file)) for file in files]
+    methods = assets.place_files(pairs,strategy,jobs,minify=minify)
     
-    print("Creating directories...")
-    for dir in dirs:
-        new_dir = os.path.join(destination,dir)
-        os.mkdir(new_dir)
-        print(new_dir+" created")
-        copy_from_to(os.path.join(source,dir),new_dir,False)
+    report = assets.SyncReport()
+    report.copied = files
+    report.methods = assets.count_methods(methods)
+    report.minified = assets.minify_savings(pairs,methods)
+    report_files(report,destination)
+    events.finish("assets",started,source+" fully copied to "+destination+" : "+report.summary(),**report.counts())
+    return report
+
+"""
+Takes a SyncReport and the destination directory.
+Reports each file copied or skipped, and the bytes saved on each minified file,
+if the events of each file are shown.
+"""
+def report_files(report, destination):
+    if not events.enabled(events.DETAIL):
+        return
+    for rel_path in report.copied:
+        events.file("finish","assets",os.path.join(destination,rel_path),f"Copied {rel_path}")
+    for rel_path in report.skipped:
+        events.file("skip","assets",os.path.join(destination,rel_path),f"Skipped {rel_path}")
+    report_minified("assets",report.minified)
+
+"""
+Takes a stage and a list of (file path, bytes saved) pairs.
+Reports the bytes the minification saved on each file.
+"""
+def report_minified(stage, savings):
+    if not events.enabled(events.DETAIL):
+        return
+    for path, saved in savings:
+        events.info(stage,f"Minified {path} : {saved} bytes saved",events.DETAIL,subject=path,saved=saved)
+
+"""
+Takes the path of a manifest, its data and a list of deferred saves (or None).
+Saves the manifest now, or appends it to the deferred saves.
+"""
+def save_or_defer(manifest_path, data, saves = None):
+    if saves is None:
+        mf.save_manifest(manifest_path,data)
+    else:
+        saves.append((manifest_path,data))
+
+"""
+Takes a source directory, a destination directory and the path of the
+manifest of the previous sync.
+Unlike copy_from_to, nothing is wiped : only the new or changed files
+are copied and only the files that vanished from the source are deleted.
+When saves is a list, the manifest is appended to it as (path, data) instead of
+being saved, for the caller to save it once the build succeeded.
+With minify, the stylesheets are minified.
+With the SiteIndex of the source, its files are not listed again (see assets.sync_tree).
+Returns the SyncReport of the run.
+"""
+def sync_from_to(source : str, destination : str, manifest_path : str, use_hash : bool = False, strategy : str = "auto", jobs : int = assets.DEFAULT_JOBS, saves : list = None, minify : bool = False, site = None):
+    if not os.path.exists(source):
+        raise Exception
+    os.makedirs(destination,exist_ok=True)
     
-    print(source+" fully copied to "+destination+".")
-    return
+    started = events.start("assets")
+    manifest = mf.load_manifest(manifest_path)
+    report = assets.sync_tree(source,destination,manifest,use_hash,strategy,jobs,minify,site)
+    save_or_defer(manifest_path,manifest,saves)
+    report_files(report,destination)
+    events.finish("assets",started,f"Assets synced from {source} to {destination} : {report.summary()}",**report.counts())
+    return report
+
+"""
+Takes a markdown document (a string, or an iterable of lines like an open file),
+a basepath and whether the page needs a table of contents.
+Reads the document up to its title right away, and returns the body of the page :
+a dictionary of its title, its content (an iterator over the chunks of its html,
+the rest of the document being parsed block by block while they are consumed)
+and its table of contents (None when not needed).
+The front matter of the document is skipped, and its title is used if it has one.
+The table of contents gives anchor ids to the headings, and needs the whole
+document to be parsed before rendering.
+With a BlockMemo, the blocks rendered by a previous build are not parsed again.
+With a minify.Minifier, the content is minified.
+"""
+def parse_body(markdown, basepath, with_toc = False, memo = None, minifier = None):
+    if isinstance(markdown, str):
+        markdown = markdown.split("\n")
+    metadata, markdown = fm.read_front_matter(markdown)
+    document = sp.DocumentStream(markdown,anchors=with_toc,memo=memo,basepath=basepath,minifier=minifier)
+    title = metadata["title"] if "title" in metadata else document.read_title()
+    body = {"title": title, "content": document.iter_html(basepath), "toc": None}
+    if with_toc:
+        toc = document.read_all().table_of_contents()
+        body["toc"] = "" if toc is None else toc.to_html(basepath)
+    return body
+
+"""
+Takes the path of a markdown file and whether the page needs a table of contents.
+Parses the whole document, before any basepath applies, so that it can be
+rendered for several basepaths (see shared_body).
+Returns the title of the page and its DocumentStream, read.
+The front matter is skipped, and its title is used if it has one.
+"""
+def parse_document(from_path, with_toc = False):
+    with open(from_path,"r") as markdown_file:
+        metadata, markdown = fm.read_front_matter(markdown_file)
+        document = sp.DocumentStream(markdown,anchors=with_toc).read_all()
+    title = metadata["title"] if "title" in metadata else document.title
+    if title is None:
+        raise Exception("No h1 heading found")
+    return title, document
+
+"""
+Takes the title and the DocumentStream of a page (see parse_document), a basepath,
+whether the page needs a table of contents and a minify.Minifier (or None).
+Returns the body of the page for that basepath, like parse_body, without parsing
+the document again.
+"""
+def shared_body(title, document, basepath, with_toc = False, minifier = None):
+    body = {"title": title, "content": document.iter_read_html(basepath,minifier), "toc": None}
+    if with_toc:
+        toc = document.table_of_contents()
+        body["toc"] = "" if toc is None else toc.to_html(basepath)
+    return body
+
+"""
+Takes a compiled template, a basepath and a minify.Minifier (or None).
+Returns the template bound to the basepath, and minified with a Minifier,
+which counts the bytes the template saves.
+"""
+def bind_template(template, basepath, minifier = None):
+    template = template.for_basepath(basepath)
+    if minifier is None:
+        return template
+    template = template.minified()
+    minifier.saved += template.saved
+    return template
+
+"""
+Takes a compiled template, a basepath, the body of a page (see parse_body),
+its listing (a list of PageInfo, or None) and a minify.Minifier (or None).
+Returns an iterator over the chunks of the html of the page : the template filled
+with the title, content and table of contents ({{ TableOfContents }}) of the body.
+The listing fills the {{ PageList }} slot, or is added after the content when the
+template has no such slot.
+With a Minifier, the template is minified and the content is expected to be.
+"""
+def fill_template(template, basepath, body, listing = None, minifier = None):
+    values = {"Title": body["title"], "Content": body["content"]}
+    if body["toc"] is not None:
+        values[TOC_SLOT] = body["toc"]
+    if listing is not None:
+        listing_html = pi.listing_html(listing,basepath)
+        if template.has_slot(LISTING_SLOT):
+            values[LISTING_SLOT] = listing_html
+        else:
+            content = values["Content"]
+            values["Content"] = itertools.chain([content] if isinstance(content, str) else content,[listing_html])
+    return bind_template(template,basepath,minifier).iter_render(values)
+
+"""
+Takes a markdown document, a compiled template, a basepath and the listing of the page.
+Returns an iterator over the chunks of the html of the page (see parse_body and fill_template).
+With a ParseCache, the parsed body is stored under cache_key, its content joined in a string
+(with the bytes its minification saved, when minified).
+The optional BlockMemo and Minifier are passed to parse_body.
+"""
+def render_page_chunks(markdown, template, basepath, listing = None, cache = None, cache_key = None, memo = None, minifier = None):
+    body = parse_body(markdown,basepath,template.has_slot(TOC_SLOT),memo,minifier)
+    if cache is not None:
+        cache_body(cache,cache_key,body,minifier)
+    return fill_template(template,basepath,body,listing,minifier)
+
+"""
+Takes a ParseCache, a cache key, the body of a page (see parse_body) and the
+minify.Minifier of its content (or None).
+Joins the content of the body in a string and stores the body under the key,
+with the bytes its minification saved, when minified.
+"""
+def cache_body(cache, cache_key, body, minifier = None):
+    body["content"] = "".join(body["content"])
+    if minifier is not None:
+        body["saved"] = minifier.saved
+    cache.put(cache_key,body)
+
+"""
+Takes a markdown document, a compiled template and a basepath.
+Returns the html of the page as a single string.
+"""
+def render_page(markdown, template, basepath, listing = None, cache = None, cache_key = None, minifier = None):
+    return "".join(render_page_chunks(markdown,template,basepath,listing,cache,cache_key,None,minifier))
+
+"""
+Takes a cached body (see render_page_chunks) and a minify.Minifier (or None).
+Counts the bytes the minification of the cached content saved.
+"""
+def count_cached(body, minifier):
+    if minifier is not None:
+        minifier.saved += body.get("saved",0)
+
+"""
+Takes the path of an html destination file and its content, as a string
+or as an iterable of chunks.
+Creates the file, and its directories if needed.
+The file is written atomically (see atomicfile), so an existing file (maybe
+hardlinked to the previous build) is replaced, never modified. If the rendering
+of the chunks fails, the temporary file is removed.
+"""
+def write_page(dest_path, html):
+    atomicfile.write_file(dest_path,html)
+
+"""
+Takes a PageManifest (or None), the hash of the markdown source (see mf.file_hash),
+the compiled template, the destination path and the basepath of a page.
+Records the page in the manifest and returns True if it can be skipped.
+"""
+def is_up_to_date(manifest, source_hash, template, dest_path, basepath):
+    if manifest is None:
+        return False
+    entry = manifest.entry_for_hash(source_hash,template,basepath)
+    up_to_date = manifest.is_up_to_date(dest_path,entry)
+    manifest.record(dest_path,entry,not up_to_date)
+    return up_to_date
 
 """
 Takes the path of the markdown file to read, of the template html to use and of the html destination file.
@@ -52,62 +291,613 @@ Reads the markdown and the template files,
 converts the markdown to html and create the
 destination file with the template filled with
 the markdown title and its translated content.
+The markdown is streamed from the file to the html file, so the memory used does
+not grow with the size of the page.
+With a PageManifest, the page is skipped if it was already generated from the same inputs.
+With a PageIndex, a listing page (see pageindex) also lists the pages it asks for.
+With a ParseCache, the body of the page is taken from the cache when the markdown
+was already parsed, and stored in it otherwise.
+With a BlockMemo, only the blocks that changed since they were memoized are parsed.
+With minify, the page is minified and the bytes saved are reported.
+Reports the page as an event of the pages stage, generated or skipped.
+Returns True if the page was generated.
 """
-def generate_page(from_path, template_path, dest_path, basepath):
-    print(f'Generating page from {from_path} to {dest_path} using {template_path}')
-    
-    markdown = ""
-    with open(from_path,"r") as markdown_file:
-        markdown = markdown_file.read()
+def generate_page(from_path, template_path, dest_path, basepath, manifest = None, index = None, cache = None, memo = None, minify = False):
+    template = templates.load_template(template_path)
+    listing = index.listing(from_path) if index is not None else None
+    file_hash = mf.file_hash(from_path) if manifest is not None or cache is not None else None
+    if manifest is not None and is_up_to_date(manifest,source_hash(file_hash,listing),template,dest_path,basepath):
+        if events.enabled(events.DETAIL):
+            events.file("skip","pages",dest_path,f"Skipped {dest_path} : up to date")
+        return False
     
-    template_html = ""
-    with open(template_path,"r") as html_file:
-        template_html = html_file.read()
-    
-    markdown_to_node = sp.markdown_to_html_node(markdown)
-    markdown_to_html = markdown_to_node.to_html()
+    started = time.perf_counter()
+    minifier = mn.Minifier() if minify else None
+    cache_key = cache.key(file_hash,basepath,template.has_slot(TOC_SLOT),minify) if cache is not None else None
+    body = cache.get(cache_key) if cache is not None else None
+    if body is not None:
+        count_cached(body,minifier)
+        write_page(dest_path,fill_template(template,basepath,body,listing,minifier))
+    else:
+        with open(from_path,"r") as markdown_file:
+            write_page(dest_path,render_page_chunks(markdown_file,template,basepath,listing,cache,cache_key,memo,minifier))
+    report_page(from_path,template_path,dest_path,started,minifier.saved if minifier is not None else None)
+    return True
+
+"""
+Takes the markdown path, template path and html path of a generated page, the time
+its generation started at and the bytes its minification saved (None if not minified).
+Reports the page, if the events of each file are shown.
+"""
+def report_page(from_path, template_path, dest_path, started, saved = None):
+    if not events.enabled(events.DETAIL):
+        return
+    events.file("finish","pages",dest_path,f"Generated page from {from_path} to {dest_path} using {template_path}",started)
+    if saved is not None:
+        report_minified("pages",[(dest_path,saved)])
+
+"""
+Takes the hash of the markdown source of a page and its listing (or None).
+Returns the hash of the inputs of the page, for the PageManifest : a listing
+page depends on the pages it lists as well.
+"""
+def source_hash(file_hash, listing):
+    if listing is None:
+        return file_hash
+    return hashlib.sha256((file_hash + pi.listing_hash(listing)).encode()).hexdigest()
+
+"""
+Takes a source directory, an html template path, a destination directory and the
+SiteIndex of the source directory (see siteindex.scan), scanned if not given.
+Returns the list of the pages to generate, as (markdown path, template path, html path) tuples,
+in the order generate_pages_recursive generates them : the pages of a directory, then
+the pages of its subdirectories.
+A directory can choose another template for its pages (and the pages of its
+subdirectories) with a _template.html file, and a page its own template with the
+template key of its front matter (see choose_page_templates). Only the markdown
+files are pages, and files and directories starting with _ (templates, partials...) are not.
+"""
+def discover_pages(dir_path_content, template_path, dest_dir_path, site = None):
+    if site is None:
+        if not os.path.exists(dir_path_content):
+            raise Exception
+        site = si.scan(dir_path_content,content=True)
     
-    title = sp.extract_title(markdown)
+    overrides = {os.path.dirname(entry.path): os.path.join(dir_path_content,entry.path) for entry in site.of_kind(si.TEMPLATE)}
+    templates_by_dir = {}
+    def template_for(rel_dir):
+        if rel_dir not in templates_by_dir:
+            if rel_dir in overrides:
+                templates_by_dir[rel_dir] = overrides[rel_dir]
+            else:
+                templates_by_dir[rel_dir] = template_for(os.path.dirname(rel_dir)) if rel_dir != "" else template_path
+        return templates_by_dir[rel_dir]
     
-    template_html = template_html.replace("{{ Title }}",title)
-    template_html = template_html.replace("{{ Content }}",markdown_to_html)
-    template_html = template_html.replace('href="/',f'href="{basepath}')
-    template_html = template_html.replace('src="/',f'src="{basepath}')
+    pages = []
+    for entry in site.of_kind(si.PAGE):
+        pages.append((os.path.join(dir_path_content,entry.path),template_for(os.path.dirname(entry.path)),os.path.join(dest_dir_path,entry.route)))
+    return pages
+
+"""
+Takes the list of pages (see discover_pages) and their PageIndex.
+Returns the pages, each one with the template named by the template key of its
+front matter (a path relative to its markdown file) when it has one, instead of
+the template of its directory.
+"""
+def choose_page_templates(pages, index):
+    chosen = []
+    for from_path, template_path, dest_path in pages:
+        page = index.by_source.get(os.path.abspath(from_path))
+        if page is not None and "template" in page.metadata:
+            template_path = os.path.join(os.path.dirname(from_path),page.metadata["template"])
+        chosen.append((from_path,template_path,dest_path))
+    return chosen
+
+"""
+Takes a (markdown path, template path, basepath, listing, ParseCache, cache key, minify) tuple.
+Runs in a worker process, which reads the markdown file itself : returns
+(True, html, bytes saved by the minification) or (False, the error traceback, 0),
+so the parent process reports the errors itself, in the order of the pages.
+"""
+def render_job(job):
+    from_path, template_path, basepath, listing, cache, cache_key, minify = job
+    minifier = mn.Minifier() if minify else None
+    try:
+        with open(from_path,"r") as markdown_file:
+            html = render_page(markdown_file,templates.load_template(template_path),basepath,listing,cache,cache_key,minifier)
+        return True, html, minifier.saved if minifier is not None else 0
+    except Exception:
+        return False, traceback.format_exc(), 0
+
+"""
+Takes the list of pages (see discover_pages), a basepath, a PageManifest (or None),
+a number of processes, a PageIndex (or None) and a ParseCache (or None).
+The pages to generate are read, parsed and rendered by a pool of processes, in chunks,
+while writing the html files stays in this process, in the order of the pages, so
+the output is the same as a serial build. This process only hashes the sources, and
+sends the pages to the pool in batches of PAGES_PER_JOB pages per process, so the html
+waiting to be written stays bounded whatever the size of the site. The pages found
+in the parse cache are not sent to the pool : this process only fills their template.
+With minify, the pages are minified and the bytes saved are reported.
+Raises an exception listing every page that could not be generated, after writing the others.
+"""
+def generate_pages_parallel(pages, basepath, manifest, jobs, index = None, cache = None, minify = False):
+    to_write = []
+    for from_path, template_path, dest_path in pages:
+        template = templates.load_template(template_path)
+        listing = index.listing(from_path) if index is not None else None
+        file_hash = mf.file_hash(from_path)
+        if is_up_to_date(manifest,source_hash(file_hash,listing),template,dest_path,basepath):
+            if events.enabled(events.DETAIL):
+                events.file("skip","pages",dest_path,f"Skipped {dest_path} : up to date")
+            continue
+        cache_key = cache.key(file_hash,basepath,template.has_slot(TOC_SLOT),minify) if cache is not None else None
+        body = cache.get(cache_key) if cache is not None else None
+        to_write.append((from_path,template_path,dest_path,listing,body,cache_key))
+    if len(to_write) == 0:
+        return
     
-    os.makedirs(os.path.dirname(dest_path),exist_ok=True)
-    with open(dest_path,"w") as final_html_file:
-        final_html_file.write(template_html)
+    batch_size = jobs * PAGES_PER_JOB
+    errors = []
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        for start in range(0,len(to_write),batch_size):
+            generate_batch(executor,to_write[start:start + batch_size],basepath,jobs,cache,minify,errors)
+    if len(errors) > 0:
+        raise Exception(f"{len(errors)} page(s) could not be generated :\n" + "\n".join(errors))
+
+"""
+Takes a ProcessPoolExecutor, a batch of pages to write as (markdown path, template path,
+html path, listing, cached body or None, cache key) tuples, a basepath, the number of
+processes, a ParseCache (or None), whether the pages are minified and the list of errors.
+Renders the pages of the batch that are not cached with the pool, and writes every page
+of the batch in order. The pages that could not be generated are added to the errors.
+"""
+def generate_batch(executor, batch, basepath, jobs, cache, minify, errors):
+    jobs_to_run = [(from_path,template_path,basepath,listing,cache,cache_key,minify) for from_path, template_path, dest_path, listing, body, cache_key in batch if body is None]
+    results = executor.map(render_job,jobs_to_run,chunksize=max(1,len(jobs_to_run) // (jobs * 4)))
+    for from_path, template_path, dest_path, listing, body, cache_key in batch:
+        started = time.perf_counter()
+        if body is not None:
+            minifier = mn.Minifier() if minify else None
+            count_cached(body,minifier)
+            ok, result = True, "".join(fill_template(templates.load_template(template_path),basepath,body,listing,minifier))
+            saved = minifier.saved if minifier is not None else 0
+        else:
+            ok, result, saved = next(results)
+        if not ok:
+            errors.append(f"{from_path} :\n{result}")
+            events.error("pages",f"{from_path} could not be generated",from_path)
+            continue
+        write_page(dest_path,result)
+        report_page(from_path,template_path,dest_path,started,saved if minify else None)
 
 """
 Takes a source directory, an html template path and a destination directory.
 For each markdown file of the source directory, generate the correspondant
 html based on the template and save it in the destination directory.
-Repeats recursively with each subdirectory.
+Repeats recursively with each subdirectory (see discover_pages).
+The optional PageManifest is passed to generate_page.
+With more than one job, the pages are rendered by a pool of processes.
 """
-def generate_pages_recursive(dir_path_content,template_path, dest_dir_path, basepath):
-    if not os.path.exists(dir_path_content):
-        raise Exception
+def generate_pages_recursive(dir_path_content,template_path, dest_dir_path, basepath, manifest = None, jobs = 1):
+    generate_pages(discover_pages(dir_path_content,template_path,dest_dir_path),basepath,manifest,jobs)
+    return
+
+"""
+Takes a list of pages (see discover_pages), a basepath, a PageManifest (or None),
+a number of processes, a PageIndex (or None), a ParseCache (or None), a BlockMemo (or None)
+and whether the pages are minified.
+Generates the pages, serially or with a pool of processes. The BlockMemo lives in
+this process, so it is only used by serial builds.
+"""
+def generate_pages(pages, basepath, manifest = None, jobs = 1, index = None, cache = None, memo = None, minify = False):
+    if jobs > 1:
+        generate_pages_parallel(pages,basepath,manifest,jobs,index,cache,minify)
+        return
+    for from_path, template_path, dest_path in pages:
+        generate_page(from_path,template_path,dest_path,basepath,manifest,index,cache,memo,minify)
+
+"""
+Takes the path of a generated file, its content (a string or chunks), the hash of its
+inputs, its compiled template (or None), the basepath, a PageManifest (or None)
+and the minify.Minifier the content is minified with (or None).
+Writes the file unless it is up to date.
+"""
+def generate_file(dest_path, content, inputs_hash, template, basepath, manifest = None, minifier = None):
+    if is_up_to_date(manifest,inputs_hash,template,dest_path,basepath):
+        if events.enabled(events.DETAIL):
+            events.file("skip","pages",dest_path,f"Skipped {dest_path} : up to date")
+        return False
+    started = time.perf_counter()
+    write_page(dest_path,content)
+    if events.enabled(events.DETAIL):
+        events.file("finish","pages",dest_path,f"Generated {dest_path}",started)
+        if minifier is not None:
+            report_minified("pages",[(dest_path,minifier.saved)])
+    return True
+
+"""
+Takes a PageIndex, the html template path of the site, a destination directory,
+a basepath, a PageManifest (or None), whether the pages are minified and the base
+url of the site (like https://example.org), or None.
+Generates the pages built from the index only : a page per tag in the tags
+directory, listing the pages with that tag, and the RSS feed of the dated pages.
+The links of the feed are absolute, built from the base url, or else from the
+url key of the front matter of the home page.
+"""
+def generate_index_pages(index, template_path, dest_dir_path, basepath, manifest = None, minify = False, site_url = None):
+    template = templates.load_template(template_path)
+    for tag, pages in index.tags().items():
+        dest_path = os.path.join(dest_dir_path,TAGS_DIR,sp.slugify(tag)+".html")
+        minifier = mn.Minifier() if minify else None
+        values = {"Title": tag, "Content": pi.listing_node(pages).iter_html(basepath,minifier), LISTING_SLOT: ""}
+        generate_file(dest_path,bind_template(template,basepath,minifier).iter_render(values),pi.listing_hash(pages),template,basepath,manifest,minifier)
     
-    listdir = os.listdir(dir_path_content)
-    files = [file for file in listdir if os.path.isfile(os.path.join(dir_path_content,file))]
-    dirs = [dir for dir in listdir if os.path.isdir(os.path.join(dir_path_content,dir))]
+    dated = index.dated()
+    if len(dated) > 0:
+        home = index.by_source.get(os.path.abspath(os.path.join(index.content_dir,"index.md")))
+        title = home.title if home is not None else "Feed"
+        if site_url is None and home is not None:
+            site_url = home.metadata.get("url")
+        if site_url is None:
+            events.info("pages",f"The links of {FEED_PATH} are not absolute : give the url of the site with --site-url, or the url key of the home page")
+        inputs_hash = hashlib.sha256((pi.listing_hash(dated) + (site_url or "")).encode()).hexdigest()
+        generate_file(os.path.join(dest_dir_path,FEED_PATH),pi.feed_xml(title,dated,basepath,site_url),inputs_hash,None,basepath,manifest)
+
+"""
+Takes a source directory, an html template path, a destination directory,
+a basepath and the path of the manifest of the previous build.
+Generates the pages whose inputs changed since the previous build (every page
+if force is set), with jobs processes, and deletes the pages whose markdown source vanished.
+When only is a set of markdown paths, the other pages already built are kept as they are,
+without parsing them : only their metadata is read, for the page index. The listing
+pages are always checked, as the pages they list may have changed.
+The manifest is saved, or deferred when saves is a list (see sync_from_to).
+With a ParseCache, the parsed pages are reused across builds, and the cache is pruned.
+With a BlockMemo, the unchanged blocks of the changed pages are reused.
+With minify, the pages are minified, and generated again when minify changed.
+The pages are discovered from the SiteIndex of the source directory, when given.
+The site url is the base of the absolute links of the feed (see generate_index_pages).
+Returns the PageManifest of the build.
+"""
+def build_pages(dir_path_content, template_path, dest_dir_path, basepath, manifest_path, force = False, jobs = 1, only = None, saves = None, cache = None, memo = None, minify = False, site = None, site_url = None):
+    started = time.perf_counter()
+    manifest = mf.PageManifest(mf.load_manifest(manifest_path),dest_dir_path,GENERATOR_VERSION,force,minify)
+    pages = discover_pages(dir_path_content,template_path,dest_dir_path,site)
+    index = pi.build_index(pages,dir_path_content,dest_dir_path)
+    pages = choose_page_templates(pages,index)
+    if only is not None:
+        only = {os.path.abspath(path) for path in only}
+        pages = [page for page in pages if os.path.abspath(page[0]) in only or index.listing(page[0]) is not None or not manifest.keep(page[2])]
+    events.start("pages",len(pages))
+    generate_pages(pages,basepath,manifest,jobs,index,cache,memo,minify)
+    generate_index_pages(index,template_path,dest_dir_path,basepath,manifest,minify,site_url)
+    if cache is not None:
+        cache.prune()
+        events.info("pages",f"Parse cache {cache.directory} : {cache.summary()}",hits=cache.hits,misses=cache.misses,evicted=cache.evicted)
+    if memo is not None:
+        events.info("pages",f"Block memo : {memo.summary()}",hits=memo.hits,misses=memo.misses)
+    finish_pages(manifest,dest_dir_path,manifest_path,saves,started)
+    return manifest
+
+"""
+Takes the PageManifest of a build, its destination directory, the path of its
+manifest, the saves (see save_or_defer) and the time the build of the pages started at.
+Deletes the pages whose markdown source vanished, saves the manifest and reports
+the end of the pages stage.
+"""
+def finish_pages(manifest, dest_dir_path, manifest_path, saves, started):
+    for key in manifest.stale():
+        dest_path = os.path.join(dest_dir_path,key)
+        if os.path.isfile(dest_path):
+            os.remove(dest_path)
+            assets.prune_empty_dirs(dest_path,dest_dir_path)
     
-    for file in files:
-        dest = os.path.join(dest_dir_path,file).replace('md','html')
-        generate_page(os.path.join(dir_path_content,file),template_path,dest,basepath)
+    save_or_defer(manifest_path,manifest.to_dict(),saves)
+    generated, skipped, removed = len(manifest.generated), len(manifest.skipped), len(manifest.stale())
+    events.finish("pages",started,f"Pages generated in {dest_dir_path} : {generated} generated, {skipped} skipped, {removed} removed",generated=generated,skipped=skipped,removed=removed)
+
+"""
+One output of a multi-target build : a destination directory, the basepath of
+its pages and the html template replacing the template of the site (or None).
+"""
+class Target:
+    def __init__(self, destination, basepath = "/", template_path = None):
+        self.destination = destination
+        self.basepath = basepath
+        self.template_path = template_path
+
+    def __repr__(self):
+        return f"Target({self.destination}, {self.basepath}, {self.template_path})"
+
+"""
+Takes a "destination:basepath[:template]" string, from the command line.
+Returns the Target it describes.
+"""
+def parse_target(text):
+    parts = text.split(":")
+    if len(parts) not in (2,3) or parts[0] == "" or parts[1] == "":
+        raise argparse.ArgumentTypeError(f"expected DEST:BASEPATH[:TEMPLATE], got {text}")
+    return Target(parts[0],parts[1],parts[2] if len(parts) == 3 and parts[2] != "" else None)
+
+"""
+Takes the markdown path, template path and relative html path of a page (see
+discover_pages), the html template path of the site, the builds of the targets
+as (Target, destination directory, PageManifest, template path) tuples, a PageIndex,
+a ParseCache (or None) and whether the pages are minified.
+Generates the page in every target it is not up to date in. The pages using the
+template of the site use the template of the target instead, if it has one.
+The markdown is parsed at most once with and once without anchors (for the
+templates with a table of contents), however many targets there are, and its
+nodes are rendered for the basepath of each target.
+"""
+def generate_page_targets(from_path, template_path, rel_path, site_template_path, builds, index, cache = None, minify = False):
+    listing = index.listing(from_path)
+    file_hash = mf.file_hash(from_path)
+    documents = {}
+    for target, dest_dir_path, manifest, target_template_path in builds:
+        page_template_path = target_template_path if template_path == site_template_path else template_path
+        template = templates.load_template(page_template_path)
+        dest_path = os.path.join(dest_dir_path,rel_path)
+        basepath = target.basepath
+        if is_up_to_date(manifest,source_hash(file_hash,listing),template,dest_path,basepath):
+            if events.enabled(events.DETAIL):
+                events.file("skip","pages",dest_path,f"Skipped {dest_path} : up to date")
+            continue
+        
+        started = time.perf_counter()
+        minifier = mn.Minifier() if minify else None
+        with_toc = template.has_slot(TOC_SLOT)
+        cache_key = cache.key(file_hash,basepath,with_toc,minify) if cache is not None else None
+        body = cache.get(cache_key) if cache is not None else None
+        if body is not None:
+            count_cached(body,minifier)
+        else:
+            if with_toc not in documents:
+                documents[with_toc] = parse_document(from_path,with_toc)
+            title, document = documents[with_toc]
+            body = shared_body(title,document,basepath,with_toc,minifier)
+            if cache is not None:
+                cache_body(cache,cache_key,body,minifier)
+        write_page(dest_path,fill_template(template,basepath,body,listing,minifier))
+        report_page(from_path,page_template_path,dest_path,started,minifier.saved if minifier is not None else None)
+
+"""
+Takes a source directory, the html template path of the site, the outputs of the
+build as (Target, directory written to) pairs (the directory being the staging
+directory of the destination of the target, or the destination itself), whether
+every page is generated, the saves (see save_or_defer), a ParseCache (or None)
+whether the pages are minified, the SiteIndex of the source directory (or None)
+and the base url of the site (see generate_index_pages).
+Generates the pages of every target in a single pass over the content : the pages
+are discovered and indexed once, and each page is parsed once for all the targets
+(see generate_page_targets). Each target keeps its own PageManifest.
+Returns the PageManifests of the targets.
+"""
+def build_pages_targets(dir_path_content, template_path, outputs, force = False, saves = None, cache = None, minify = False, site = None, site_url = None):
+    started = time.perf_counter()
+    pages = discover_pages(dir_path_content,template_path,"",site)
+    index = pi.build_index(pages,dir_path_content,os.curdir)
+    pages = choose_page_templates(pages,index)
+    builds = []
+    for target, dest_dir_path in outputs:
+        manifest = mf.PageManifest(mf.load_manifest(manifest_path_for(target.destination,"pages")),dest_dir_path,GENERATOR_VERSION,force,minify)
+        builds.append((target,dest_dir_path,manifest,target.template_path or template_path))
+    events.start("pages",len(pages) * len(builds))
+    for from_path, page_template_path, rel_path in pages:
+        generate_page_targets(from_path,page_template_path,rel_path,template_path,builds,index,cache,minify)
+    for target, dest_dir_path, manifest, target_template_path in builds:
+        generate_index_pages(index,target_template_path,dest_dir_path,target.basepath,manifest,minify,site_url)
+    if cache is not None:
+        cache.prune()
+        events.info("pages",f"Parse cache {cache.directory} : {cache.summary()}",hits=cache.hits,misses=cache.misses,evicted=cache.evicted)
     
-    for dir in dirs:
-        generate_pages_recursive(os.path.join(dir_path_content,dir),template_path,os.path.join(dest_dir_path,dir),basepath)
-    return
+    for target, dest_dir_path, manifest, target_template_path in builds:
+        finish_pages(manifest,dest_dir_path,manifest_path_for(target.destination,"pages"),saves,started)
+    return [manifest for target, dest_dir_path, manifest, target_template_path in builds]
 
-def main(*args):
-    basepath = '/'
-    dest_directory = 'public'
-    if len(args[0]) > 1:
-        basepath = args[0][1]
-        dest_directory = 'docs'
-    copy_from_to("static",dest_directory)
-    generate_pages_recursive("content","template.html",dest_directory,basepath)
+"""
+Parses the command line arguments, of the watch command when watch is True.
+The optional basepath is the root url of the site, and the optional
+destination defaults to "docs" when a basepath is given, "public" otherwise.
+Exits with a usage error when --target is given to watch or with --rollback,
+which only handle the positional destination.
+"""
+def parse_args(argv, watch = False):
+    parser = argparse.ArgumentParser(prog="main.py",description="Generate the static site from the markdown content.")
+    parser.add_argument("basepath",nargs="?",default=None,help="root url of the site (default: /)")
+    parser.add_argument("destination",nargs="?",default=None,help="output directory")
+    parser.add_argument("--sync",action="store_true",default=True,help="reuse the previous build : only place the changed static files, staged in a hardlinked clone of the destination (the default)")
+    parser.add_argument("--clean",action="store_false",dest="sync",help="start from an empty destination and copy every static file again")
+    parser.add_argument("--hash",action="store_true",help="when syncing, compare file contents when their mtime changed")
+    parser.add_argument("--placement",choices=assets.STRATEGIES,default="auto",help="how static files are placed in the destination (default: auto)")
+    parser.add_argument("--asset-jobs",type=int,default=assets.DEFAULT_JOBS,help=f"threads used to place the static files (default: {assets.DEFAULT_JOBS})")
+    parser.add_argument("--force",action="store_true",help="generate every page, even the ones whose inputs did not change")
+    parser.add_argument("--jobs","-j",type=int,default=1,help="processes used to render the pages (default: 1)")
+    parser.add_argument("--in-place",action="store_true",help="write the build directly into the destination instead of staging it")
+    parser.add_argument("--rollback",action="store_true",help="put the previous build of the destination back in place, and stop")
+    parser.add_argument("--parse-cache",default=None,metavar="DIR",help="directory where the parsed pages are cached across builds (default: no cache)")
+    parser.add_argument("--parse-cache-size",type=int,default=pc.DEFAULT_MAX_BYTES // (1024 * 1024),metavar="MB",help=f"maximum size of the parse cache (default: {pc.DEFAULT_MAX_BYTES // (1024 * 1024)} MB)")
+    parser.add_argument("--minify",action="store_true",help="collapse the whitespace of the generated html and minify the stylesheets")
+    parser.add_argument("--block-memo",action="store_true",help="reuse the html of the unchanged blocks of the changed pages (always on with watch)")
+    parser.add_argument("--profile",nargs="?",const=PROFILE_PATH,default=None,metavar="PATH",help=f"time each stage of the build and save the JSON report (default path: {PROFILE_PATH})")
+    parser.add_argument("--profile-top",type=int,default=10,metavar="N",help="with --profile, number of slowest pages listed (default: 10)")
+    parser.add_argument("--output",choices=sorted(events.SINKS),default="summary",help="what the build reports : one line per stage (summary), errors only (quiet), a progress bar (progress), one line per file (verbose) or JSON lines (json) (default: summary)")
+    parser.add_argument("--site-url",default=None,metavar="URL",help="base url of the site, like https://example.org, for the absolute links of the feed (default: the url key of the home page)")
+    parser.add_argument("--include",action="append",default=[],metavar="GLOB",help="only build the content pages and copy the static files matching this pattern (repeatable)")
+    parser.add_argument("--exclude",action="append",default=[],metavar="GLOB",help="leave out the content and static files and directories matching this pattern (repeatable)")
+    parser.add_argument("--target",type=parse_target,action="append",default=None,metavar="DEST:BASEPATH[:TEMPLATE]",help="build the site into this destination, for this basepath (and with this template), instead of the positional ones; repeat it to build several targets from a single parse of the pages")
+    parser.add_argument("--port",type=int,default=8888,help="with watch, port of the development server (default: 8888)")
+    parser.add_argument("--interval",type=float,default=0.5,help="with watch, seconds between two scans when inotify is not available (default: 0.5)")
+    args = parser.parse_args(argv)
+    if args.target and (watch or args.rollback):
+        parser.error("--target cannot be used with " + ("watch" if watch else "--rollback"))
+    if args.destination is None:
+        args.destination = "public" if args.basepath is None else "docs"
+    if args.basepath is None:
+        args.basepath = "/"
+    return args
 
-import sys
-main(sys.argv)
\ No newline at end of file
+"""
+Takes a destination directory and a kind of manifest.
+Returns the path of the manifest of that destination, outside of it so it is never published.
+"""
+def manifest_path_for(destination, kind):
+    return os.path.join(BUILD_DIR,os.path.basename(os.path.normpath(destination))+"-"+kind+".json")
+
+"""
+Takes a destination directory.
+Returns the path of the BlockMemo of that destination, next to its manifests.
+"""
+def memo_path_for(destination):
+    return manifest_path_for(destination,"blocks") + ".z"
+
+"""
+Takes the parsed command line arguments.
+Syncs the static files (or copies them all with args.clean) and generates the pages.
+With static or pages set to False, that half of the build is skipped, and
+pages can be a set of markdown paths to only generate those pages (see build_pages).
+Unless args.in_place is set, the build is staged : written into a staging directory
+(a hardlinked clone of the destination, unless args.clean starts it empty) and
+swapped in once it succeeded.
+The content and static directories are each scanned once (see siteindex), with
+the include and exclude rules of args, and every stage reads their index.
+The manifests are only saved once the destination holds the new build.
+With args.block_memo, the BlockMemo of the destination is kept for the next builds.
+"""
+def build(args, static = True, pages = True):
+    if args.in_place:
+        target = args.destination
+        os.makedirs(target,exist_ok=True)
+    else:
+        target = staging.prepare(args.destination,reuse=args.sync)
+    saves = []
+    memo = None
+    try:
+        if static:
+            site = si.scan(STATIC_DIR,args.include,args.exclude)
+            if args.sync:
+                sync_from_to(STATIC_DIR,target,manifest_path_for(args.destination,"assets"),args.hash,args.placement,args.asset_jobs,saves,args.minify,site)
+            else:
+                copy_from_to(STATIC_DIR,target,args.placement,args.asset_jobs,args.minify,site)
+        if pages:
+            only = pages if isinstance(pages, set) else None
+            cache = pc.ParseCache(args.parse_cache,args.parse_cache_size * 1024 * 1024) if args.parse_cache is not None else None
+            memo = blockmemo.memo_for(memo_path_for(args.destination)) if args.block_memo else None
+            site = si.scan(CONTENT_DIR,args.include,args.exclude,content=True)
+            build_pages(CONTENT_DIR,TEMPLATE_PATH,target,args.basepath,manifest_path_for(args.destination,"pages"),args.force,args.jobs,only,saves,cache,memo,args.minify,site,args.site_url)
+    except BaseException:
+        if not args.in_place:
+            staging.abort(args.destination)
+        raise
+    if not args.in_place:
+        staging.swap(args.destination)
+    for manifest_path, data in saves:
+        mf.save_manifest(manifest_path,data)
+    if memo is not None:
+        if memo.misses > 0:
+            blockmemo.save_memo(memo_path_for(args.destination),memo)
+        memo.trim()
+
+"""
+Takes the parsed command line arguments, with their targets (see parse_target).
+Builds the site for every target at once : the static files are scanned once and
+placed in each destination, and each page is parsed once and rendered for the
+basepath and template of each target (see build_pages_targets).
+Unless args.in_place is set, every destination is staged, and they are all swapped
+in once every target succeeded. The manifests are saved afterwards.
+The pages are rendered serially, without BlockMemo.
+"""
+def build_targets(args):
+    if len({manifest_path_for(target.destination,"pages") for target in args.target}) < len(args.target):
+        raise Exception("The destinations of the targets need different names")
+    if args.jobs > 1 or args.block_memo:
+        events.info("pages","A multi-target build renders the pages in a single process : --jobs and --block-memo are ignored")
+    roots = []
+    saves = []
+    try:
+        for target in args.target:
+            if args.in_place:
+                os.makedirs(target.destination,exist_ok=True)
+                roots.append(target.destination)
+            else:
+                roots.append(staging.prepare(target.destination,reuse=args.sync))
+        site = si.scan(STATIC_DIR,args.include,args.exclude)
+        for target, root in zip(args.target,roots):
+            if args.sync:
+                sync_from_to(STATIC_DIR,root,manifest_path_for(target.destination,"assets"),args.hash,args.placement,args.asset_jobs,saves,args.minify,site)
+            else:
+                copy_from_to(STATIC_DIR,root,args.placement,args.asset_jobs,args.minify,site)
+        cache = pc.ParseCache(args.parse_cache,args.parse_cache_size * 1024 * 1024) if args.parse_cache is not None else None
+        site = si.scan(CONTENT_DIR,args.include,args.exclude,content=True)
+        build_pages_targets(CONTENT_DIR,TEMPLATE_PATH,list(zip(args.target,roots)),args.force,saves,cache,args.minify,site,args.site_url)
+    except BaseException:
+        if not args.in_place:
+            for target in args.target[:len(roots)]:
+                staging.abort(target.destination)
+        raise
+    if not args.in_place:
+        for target in args.target:
+            staging.swap(target.destination)
+    for manifest_path, data in saves:
+        mf.save_manifest(manifest_path,data)
+
+"""
+Takes the parsed command line arguments.
+Builds the site with the profiler installed (see profiler.Profiler), then saves
+its JSON report and prints its summary. The pages are rendered in this process,
+whatever the number of jobs, so every stage of every page is measured.
+"""
+def profile_build(args):
+    if args.jobs > 1:
+        events.info("profile","Profiling renders the pages in a single process : --jobs is ignored")
+        args.jobs = 1
+    profile = profiler.Profiler()
+    with profile.installed(sys.modules[__name__]):
+        (build_targets if args.target else build)(args)
+    profile.save(args.profile,args.profile_top)
+    events.info("profile",profile.summary(args.profile_top))
+    events.info("profile",f"Profile saved to {args.profile}",path=args.profile)
+
+"""
+Takes the parsed command line arguments.
+Puts the previous build of the destination back in place. The manifests
+describe the replaced build, so they are deleted and the next build starts over.
+"""
+def rollback(args):
+    staging.rollback(args.destination)
+    for kind in ("assets","pages"):
+        if os.path.exists(manifest_path_for(args.destination,kind)):
+            os.remove(manifest_path_for(args.destination,kind))
+    events.info("rollback",f"{args.destination} rolled back to its previous build")
+
+"""
+Usage : main.py [basepath] [destination] [options]
+        main.py watch [basepath] [destination] [options]
+The watch command builds the site, serves it and rebuilds what changed.
+"""
+def main(argv):
+    if len(argv) > 1 and argv[1] == "watch":
+        import watch
+        args = parse_args(argv[2:],watch=True)
+        events.set_sinks(events.SINKS[args.output]())
+        args.sync = True
+        args.in_place = True
+        args.block_memo = True
+        watch.run(args,build,CONTENT_DIR,STATIC_DIR,TEMPLATE_PATH)
+        return
+    args = parse_args(argv[1:])
+    events.set_sinks(events.SINKS[args.output]())
+    if args.rollback:
+        rollback(args)
+        return
+    if args.profile is not None:
+        profile_build(args)
+        return
+    if args.target:
+        build_targets(args)
+        return
+    build(args)
+
+if __name__ == "__main__":
+    main(sys.argv)
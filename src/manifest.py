@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+
+import atomicfile
+
+"""
+A manifest is a small JSON file remembering the state of a previous build,
+so the next build can tell which files changed since then.
+"""
+
+"""
+Takes the path of a manifest file.
+Returns its content as a dictionary, or an empty dictionary
+if the file does not exist or cannot be read.
+"""
+def load_manifest(path : str) -> dict:
+    try:
+        with open(path,"r") as manifest_file:
+            data = json.load(manifest_file)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    return data
+
+"""
+Takes the path of a manifest file and the dictionary to save.
+Writes it atomically (see atomicfile), so an interrupted build never leaves
+a half-written manifest behind.
+"""
+def save_manifest(path : str, data : dict):
+    atomicfile.write_file(path,json.dumps(data,indent=1,sort_keys=True))
+
+"""
+Takes the path of a file.
+Returns the hexadecimal sha256 digest of its content, read by chunks.
+"""
+def file_hash(path : str) -> str:
+    digest = hashlib.sha256()
+    with open(path,"rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+"""
+Remembers, for each generated page, the inputs it was generated from :
+the hash of its markdown source, the hashes of the template files it used,
+the basepath, the version of the generator and whether the page is minified.
+A page only needs to be generated again when one of them changed.
+The pages are keyed by their path relative to the destination directory.
+With force, every page is considered out of date.
+"""
+class PageManifest:
+    def __init__(self, data : dict, destination : str, version, force : bool = False, minify : bool = False):
+        self.previous = data.get("pages",{})
+        self.force = force
+        self.minify = minify
+        self.pages = {}
+        self.destination = destination
+        self.version = version
+        self.hashes = {}
+        self.generated = []
+        self.skipped = []
+    
+    """
+    Takes a path of a template file.
+    Returns the hash of its content, computed once per build.
+    """
+    def template_hash(self, path : str) -> str:
+        if path not in self.hashes:
+            self.hashes[path] = file_hash(path)
+        return self.hashes[path]
+    
+    """
+    Takes the hexadecimal sha256 digest of the markdown source of a page (see
+    file_hash, so the source does not have to be read in memory), the compiled
+    template (None for a file generated without template) and the basepath.
+    Returns the manifest entry describing those inputs.
+    """
+    def entry_for_hash(self, source_hash : str, template, basepath : str) -> dict:
+        dependencies = template.dependencies if template is not None else {}
+        entry = {
+            "source": source_hash,
+            "templates": {os.path.relpath(path): self.template_hash(path) for path in sorted(dependencies)},
+            "basepath": basepath,
+            "version": self.version,
+        }
+        if self.minify:
+            entry["minify"] = True
+        return entry
+    
+    def key(self, dest_path : str) -> str:
+        return os.path.relpath(dest_path,self.destination)
+    
+    """
+    Takes the path of a page to generate and the entry of its current inputs.
+    Returns True if the page was already generated from the same inputs and still exists.
+    """
+    def is_up_to_date(self, dest_path : str, entry : dict) -> bool:
+        if self.force:
+            return False
+        return self.previous.get(self.key(dest_path)) == entry and os.path.isfile(dest_path)
+    
+    def record(self, dest_path : str, entry : dict, generated : bool):
+        key = self.key(dest_path)
+        self.pages[key] = entry
+        if generated:
+            self.generated.append(key)
+        else:
+            self.skipped.append(key)
+    
+    """
+    Takes the path of a page that is not regenerated this time.
+    Keeps its previous entry and returns True, or returns False if it was never generated.
+    """
+    def keep(self, dest_path : str) -> bool:
+        key = self.key(dest_path)
+        if key not in self.previous or not os.path.isfile(dest_path):
+            return False
+        self.pages[key] = self.previous[key]
+        self.skipped.append(key)
+        return True
+    
+    """
+    Returns the sorted paths, relative to the destination, of the pages
+    generated by the previous build that were not part of this one.
+    """
+    def stale(self) -> list[str]:
+        return sorted(key for key in self.previous if key not in self.pages)
+    
+    def to_dict(self) -> dict:
+        return {"pages": self.pages}
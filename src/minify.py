@@ -0,0 +1,138 @@
+import re
+
+"""
+Minification drops the bytes of the generated files that do not change how they
+are displayed :
+- in html, runs of whitespace collapse to a single space, and the line breaks
+  between two tags (or a tag and a slot) of a template are dropped when one of
+  the tags is a block-level element (see BLOCK_TAGS), except inside the elements
+  where whitespace matters : pre, textarea, script and style. Between inline
+  elements or slots, the line break is a space of the rendered text : it
+  collapses to a single space instead.
+- in css, comments are dropped and the whitespace around the punctuation removed.
+The html is minified where it is produced rather than scanned afterwards : the
+text of the nodes by the node serializer (see HTMLNode.iter_html), and the
+literal segments of a template once, when it is compiled (see Template.minified).
+Only ascii whitespace is collapsed (a non-breaking space is content), so the
+number of characters removed is also the number of bytes saved.
+"""
+
+PRESERVED_TAGS = ("pre", "textarea", "script", "style")
+
+WHITESPACE = re.compile(r"[ \t\n\r\f]+")
+
+# The slots of a template are replaced by this character while its literals are minified
+SLOT_MARK = "\0"
+
+# The elements whose start and end break the line : the whitespace next to their tags is not rendered
+BLOCK_TAGS = frozenset((
+    "address", "article", "aside", "base", "blockquote", "body", "br", "dd", "details", "div", "dl", "dt",
+    "fieldset", "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "head",
+    "header", "hr", "html", "li", "link", "main", "meta", "nav", "noscript", "ol", "p", "pre", "script",
+    "section", "style", "summary", "table", "tbody", "td", "tfoot", "th", "thead", "title", "tr", "ul",
+))
+
+LINE_BREAK_BETWEEN_TAGS = re.compile(r"(?<=[>\0])[ \t\r\f]*\n[ \t\n\r\f]*(?=[<\0])")
+
+TAG_NAME = re.compile(r"</?([A-Za-z][A-Za-z0-9-]*)")
+
+PRESERVED_PATTERN = re.compile(r"<(pre|textarea|script|style)\b.*?</\1\s*>", re.S | re.I)
+
+CSS_STRING_OR_COMMENT = re.compile(r"(\"(?:\\.|[^\"\\])*\"|'(?:\\.|[^'\\])*')|/\*.*?\*/", re.S)
+
+CSS_PUNCTUATION = re.compile(r" ?([{};,]) ?")
+
+"""
+Collapses the whitespace of the html text of the nodes, counting the bytes saved
+in a file. One Minifier is used per generated file.
+"""
+class Minifier:
+    def __init__(self):
+        self.saved = 0
+
+    """
+    Takes the text value of a leaf node (or any html without preserved element).
+    Returns it with its runs of whitespace collapsed.
+    """
+    def text(self, html : str) -> str:
+        minified = WHITESPACE.sub(" ", html)
+        self.saved += len(html) - len(minified)
+        return minified
+
+"""
+Takes some html and a position in it.
+Returns True if a block-level tag starts at that position.
+"""
+def is_block_tag(html : str, position : int) -> bool:
+    match = TAG_NAME.match(html, position)
+    return match is not None and match.group(1).lower() in BLOCK_TAGS
+
+"""
+Takes a match of LINE_BREAK_BETWEEN_TAGS.
+Returns nothing when the tag before or after it is a block-level tag, a space otherwise.
+"""
+def line_break_between_tags(match : re.Match) -> str:
+    html = match.string
+    before = html.rfind("<", 0, match.start()) if html[match.start() - 1] == ">" else -1
+    if (before >= 0 and is_block_tag(html, before)) or is_block_tag(html, match.end()):
+        return ""
+    return " "
+
+"""
+Takes some html, outside of any preserved element.
+Returns it without the line breaks between block-level tags, and its whitespace collapsed.
+"""
+def collapse_html(html : str) -> str:
+    return WHITESPACE.sub(" ", LINE_BREAK_BETWEEN_TAGS.sub(line_break_between_tags, html))
+
+"""
+Takes some html, like the literal text of a template.
+Returns it minified, the preserved elements (pre, textarea...) left as they are.
+"""
+def minify_html(html : str) -> str:
+    parts = []
+    position = 0
+    previous = None
+    for match in PRESERVED_PATTERN.finditer(html):
+        parts.append(collapse_between(html[position:match.start()],previous,match.group(1)))
+        parts.append(match.group(0))
+        position = match.end()
+        previous = match.group(1)
+    parts.append(collapse_between(html[position:],previous,None))
+    return "".join(parts)
+
+"""
+Takes some html found between preserved elements, and the tag names of the
+preserved elements before and after it (or None).
+Returns it collapsed (see collapse_html) as if the preserved elements were there,
+so the line breaks between them and the other tags are handled too.
+"""
+def collapse_between(html : str, after_tag : str, before_tag : str) -> str:
+    closing = f"</{after_tag}>" if after_tag is not None else ""
+    opening = f"<{before_tag}>" if before_tag is not None else ""
+    html = collapse_html(closing + html + opening)
+    return html[len(closing):len(html) - len(opening)]
+
+"""
+Takes some css without strings or comments.
+Returns it with its whitespace collapsed, and removed around the punctuation.
+"""
+def collapse_css(css : str) -> str:
+    css = CSS_PUNCTUATION.sub(r"\1", WHITESPACE.sub(" ", css))
+    return css.replace(": ", ":").replace(";}", "}")
+
+"""
+Takes a css stylesheet.
+Returns it minified : without comments and with as little whitespace as possible.
+Strings are left as they are.
+"""
+def minify_css(css : str) -> str:
+    parts = []
+    position = 0
+    for match in CSS_STRING_OR_COMMENT.finditer(css):
+        parts.append(collapse_css(css[position:match.start()]))
+        if match.group(1) is not None:
+            parts.append(match.group(1))
+        position = match.end()
+    parts.append(collapse_css(css[position:]))
+    return "".join(parts).strip()
@@ -0,0 +1,172 @@
+import datetime
+import hashlib
+import json
+import os
+from xml.sax.saxutils import escape
+
+import frontmatter as fm
+from htmlnode import rewrite_url
+from leafnode import LeafNode
+from parentnode import ParentNode
+
+"""
+The page index describes every page of the site from its metadata only
+(see frontmatter.read_metadata), without parsing any page. It is enough to
+generate the pages listing other pages :
+- a page with a "list: blog" front matter key lists the pages under content/blog,
+- a page is generated for each tag, listing the pages with that tag,
+- a feed lists the dated pages.
+Listed pages are sorted by date, the most recent first, then by title.
+"""
+
+"""
+Takes the path of an html page and the destination directory.
+Returns its url from the root of the site : /blog/tom/ for blog/tom/index.html.
+"""
+def page_url(dest_path : str, dest_dir_path : str) -> str:
+    rel_path = os.path.relpath(dest_path, dest_dir_path).replace(os.sep, "/")
+    if rel_path == "index.html":
+        return "/"
+    if rel_path.endswith("/index.html"):
+        return "/" + rel_path[:-len("index.html")]
+    return "/" + rel_path
+
+"""
+What the index knows about a page : its source and destination paths,
+its url and its metadata, with the title, date and tags picked out.
+"""
+class PageInfo:
+    def __init__(self, source : str, dest : str, url : str, metadata : dict):
+        self.source = source
+        self.dest = dest
+        self.url = url
+        self.metadata = metadata
+        self.title = str(metadata.get("title", url))
+        self.date = metadata.get("date")
+        tags = metadata.get("tags", [])
+        self.tags = [tags] if isinstance(tags, str) else list(tags)
+
+    def to_dict(self) -> dict:
+        return {"url": self.url, "title": self.title, "date": self.date, "tags": self.tags}
+
+    def __repr__(self):
+        return f"PageInfo({self.url}, {self.title})"
+
+"""
+Takes a list of PageInfo.
+Returns them sorted by date, the most recent first (undated pages last), then by title.
+"""
+def sort_pages(pages : list) -> list:
+    pages = sorted(pages, key=lambda page: page.title)
+    return sorted(pages, key=lambda page: page.date or "", reverse=True)
+
+class PageIndex:
+    def __init__(self, pages : list, content_dir : str):
+        self.pages = pages
+        self.content_dir = os.path.abspath(content_dir)
+        self.by_source = {os.path.abspath(page.source): page for page in pages}
+
+    """
+    Takes the path of a markdown page.
+    Returns the sorted pages it lists, or None if it is not a listing page.
+    """
+    def listing(self, source : str):
+        page = self.by_source.get(os.path.abspath(source))
+        if page is None or "list" not in page.metadata:
+            return None
+        directory = os.path.normpath(os.path.join(self.content_dir, page.metadata["list"])) + os.sep
+        return sort_pages([other for other in self.pages if other is not page and os.path.abspath(other.source).startswith(directory)])
+
+    """
+    Returns a dictionary mapping each tag to the sorted pages with that tag.
+    """
+    def tags(self) -> dict:
+        tags = {}
+        for page in self.pages:
+            for tag in page.tags:
+                tags.setdefault(tag, []).append(page)
+        return {tag: sort_pages(pages) for tag, pages in sorted(tags.items())}
+
+    """
+    Returns the pages with a date, the most recent first.
+    """
+    def dated(self) -> list:
+        return sort_pages([page for page in self.pages if page.date is not None])
+
+"""
+Takes the list of pages to generate (see main.discover_pages), the content
+directory and the destination directory.
+Returns the PageIndex of the pages, reading only their metadata.
+"""
+def build_index(pages : list, content_dir : str, dest_dir_path : str) -> PageIndex:
+    infos = [PageInfo(from_path, dest_path, page_url(dest_path, dest_dir_path), fm.read_metadata(from_path)) for from_path, template_path, dest_path in pages]
+    return PageIndex(infos, content_dir)
+
+"""
+Takes a list of PageInfo.
+Returns a hash of what a listing of those pages shows, so a listing page is
+only generated again when it changed.
+"""
+def listing_hash(pages : list) -> str:
+    return hashlib.sha256(json.dumps([page.to_dict() for page in pages], sort_keys=True).encode()).hexdigest()
+
+"""
+Takes a list of PageInfo.
+Returns the HTMLNode of their listing : a list of links, with their date.
+"""
+def listing_node(pages : list) -> ParentNode:
+    items = []
+    for page in pages:
+        children = [LeafNode('a', page.title, {"href": page.url})]
+        if page.date is not None:
+            children.append(LeafNode(None, " "))
+            children.append(LeafNode('time', str(page.date), {"datetime": str(page.date)}))
+        items.append(ParentNode(tag='li', children=children))
+    return ParentNode(tag='ul', children=items, props={"class": "page-list"})
+
+def listing_html(pages : list, basepath : str = None) -> str:
+    return listing_node(pages).to_html(basepath)
+
+"""
+Takes a date from a front matter (YYYY-MM-DD).
+Returns it in the RFC 822 format of RSS feeds, or None if it is not a valid date.
+"""
+def rfc822_date(value) -> str:
+    try:
+        date = datetime.date.fromisoformat(str(value))
+    except ValueError:
+        return None
+    return date.strftime("%a, %d %b %Y 00:00:00 +0000")
+
+"""
+Takes an url from the root of the site, the basepath of the site and its base url
+(like https://example.org), or None.
+Returns the absolute url of the page, or its url from the root of the server,
+with the basepath applied, without base url.
+"""
+def absolute_url(url : str, basepath : str = None, site_url : str = None) -> str:
+    url = rewrite_url(url, basepath)
+    if site_url is None:
+        return url
+    return site_url.rstrip("/") + url
+
+"""
+Takes the title of the feed, the pages to list, the basepath of the site and its
+base url (like https://example.org).
+Returns an RSS 2.0 feed of the pages. RSS needs absolute links : they are built
+from the base url (see absolute_url).
+"""
+def feed_xml(title : str, pages : list, basepath : str = None, site_url : str = None) -> str:
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<rss version="2.0"><channel>',
+        f"<title>{escape(title)}</title><link>{escape(absolute_url('/', basepath, site_url))}</link><description>{escape(title)}</description>",
+    ]
+    for page in pages:
+        item = f"<item><title>{escape(page.title)}</title><link>{escape(absolute_url(page.url, basepath, site_url))}</link>"
+        pub_date = rfc822_date(page.date)
+        if pub_date is not None:
+            item += f"<pubDate>{pub_date}</pubDate>"
+        lines.append(item + "</item>")
+    lines.append("</channel></rss>")
+    return "\n".join(lines) + "\n"
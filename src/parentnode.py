@@ -5,6 +5,7 @@ A ParentNode is a type of HTMLNode that represents a node with nested children.
 It is an HTMLNode that is not a LeafNode.
 """
 class ParentNode(HTMLNode):
+    __slots__ = ()
     
     def __init__(self, tag: str, children: list, props: dict = None):
         super().__init__(tag=tag, value=None, children=children, props=props)
@@ -12,10 +13,12 @@ class ParentNode(HTMLNode):
     """
     Returns a string that represents the HTML tag string of the node.
     """
-    def to_html(self):
+    def to_html(self, basepath : str = None):
+        return ''.join(self.iter_html(basepath))
+    
+    def html_parts(self, basepath : str = None, minifier = None):
         if self.tag is None :
             raise ValueError("ParentNode must have a tag")
         if self.children is None:
             raise ValueError("ParentNode must have children")
-        children_html = ''.join([child.to_html() for child in self.children])
-        return f"<{self.tag}{self.props_to_html()}>{children_html}</{self.tag}>"
\ No newline at end of file
+        return f"<{self.tag}{self.props_to_html(basepath)}>", self.children, f"</{self.tag}>"
\ No newline at end of file
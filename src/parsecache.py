@@ -0,0 +1,116 @@
+import hashlib
+import json
+import os
+import zlib
+
+import atomicfile
+
+"""
+The parse cache keeps the parsed body of each page on disk (its title, its content
+html and its table of contents), so a page whose markdown did not change is not
+parsed again, even by a new build with an empty destination, like a CI runner
+restoring the cache directory.
+
+Entries are keyed by the hash of the markdown source, the version of the parser,
+the basepath, whether the headings got anchors and whether the html is minified.
+Each entry is a zlib compressed JSON file, written to a temporary file renamed over the entry, so an interrupted
+build never leaves a half-written entry behind ; an unreadable entry is deleted and
+counts as a miss.
+The cache is bounded in size : prune deletes the least recently used entries (a hit
+touches its entry) until the cache fits.
+"""
+
+# Bump when a change of the parser or of the html serializer changes the parsed body
+# of the pages (also the version of the block memo, see blockmemo)
+PARSER_VERSION = 4
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+ENTRY_SUFFIX = ".json.z"
+
+class ParseCache:
+    def __init__(self, directory : str, max_bytes : int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    """
+    Takes the hash of a markdown source (see manifest.file_hash), the basepath,
+    whether the headings get anchors and whether the html is minified.
+    Returns the key of its entry.
+    """
+    def key(self, source_hash : str, basepath : str, anchors : bool, minify : bool = False) -> str:
+        key = f"{PARSER_VERSION}\0{source_hash}\0{basepath}\0{anchors}"
+        if minify:
+            key += "\0minify"
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def path(self, key : str) -> str:
+        return os.path.join(self.directory, key + ENTRY_SUFFIX)
+
+    """
+    Takes a key.
+    Returns the cached body, or None if there is no readable entry for that key.
+    """
+    def get(self, key : str):
+        path = self.path(key)
+        try:
+            with open(path, "rb") as entry_file:
+                body = json.loads(zlib.decompress(entry_file.read()))
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, ValueError, zlib.error):
+            self.misses += 1
+            self.remove(path)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return body
+
+    """
+    Takes a key and a body (a dictionary of strings).
+    Stores the body in the entry of that key.
+    """
+    def put(self, key : str, body : dict):
+        atomicfile.write_file(self.path(key), zlib.compress(json.dumps(body).encode()), "wb")
+
+    def remove(self, path : str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    """
+    Deletes the least recently used entries until the cache fits in max_bytes.
+    Returns the number of entries deleted.
+    """
+    def prune(self) -> int:
+        try:
+            entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith(ENTRY_SUFFIX) and entry.is_file()]
+        except FileNotFoundError:
+            return 0
+        stats = []
+        for entry in entries:
+            try:
+                stats.append((entry.stat().st_mtime_ns, entry.stat().st_size, entry.path))
+            except FileNotFoundError:
+                continue
+        total = sum(size for _, size, _ in stats)
+        removed = 0
+        for _, size, path in sorted(stats):
+            if total <= self.max_bytes:
+                break
+            self.remove(path)
+            total -= size
+            removed += 1
+        self.evicted += removed
+        return removed
+
+    def summary(self) -> str:
+        return f"{self.hits} hits, {self.misses} misses, {self.evicted} evicted"
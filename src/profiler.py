@@ -0,0 +1,275 @@
+import contextlib
+import json
+import os
+import re
+import time
+
+import htmlnode
+import manifest as mf
+import pageindex as pi
+import siteindex as si
+import splitmarkdown as sp
+import templates
+import textnode
+
+"""
+The profiler measures where the time of a build goes, per stage and per page.
+It is installed by replacing the functions of each stage with timed wrappers
+(and restoring them afterwards), so a build without profiling runs the very same
+code as before, without any timing overhead.
+
+The time of a stage is exclusive : while a stage calls another one (the template
+pulling the html of the content, pulling the blocks of the document...), the
+time is counted for the inner stage only. So the stages add up to the build time,
+minus what no stage covers. Generators are timed on each step, as the pages are
+streamed from the markdown file to the html file.
+
+The profiler also counts the calls to the regular expressions of splitmarkdown
+and the nodes (HTMLNode and TextNode) allocated. The wrappers add their own
+overhead to the stages called once per block, so the times are better compared
+between two profiled builds than with a build without profiling.
+"""
+
+# Stages in the order of a build, for the summary
+STAGES = ["discover", "index", "assets", "hash", "read", "split", "classify", "inline", "build", "serialize", "template", "write", "page"]
+
+"""
+A compiled regular expression standing in for another one, counting the calls
+to its methods (search, match, findall...) under its name.
+"""
+class CountingPattern:
+    def __init__(self, pattern : re.Pattern, counts : dict, name : str):
+        self.pattern = pattern
+        self.counts = counts
+        self.name = name
+
+    def __getattr__(self, attribute):
+        value = getattr(self.pattern, attribute)
+        if not callable(value):
+            return value
+        def counted(*args, **kwargs):
+            self.counts[self.name] = self.counts.get(self.name, 0) + 1
+            return value(*args, **kwargs)
+        return counted
+
+class Profiler:
+    def __init__(self):
+        # stage -> [seconds, calls]
+        self.stages = {}
+        # page -> {stage: seconds}
+        self.pages = {}
+        self.regex_calls = {}
+        self.node_allocations = {}
+        self.page = None
+        # [stage, time it was entered or resumed] of the running stages, innermost last
+        self.stack = []
+        self.patches = []
+        self.started = None
+        self.total = 0.0
+
+    """
+    Takes the time spent in a stage.
+    Adds it to the stage, and to the current page if any.
+    """
+    def charge(self, stage : str, seconds : float):
+        self.stages[stage][0] += seconds
+        if self.page is not None:
+            page = self.pages.setdefault(self.page, {})
+            page[stage] = page.get(stage, 0.0) + seconds
+
+    def enter(self, stage : str):
+        now = time.perf_counter()
+        if len(self.stack) > 0:
+            self.charge(self.stack[-1][0], now - self.stack[-1][1])
+        self.stages.setdefault(stage, [0.0, 0])[1] += 1
+        self.stack.append([stage, now])
+
+    def leave(self):
+        now = time.perf_counter()
+        stage, start = self.stack.pop()
+        self.charge(stage, now - start)
+        if len(self.stack) > 0:
+            self.stack[-1][1] = now
+
+    """
+    Takes a stage and a function.
+    Returns the function timed as that stage.
+    """
+    def timed(self, stage : str, function):
+        def wrapper(*args, **kwargs):
+            self.enter(stage)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.leave()
+        return wrapper
+
+    """
+    Takes a stage and an iterable.
+    Yields its items, the time taken to produce each one counted as that stage.
+    """
+    def timed_iter(self, stage : str, iterable):
+        iterator = iter(iterable)
+        while True:
+            self.enter(stage)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.leave()
+            yield item
+
+    """
+    Takes a stage and a generator function.
+    Returns the function, its generators timed as that stage.
+    """
+    def timed_generator(self, stage : str, function):
+        def wrapper(*args, **kwargs):
+            return self.timed_iter(stage, function(*args, **kwargs))
+        return wrapper
+
+    """
+    Takes a stage, a function and the index of its argument naming a page.
+    Returns the function timed as that stage, the time of every stage it runs
+    being counted for that page as well.
+    """
+    def for_page(self, stage : str, function, index : int):
+        timed = self.timed(stage, function)
+        def wrapper(*args, **kwargs):
+            previous = self.page
+            self.page = args[index]
+            try:
+                return timed(*args, **kwargs)
+            finally:
+                self.page = previous
+        return wrapper
+
+    """
+    Takes an object (a module or a class), the name of one of its attributes and its replacement.
+    Replaces the attribute until uninstall.
+    """
+    def patch(self, owner, name : str, replacement):
+        self.patches.append((owner, name, vars(owner)[name]))
+        setattr(owner, name, replacement)
+
+    """
+    Takes the module of the build (main, which can be running as __main__).
+    Replaces the functions of each stage with their timed wrappers, and starts the clock.
+    """
+    def install(self, build_module):
+        self.patch(build_module, "discover_pages", self.timed("discover", build_module.discover_pages))
+        self.patch(build_module, "copy_from_to", self.timed("assets", build_module.copy_from_to))
+        self.patch(build_module, "sync_from_to", self.timed("assets", build_module.sync_from_to))
+        self.patch(build_module, "write_page", self.timed("write", build_module.write_page))
+        self.patch(build_module, "generate_page", self.for_page("page", build_module.generate_page, 0))
+        self.patch(build_module, "generate_file", self.for_page("page", build_module.generate_file, 0))
+        self.patch(build_module, "generate_page_targets", self.for_page("page", build_module.generate_page_targets, 0))
+        self.patch(si, "scan", self.timed("discover", si.scan))
+        self.patch(pi, "build_index", self.timed("index", pi.build_index))
+        self.patch(mf, "file_hash", self.timed("hash", mf.file_hash))
+
+        iter_blocks = sp.iter_blocks
+        self.patch(sp, "iter_blocks", lambda lines: self.timed_iter("split", iter_blocks(self.timed_iter("read", lines))))
+        self.patch(sp, "classify_lines", self.timed("classify", sp.classify_lines))
+        self.patch(sp, "text_to_children", self.timed("inline", sp.text_to_children))
+        self.patch(sp, "build_block", self.timed("build", sp.build_block))
+        self.patch(sp.DocumentStream, "build", self.timed("build", sp.DocumentStream.build))
+        self.patch(sp.DocumentStream, "iter_html", self.timed_generator("serialize", sp.DocumentStream.iter_html))
+        self.patch(sp.DocumentStream, "iter_read_html", self.timed_generator("serialize", sp.DocumentStream.iter_read_html))
+        self.patch(htmlnode.HTMLNode, "iter_html", self.timed_generator("serialize", htmlnode.HTMLNode.iter_html))
+        self.patch(templates.Template, "iter_render", self.timed_generator("template", templates.Template.iter_render))
+
+        for name, value in list(vars(sp).items()):
+            if isinstance(value, re.Pattern):
+                self.patch(sp, name, CountingPattern(value, self.regex_calls, name))
+        for cls in (htmlnode.HTMLNode, textnode.TextNode):
+            self.patch(cls, "__init__", self.counted_init(cls.__init__))
+        self.started = time.perf_counter()
+
+    """
+    Takes the __init__ of a node class.
+    Returns it, counting the nodes allocated by their class.
+    """
+    def counted_init(self, init):
+        def wrapper(node, *args, **kwargs):
+            name = type(node).__name__
+            self.node_allocations[name] = self.node_allocations.get(name, 0) + 1
+            init(node, *args, **kwargs)
+        return wrapper
+
+    """
+    Stops the clock and puts back every function replaced by install.
+    """
+    def uninstall(self):
+        self.total += time.perf_counter() - self.started
+        for owner, name, original in reversed(self.patches):
+            setattr(owner, name, original)
+        self.patches = []
+
+    """
+    Takes the module of the build.
+    Returns a context manager installing the profiler for the duration of the block.
+    """
+    @contextlib.contextmanager
+    def installed(self, build_module):
+        self.install(build_module)
+        try:
+            yield self
+        finally:
+            self.uninstall()
+
+    """
+    Returns the pages, the slowest first, as (page, seconds, {stage: seconds}) tuples.
+    """
+    def slowest_pages(self) -> list:
+        pages = [(page, sum(stages.values()), stages) for page, stages in self.pages.items()]
+        return sorted(pages, key=lambda page: page[1], reverse=True)
+
+    """
+    Takes the number of slowest pages to pick out.
+    Returns the report of the build, as a dictionary ready to be saved as JSON.
+    """
+    def report(self, top : int = 10) -> dict:
+        ordered = [stage for stage in STAGES if stage in self.stages] + sorted(stage for stage in self.stages if stage not in STAGES)
+        covered = sum(seconds for seconds, _ in self.stages.values())
+        pages = [{"page": page, "seconds": round(seconds, 6), "stages": {stage: round(value, 6) for stage, value in stages.items()}} for page, seconds, stages in self.slowest_pages()]
+        return {
+            "total_seconds": round(self.total, 6),
+            "unaccounted_seconds": round(max(0.0, self.total - covered), 6),
+            "stages": {stage: {"seconds": round(self.stages[stage][0], 6), "calls": self.stages[stage][1]} for stage in ordered},
+            "regex_calls": dict(sorted(self.regex_calls.items())),
+            "node_allocations": dict(sorted(self.node_allocations.items())),
+            "slowest_pages": [page["page"] for page in pages[:top]],
+            "pages": pages,
+        }
+
+    """
+    Takes the path of the report and the number of slowest pages to pick out.
+    Saves the JSON report.
+    """
+    def save(self, path : str, top : int = 10):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as report_file:
+            json.dump(self.report(top), report_file, indent=2)
+
+    """
+    Takes the number of slowest pages to list.
+    Returns a readable summary : the time of each stage, the counters and the slowest pages.
+    """
+    def summary(self, top : int = 10) -> str:
+        report = self.report(top)
+        total = report["total_seconds"] or 1.0
+        lines = [f"Build profile : {report['total_seconds']:.3f} s"]
+        for stage, values in report["stages"].items():
+            lines.append(f"  {stage:<10} {values['seconds']:9.4f} s {100 * values['seconds'] / total:5.1f} % {values['calls']:9} calls")
+        lines.append(f"  {'other':<10} {report['unaccounted_seconds']:9.4f} s {100 * report['unaccounted_seconds'] / total:5.1f} %")
+        lines.append(f"Regex calls : {sum(report['regex_calls'].values())} ({', '.join(f'{name}: {count}' for name, count in report['regex_calls'].items())})")
+        lines.append(f"Nodes allocated : {sum(report['node_allocations'].values())} ({', '.join(f'{name}: {count}' for name, count in report['node_allocations'].items())})")
+        if len(report["pages"]) > 0:
+            lines.append("Slowest pages :")
+            for page in report["pages"][:top]:
+                lines.append(f"  {page['seconds']:.4f} s {page['page']}")
+        return "\n".join(lines)
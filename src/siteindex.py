@@ -0,0 +1,161 @@
+import fnmatch
+import os
+
+"""
+The site index lists the files of a source tree (the content or the static
+files) in a single os.scandir walk, before any stage of the build runs : the
+type of each directory entry comes with the listing, so only the directories
+and the files the build looks at are stat'ed, once, when their size or mtime
+is first needed.
+Each file is recorded with its kind and its output route (its path relative to
+the destination), and the stages of the build (page discovery, asset copy or
+sync) all read the same index instead of listing the tree again.
+
+In the content tree :
+- the markdown files (.md) are pages, routed to the same path with .html,
+- the _template.html files are templates (see main.discover_pages),
+- the other files and directories starting with _ (partials...) are private :
+  they are not indexed, and the private directories are not walked,
+- any other file is an asset, routed to the same path.
+In the static tree, every file is an asset.
+
+Include and exclude rules are glob patterns (see fnmatch), matched against the
+path of each entry relative to the root (with / separators) and against its
+name. An excluded directory is not walked. The symlinks to directories are
+followed, unless they point to one of the directories being walked (compared
+by device and inode), so a symlink to a parent does not loop. When include patterns are given, only
+the files matching one of them are indexed (the directories are always walked,
+and the templates always indexed unless excluded).
+"""
+
+PAGE = "page"
+TEMPLATE = "template"
+ASSET = "asset"
+
+PAGE_EXTENSION = ".md"
+TEMPLATE_NAME = "_template.html"
+
+"""
+A file of the index : its path relative to the root of the tree, its kind (PAGE,
+TEMPLATE or ASSET) and its output route. Its stat is taken from the directory
+entry of the walk, on first use.
+"""
+class Entry:
+    __slots__ = ("path", "kind", "route", "dir_entry")
+
+    def __init__(self, path : str, kind : str, route : str, dir_entry : os.DirEntry):
+        self.path = path
+        self.kind = kind
+        self.route = route
+        self.dir_entry = dir_entry
+
+    def stat(self) -> os.stat_result:
+        return self.dir_entry.stat()
+
+    def __repr__(self):
+        return f"Entry({self.path}, {self.kind}, {self.route})"
+
+class SiteIndex:
+    def __init__(self, root : str):
+        self.root = root
+        # Relative paths of the directories walked, in the order of the walk
+        self.dirs = []
+        # Entries of the files, in the order of the walk : the files of a directory
+        # by name, then its subdirectories by name
+        self.entries = []
+        self.by_path = {}
+
+    def add(self, entry : Entry):
+        self.entries.append(entry)
+        self.by_path[entry.path] = entry
+
+    def entry(self, path : str) -> Entry:
+        return self.by_path.get(path)
+
+    def of_kind(self, kind : str) -> list[Entry]:
+        return [entry for entry in self.entries if entry.kind == kind]
+
+    """
+    Returns the sorted list of the relative paths of every file indexed.
+    """
+    def files(self) -> list[str]:
+        return sorted(self.by_path)
+
+    """
+    Returns the sorted lists of the relative paths of every directory and every
+    file indexed, like assets.list_tree.
+    """
+    def tree(self) -> tuple[list[str],list[str]]:
+        return sorted(self.dirs), self.files()
+
+    def __repr__(self):
+        return f"SiteIndex({self.root}, {len(self.dirs)} dirs, {len(self.entries)} files)"
+
+"""
+Takes the path of an entry relative to the root, its name and a list of glob patterns.
+Returns True if one of the patterns matches the path or the name.
+"""
+def matches(path : str, name : str, patterns : list) -> bool:
+    path = path.replace(os.sep, "/")
+    return any(fnmatch.fnmatchcase(path, pattern) or fnmatch.fnmatchcase(name, pattern) for pattern in patterns)
+
+"""
+Takes the name and the relative path of a file, and whether it belongs to the content tree.
+Returns its kind and its output route, or None if it is private.
+"""
+def classify(name : str, path : str, content : bool):
+    if not content:
+        return ASSET, path
+    if name == TEMPLATE_NAME:
+        return TEMPLATE, None
+    if name.startswith("_"):
+        return None
+    root, extension = os.path.splitext(path)
+    if extension == PAGE_EXTENSION:
+        return PAGE, root + ".html"
+    return ASSET, path
+
+"""
+Takes a root directory, the include and exclude glob patterns, and whether it is
+the content tree (see the kinds of files above).
+Walks the tree once with os.scandir.
+Returns its SiteIndex.
+Raises a FileNotFoundError if the root does not exist.
+"""
+def scan(root : str, include : list = None, exclude : list = None, content : bool = False) -> SiteIndex:
+    index = SiteIndex(root)
+    stat = os.stat(root)
+    walk(index, root, "", include or [], exclude or [], content, {(stat.st_dev, stat.st_ino)})
+    return index
+
+"""
+Takes the index, the directory to walk and its path relative to the root, the
+include and exclude patterns, whether it is the content tree, and the (device,
+inode) pairs of the directory and its parents.
+Adds the files of the directory and its subdirectories to the index.
+"""
+def walk(index : SiteIndex, directory : str, rel_dir : str, include : list, exclude : list, content : bool, parents : set):
+    with os.scandir(directory) as iterator:
+        dir_entries = sorted(iterator, key=lambda dir_entry: dir_entry.name)
+    subdirs = []
+    for dir_entry in dir_entries:
+        path = os.path.join(rel_dir, dir_entry.name)
+        if len(exclude) > 0 and matches(path, dir_entry.name, exclude):
+            continue
+        if dir_entry.is_dir():
+            if not (content and dir_entry.name.startswith("_")):
+                subdirs.append((dir_entry, path))
+        elif dir_entry.is_file():
+            kind = classify(dir_entry.name, path, content)
+            if kind is None or (kind[0] != TEMPLATE and len(include) > 0 and not matches(path, dir_entry.name, include)):
+                continue
+            index.add(Entry(path, kind[0], kind[1], dir_entry))
+    for dir_entry, path in subdirs:
+        stat = dir_entry.stat()
+        key = (stat.st_dev, stat.st_ino)
+        if key in parents:
+            continue
+        index.dirs.append(path)
+        parents.add(key)
+        walk(index, dir_entry.path, path, include, exclude, content, parents)
+        parents.remove(key)
@@ -1,7 +1,10 @@
+import collections
 import re
 
 from textnode import TextType, TextNode
 from parentnode import ParentNode
+from leafnode import LeafNode
+from minify import Minifier
 
 ############################################ Split inline elements
 
@@ -25,13 +28,16 @@ def split_nodes_delimiter(old_nodes : list[TextNode], delimiter : str, text_type
                     new_list.append(TextNode(part,text_type))
     return new_list
 
+IMAGE_PATTERN = re.compile(r"!\[(.+?)\]\((.+?)\)")
+LINK_PATTERN = re.compile(r"(?<!!)\[(.+?)\]\((.+?)\)")
+
 """
 Takes raw markdown text.
 Returns a list of tuples. 
 Each tuple contains the alt text and the URL of any markdown images as ![alt text](url).
 """
 def extract_markdown_images(text):
-    return re.findall(r"!\[(.+?)\]\((.+?)\)",text)
+    return IMAGE_PATTERN.findall(text)
 
 """
 Takes raw markdown text.
@@ -40,84 +46,130 @@ Each tuple contains the anchor text and the URL of any markdown links as [anchor
 Don't extract markdown images (i.e a ! character before the link).
 """
 def extract_markdown_links(text):
-    return re.findall(r"(?<!!)\[(.+?)\]\((.+?)\)",text)
+    return LINK_PATTERN.findall(text)
 
 """
-Takes a list of 'old nodes'.
-Returns a new list of nodes, where any old node that contains 
-a markdown image are split into the correspondant nodes.
+Takes a list of 'old nodes', a compiled pattern whose two groups are a text
+and an url, and the text type of what it matches.
+Returns a new list of nodes, where any old node that contains a match
+is split into the correspondant nodes.
+The text is scanned once and cut at the offsets of the matches, so the cost
+is linear in the length of the text whatever the number of matches.
 """
-def split_nodes_image(old_nodes):
+def split_nodes_pattern(old_nodes, pattern, text_type):
     new_list = []
     for old_node in old_nodes :
         text = old_node.text
-        images = extract_markdown_images(text)
-        
-        i = 0
-        while len(text) > 0 and i < len(images):
-            img = images[i]
-            parts = text.split(f'![{img[0]}]({img[1]})')
-            if len(parts[0]) > 0:
-                new_list.append(TextNode(parts[0],old_node.text_type,old_node.url))
-            new_list.append(TextNode(img[0],TextType.IMAGE,img[1]))
-            if len(parts) > 1:
-                text = parts[1]
-            else: 
-                text = ''
-            i += 1
-        if len(text) > 0:
-            new_list.append(TextNode(text,old_node.text_type,old_node.url))
+        position = 0
+        for match in pattern.finditer(text):
+            if match.start() > position:
+                new_list.append(TextNode(text[position:match.start()],old_node.text_type,old_node.url))
+            new_list.append(TextNode(match.group(1),text_type,match.group(2)))
+            position = match.end()
+        if position < len(text):
+            new_list.append(TextNode(text[position:],old_node.text_type,old_node.url))
     return new_list
 
+"""
+Takes a list of 'old nodes'.
+Returns a new list of nodes, where any old node that contains 
+a markdown image are split into the correspondant nodes.
+"""
+def split_nodes_image(old_nodes):
+    return split_nodes_pattern(old_nodes,IMAGE_PATTERN,TextType.IMAGE)
+
 """
 Takes a list of 'old nodes'.
 Returns a new list of nodes, where any old node that contains 
 a markdown link are split into the correspondant nodes.
 """
 def split_nodes_link(old_nodes):
-    new_list = []
-    for old_node in old_nodes :
-        text = old_node.text
-        links = extract_markdown_links(text)
-        
-        i = 0
-        while len(text) > 0 and i < len(links):
-            link = links[i]
-            parts = text.split(f'[{link[0]}]({link[1]})')
-            if len(parts[0]) > 0:
-                new_list.append(TextNode(parts[0],old_node.text_type,old_node.url))
-            new_list.append(TextNode(link[0],TextType.LINK,link[1]))
-            if len(parts) > 1:
-                text = parts[1]
-            else: 
-                text = ''
-            i += 1
-        if len(text) > 0:
-            new_list.append(TextNode(text,old_node.text_type,old_node.url))
-    return new_list
+    return split_nodes_pattern(old_nodes,LINK_PATTERN,TextType.LINK)
+
+# Inline markers : bold, italic, code, image and link starts
+INLINE_MARKER_PATTERN = re.compile(r"\*\*|_|`|!\[|\[")
+# An url may hold one level of balanced parentheses, like (https://host/a_(b))
+INLINE_URL = r"\(((?:[^()]|\([^()]*\))+)\)"
+INLINE_IMAGE_PATTERN = re.compile(r"!\[([^\[\]]+)\]" + INLINE_URL)
+INLINE_LINK_PATTERN = re.compile(r"\[([^\[\]]+)\]" + INLINE_URL)
 
 """
 Takes inline markdown as input.
 Returns the list of tje textnodes correponding to the inline elements.
+The text is scanned once, from left to right, jumping from one marker
+(**, _, `, ![ or [) to the next one :
+- ** and _ switch bold and italic on and off ; a node has a single type, so
+  when both are on the one opened last wins : **a _b_ c** gives bold "a ",
+  italic "b" and bold " c", and _a **b** c_ gives italic "a ", bold "b" and italic " c",
+- a code span runs to the next ` and its content is kept as is,
+- images and links are recognised where they start, so their urls are never
+  split, and an url may hold balanced parentheses : [a](b (c)) links to "b (c)".
+Unlike splitting the text on each delimiter in turn, then on images and links,
+the delimiters inside a code span or an url are left as they are, and a link
+inside bold or italic text is kept as a link.
 """
 def text_to_textnodes(text):
-    with_bold = split_nodes_delimiter([TextNode(text,TextType.TEXT)],'**',TextType.BOLD)
-    with_italic = split_nodes_delimiter(with_bold,'_',TextType.ITALIC)
-    with_code = split_nodes_delimiter(with_italic,'`',TextType.CODE)
-    with_images = split_nodes_image(with_code)
-    with_links = split_nodes_link(with_images)
-    return with_links
+    nodes = []
+    # The emphasis switched on, in the order they were opened
+    opened = []
+    start = 0
+    position = 0
+    
+    def flush(end):
+        if end > start:
+            nodes.append(TextNode(text[start:end],opened[-1] if len(opened) > 0 else TextType.TEXT))
+    
+    while True:
+        marker = INLINE_MARKER_PATTERN.search(text,position)
+        if marker is None:
+            break
+        index = marker.start()
+        token = marker.group()
+        
+        if token == "**" or token == "_":
+            flush(index)
+            text_type = TextType.BOLD if token == "**" else TextType.ITALIC
+            if text_type in opened:
+                opened.remove(text_type)
+            else:
+                opened.append(text_type)
+            start = position = marker.end()
+        
+        elif token == "`":
+            flush(index)
+            end = text.find("`",index + 1)
+            if end == -1:
+                end = len(text)
+            if end > index + 1:
+                nodes.append(TextNode(text[index + 1:end],TextType.CODE))
+            start = position = end + 1
+        
+        else:
+            pattern = INLINE_IMAGE_PATTERN if token == "![" else INLINE_LINK_PATTERN
+            match = pattern.match(text,index)
+            if match is None:
+                # Not an image nor a link : a [ right after a ! is never a link either
+                position = marker.end()
+                continue
+            flush(index)
+            text_type = TextType.IMAGE if token == "![" else TextType.LINK
+            nodes.append(TextNode(match.group(1),text_type,match.group(2)))
+            start = position = match.end()
+    
+    flush(len(text))
+    return nodes
 
 
 
 ############################################ Split block elements
 
 """
-Takes a raw Markdown string (representing a full document).
-Returns a list of "block" strings.
+Blocks are read line by line, in a single pass over the document :
+a blank line ends the current block (except inside a code fence), and each
+line of a block is checked against the line-wise block type (quote, lists)
+its first line started, as it is read, so a block is classified as soon as it ends.
+The node of a block is then built from its lines, without parsing it again.
 """
-def markdown_to_blocks(markdown):
-    return [block.strip() for block in markdown.split('\n\n') if len(block.strip()) > 0]
 
 from enum import Enum
 class BlockType(Enum):
@@ -128,51 +180,166 @@ class BlockType(Enum):
     UNORDERED_LIST = 'unordered_list_block'
     ORDERED_LIST = 'ordered_list_block'
 
+CODE_FENCE = "```"
+
 """
-Takes a single block of markdown text.
+Takes the first line of a block.
+Returns the line-wise block type it starts (quote, unordered or ordered list), or None.
+"""
+def line_kind(line):
+    if line.startswith(">"):
+        return BlockType.QUOTE
+    if line.startswith("- "):
+        return BlockType.UNORDERED_LIST
+    if line.startswith("1. "):
+        return BlockType.ORDERED_LIST
+    return None
+
+"""
+Takes a line-wise block type, a line of a block and its number in the block (starting at 1).
+Returns True if the line is valid for that block type :
+- a quote line starts with a > character,
+- an unordered list line starts with a - character and a space, followed by at least one character,
+- an ordered list line starts with its number, a . character and a space, followed by at least one character.
+"""
+def line_is(kind, line, number):
+    if kind == BlockType.QUOTE:
+        return line.startswith(">")
+    if kind == BlockType.UNORDERED_LIST:
+        return len(line) > 2 and line.startswith("- ")
+    prefix = f"{number}. "
+    return len(line) > len(prefix) and line.startswith(prefix)
+
+"""
+Takes a line.
+Returns its heading level : a one-line heading starts with 1-6 # characters, followed
+by a space and then the heading text (at least one character). Returns 0 otherwise.
+"""
+def heading_level(line):
+    level = len(line) - len(line.lstrip("#"))
+    if 1 <= level <= 6 and len(line) > level + 1 and line[level] == " ":
+        return level
+    return 0
+
+"""
+A block being read : its lines so far, and the line-wise block type all of them
+are still valid for (None once a line is not), so a paragraph line costs no check.
+The last line is only checked when the block is closed, once its trailing
+whitespace is stripped.
+"""
+class OpenBlock:
+    def __init__(self, line, fences = True):
+        self.lines = [line]
+        self.kind = line_kind(line)
+        # A code fence keeps the block open across blank lines, until the closing fence
+        self.fenced = fences and line.startswith(CODE_FENCE) and not (len(line.rstrip()) >= 2 * len(CODE_FENCE) and line.rstrip().endswith(CODE_FENCE))
+
+    def add(self, line):
+        if self.kind is not None and not line_is(self.kind, self.lines[-1], len(self.lines)):
+            self.kind = None
+        self.lines.append(line)
+        if self.fenced and (line.startswith(CODE_FENCE) or line.rstrip().endswith(CODE_FENCE)):
+            self.fenced = False
+
+    """
+    Returns the BlockType of the block and its lines.
+    """
+    def close(self):
+        last = self.lines[-1] = self.lines[-1].rstrip()
+        if self.kind is not None and not line_is(self.kind, last, len(self.lines)):
+            self.kind = None
+        return classify_lines(self.lines, self.kind), self.lines
+
+"""
+Takes the lines of a block, and the line-wise block type all of them are valid for (or None).
 Returns the correspondant BlockType.
-Assumes all leading and trailing whitespace were already stripped.
 """
-def block_to_block_type(text):
-    # Headings are a one-line block, start with 1-6 # characters, followed by a space and then the heading text (at least one character).
-    pattern = r"^#{1,6} .+"
-    matches = re.findall(pattern,text)
-    if len(matches) == 1 and matches[0] == text:
+def classify_lines(lines, kind):
+    first = lines[0]
+    if len(lines) == 1 and heading_level(first) > 0:
         return BlockType.HEADING
-    
+
     # Code blocks can be a several-lines block, must start with 3 backticks and end with 3 backticks.
-    pattern = r"^`{3}[\s\S]*`{3}$"
-    matches = re.findall(pattern,text)
-    if len(matches) == 1 and matches[0] == text:
+    if first.startswith(CODE_FENCE) and lines[-1].endswith(CODE_FENCE) and (len(lines) > 1 or len(first) >= 2 * len(CODE_FENCE)):
         return BlockType.CODE
-    
-    # Every line in a quote block must start with a > character.
-    pattern = r"^>(?:.*\n>)*.*"
-    matches = re.findall(pattern,text)
-    if len(matches) == 1 and matches[0] == text:
-        return BlockType.QUOTE
-    
-    # Every line in an unordered list block must start with a - character, followed by a space, and have at least one character on each line.
-    pattern = r"^- (?:.+\n- )*.+"
-    matches = re.findall(pattern,text)
-    if len(matches) == 1 and matches[0] == text:
-        return BlockType.UNORDERED_LIST
-    
-    # Every line in an ordered list block must start with a number followed by a . character and a space, and have at least one character on each line. The number must start at 1 and increment by 1 for each line.
-    # Check the format each-line-begins-with-a-digit-a-dot-and-a-space
-    pattern = r"^\d+\. (?:.+\n\d\. )*.+"
-    matches = re.findall(pattern,text)
-    if len(matches) == 1 and matches[0] == text:
-        # Retrieve the digits list and check that its ordered and start at 1
-        pattern = r"^(\d+)\. .+"
-        matches = re.findall(pattern,text,re.MULTILINE)
-        ordered_range = [f'{i+1}' for i in range(len(matches))]
-        if ordered_range == matches :
-            return BlockType.ORDERED_LIST
-    
-    # Every other block are paragraph block
+
+    if kind is not None:
+        return kind
     return BlockType.PARAGRAPH
 
+"""
+Takes an iterable of lines (with or without their line ending), like a file.
+Yields the BlockType and the lines of each block of the document, in order.
+Leading and trailing whitespace of each block is stripped.
+A code fence that is never closed does not hold the rest of the document : its
+lines are split on the blank lines, like any other lines.
+"""
+def iter_blocks(lines):
+    return split_blocks(lines, True)
+
+"""
+Takes an iterable of lines and whether a code fence keeps its block open across blank lines.
+Yields the BlockType and the lines of each block (see iter_blocks).
+"""
+def split_blocks(lines, fences):
+    block = None
+    for line in lines:
+        if line.endswith("\n"):
+            line = line[:-1]
+        if block is None:
+            if line.strip():
+                block = OpenBlock(line.lstrip(), fences)
+        elif block.fenced or line.strip():
+            block.add(line)
+        else:
+            yield block.close()
+            block = None
+    if block is not None and block.fenced:
+        yield from split_blocks(block.lines, False)
+    elif block is not None:
+        yield block.close()
+
+"""
+Takes a block type and the lines of the block (see iter_blocks).
+Returns the title it gives the page if it is an h1 heading, None otherwise.
+The title of a page is the one of its first h1 heading block.
+"""
+def block_title(block_type, lines):
+    if block_type == BlockType.HEADING and heading_level(lines[0]) == 1:
+        return lines[0][2:].strip()
+    return None
+
+"""
+Takes an iterable of lines of markdown content.
+Returns the title of its first h1 heading block (see block_title), or None.
+Stops reading right after that heading.
+"""
+def find_title(lines):
+    for block_type, block_lines in iter_blocks(lines):
+        title = block_title(block_type,block_lines)
+        if title is not None:
+            return title
+    return None
+
+"""
+Takes a raw Markdown string (representing a full document).
+Returns a list of "block" strings.
+"""
+def markdown_to_blocks(markdown):
+    return ["\n".join(lines) for _, lines in iter_blocks(markdown.split("\n"))]
+
+"""
+Takes a single block of markdown text.
+Returns the correspondant BlockType.
+Assumes all leading and trailing whitespace were already stripped.
+"""
+def block_to_block_type(text):
+    lines = text.split("\n")
+    block = OpenBlock(lines[0])
+    for line in lines[1:]:
+        block.add(line)
+    return block.close()[0]
+
 """
 Takes a string of inline text.
 Returns a list of HTMLNodes that represent the inline markdown.
@@ -185,55 +352,45 @@ def text_to_children(text):
     return children
 
 """
-Takes a markdown block and its block type.
+Takes a block type and the lines of the block.
 Returns the correspondant HTMLNode.
 """
-def block_to_html_node(block_text,block_type):
+def build_block(block_type, lines):
     if block_type == BlockType.HEADING:
-        pattern = r"^(\S+) "
-        matches = re.findall(pattern,block_text)
-        raw_text = block_text.split(matches[0] + ' ')[1]
-        children = text_to_children(raw_text)
-        return ParentNode(tag=f'h{len(matches[0])}',children=children)
+        level = heading_level(lines[0])
+        children = text_to_children(lines[0][level + 1:])
+        return ParentNode(tag=f'h{level}',children=children)
     
     if block_type == BlockType.CODE:
-        pattern = r"^`{3}\n([\s\S]*)`{3}$"
-        matches = re.findall(pattern,block_text)
-        textnode = TextNode(text=matches[0],type=TextType.CODE)
+        # The opening fence line (and its language, if any) and the closing fence are not part of the code
+        text = "\n".join(lines)
+        start = text.find("\n") + 1 if len(lines) > 1 else len(CODE_FENCE)
+        textnode = TextNode(text=text[start:-len(CODE_FENCE)],type=TextType.CODE)
         children = [textnode.text_node_to_html_node()]
         return ParentNode(tag='pre',children=children)
     
     if block_type == BlockType.QUOTE:
-        raw_text = block_text.replace('>','').strip()
-        raw_text = raw_text.replace('\n','')
+        raw_text = "".join(line[1:] for line in lines).strip()
         children = text_to_children(raw_text)
         return ParentNode(tag='blockquote',children=children)
     
     if block_type == BlockType.UNORDERED_LIST:
-        items = block_text.split('- ')
-        children = []
-        for item in items:
-            if len(item) > 0:
-                raw_text = item.strip()
-                nested_children = text_to_children(raw_text)
-                children.append(ParentNode(tag='li',children=nested_children))
+        children = [ParentNode(tag='li',children=text_to_children(line[2:].strip())) for line in lines]
         return ParentNode(tag='ul',children=children)
     
     if block_type == BlockType.ORDERED_LIST:
-        items = block_text.split('\n')
-        children = []
-        for item in items:
-            if len(item) > 0:
-                pattern = r"^\d+\. (.+)"
-                matches = re.findall(pattern,item)
-                raw_text = matches[0].strip()
-                nested_children = text_to_children(raw_text)
-                children.append(ParentNode(tag='li',children=nested_children))
+        children = [ParentNode(tag='li',children=text_to_children(line[line.index(". ") + 2:].strip())) for line in lines]
         return ParentNode(tag='ol',children=children)
     
-    children = text_to_children(block_text.strip())
+    children = text_to_children("\n".join(lines).strip())
     return ParentNode(tag='p',children=children)
 
+"""
+Takes a markdown block and its block type.
+Returns the correspondant HTMLNode.
+"""
+def block_to_html_node(block_text,block_type):
+    return build_block(block_type,block_text.split("\n"))
 
 """
 Takes a raw Markdown string, representing a full document.
@@ -241,16 +398,231 @@ Returns a single HTMLNode that contains all the child HTMLNodes
 representing the nested elements of the document.
 """
 def markdown_to_html_node(markdown):
-    children = []
-    
-    markdown_blocks = markdown_to_blocks(markdown)
-    for md_block in markdown_blocks:
-        block_type = block_to_block_type(md_block)
-        block_htmlnode = block_to_html_node(md_block,block_type)
-        children.append(block_htmlnode)
-    
-    parent_htmlnode = ParentNode(tag="div",children=children)
-    return parent_htmlnode
+    children = [build_block(block_type,lines) for block_type, lines in iter_blocks(markdown.split("\n"))]
+    return ParentNode(tag=DOCUMENT_TAG,children=children)
+
+DOCUMENT_TAG = "div"
+
+"""
+Takes an iterable of lines, like a file opened in text mode.
+Yields the HTMLNode of each block as soon as the block ends, so only
+one block of the document is held in memory at a time.
+"""
+def iter_html_nodes(lines):
+    for block_type, block_lines in iter_blocks(lines):
+        yield build_block(block_type,block_lines)
+
+"""
+Takes an HTMLNode.
+Returns its plain text : the values of its leaves, without any tag.
+"""
+def node_text(node):
+    if node.children is None:
+        return node.value or ""
+    return "".join(node_text(child) for child in node.children)
+
+SLUG_PATTERN = re.compile(r"[^\w\- ]")
+
+"""
+Takes the plain text of a heading.
+Returns its anchor id : lower case words joined by hyphens, punctuation removed.
+"""
+def slugify(text):
+    slug = SLUG_PATTERN.sub("", text.lower()).strip().replace(" ", "-")
+    return slug if len(slug) > 0 else "section"
+
+"""
+A heading of a document : its level (1 to 6), its plain text and its anchor id.
+"""
+class Heading:
+    def __init__(self, level : int, text : str, id : str):
+        self.level = level
+        self.text = text
+        self.id = id
+
+    def __eq__(self, value):
+        return isinstance(value, Heading) and (self.level, self.text, self.id) == (value.level, value.text, value.id)
+
+    def __repr__(self):
+        return f"Heading({self.level}, {self.text}, {self.id})"
+
+"""
+A document parsed block by block from an iterable of lines, like a file.
+The title (the first h1 heading) is needed before the content of a page, so
+read_title parses the blocks up to it and keeps their nodes ; the following
+blocks are only parsed while the html is being written (see iter_html).
+While the blocks are parsed, the document also collects its headings (with an
+anchor id, unique in the document) and counts the words of its text, code
+blocks excluded. Both are complete once every block was parsed (see read_all).
+With anchors, each heading node gets its anchor id as id attribute.
+With a memo (see blockmemo), the blocks other than headings already rendered for the
+basepath are not parsed again : their node is their memoized html, as a raw LeafNode.
+The html of the document must then be written for that same basepath.
+"""
+class DocumentStream:
+    def __init__(self, lines, anchors : bool = False, memo = None, basepath : str = None, minifier = None):
+        self.blocks = iter_blocks(lines)
+        self.anchors = anchors
+        self.memo = memo
+        self.basepath = basepath
+        self.minifier = minifier
+        # Nodes read ahead of the iteration (see read_title and read_all)
+        self.pending = collections.deque()
+        self.title = None
+        self.title_heading = None
+        self.headings = []
+        self.word_count = 0
+        self.ids = set()
+
+    """
+    Takes a block type and the lines of the block.
+    Returns its HTMLNode, after collecting what it adds to the document.
+    """
+    def build(self, block_type, lines):
+        if self.memo is not None and block_type != BlockType.HEADING:
+            return self.build_memoized(block_type,lines)
+        node = build_block(block_type,lines)
+        if block_type == BlockType.CODE:
+            return node
+        text = node_text(node)
+        self.word_count += len(text.split())
+        if block_type == BlockType.HEADING:
+            level = int(node.tag[1])
+            heading = Heading(level,text.strip(),self.anchor(text))
+            self.headings.append(heading)
+            if self.title is None and block_title(block_type,lines) is not None:
+                self.title = block_title(block_type,lines)
+                self.title_heading = heading
+            if self.anchors:
+                node.props = {"id": heading.id}
+        return node
+
+    """
+    Takes a block type (not a heading) and the lines of the block.
+    Returns a raw LeafNode of its html, from the memo or rendered and memoized.
+    With a Minifier, the memoized html is minified, and remembers the bytes it saved.
+    """
+    def build_memoized(self, block_type, lines):
+        key = self.memo.key(lines,self.basepath,self.minifier is not None)
+        entry = self.memo.get(key)
+        if entry is None:
+            node = build_block(block_type,lines)
+            words = 0 if block_type == BlockType.CODE else len(node_text(node).split())
+            minifier = Minifier() if self.minifier is not None else None
+            html = "".join(node.iter_html(self.basepath,minifier))
+            entry = self.memo.put(key,html,words,minifier.saved if minifier is not None else 0)
+        if self.minifier is not None:
+            self.minifier.saved += entry[2]
+        self.word_count += entry[1]
+        return LeafNode(None,entry[0])
+
+    """
+    Takes the plain text of a heading.
+    Returns an anchor id for it, with a -1, -2... suffix if it was already used.
+    """
+    def anchor(self, text):
+        slug = slugify(text)
+        id = slug
+        count = 0
+        while id in self.ids:
+            count += 1
+            id = f"{slug}-{count}"
+        self.ids.add(id)
+        return id
+
+    """
+    Returns the text of the first h1 heading of the document.
+    Raise an exception if there is no h1 heading.
+    """
+    def read_title(self):
+        if self.title is not None:
+            return self.title
+        for block_type, lines in self.blocks:
+            self.pending.append(self.build(block_type,lines))
+            if self.title is not None:
+                return self.title
+        raise Exception("No h1 heading found")
+
+    """
+    Parses every remaining block and keeps their nodes, so that the headings and
+    the word count are complete before the html is written.
+    Returns the document.
+    """
+    def read_all(self):
+        for block_type, lines in self.blocks:
+            self.pending.append(self.build(block_type,lines))
+        return self
+
+    """
+    Yields the HTMLNode of each block, the ones already read first.
+    """
+    def __iter__(self):
+        while len(self.pending) > 0:
+            yield self.pending.popleft()
+        for block_type, lines in self.blocks:
+            yield self.build(block_type,lines)
+
+    """
+    Takes a basepath.
+    Yields the html of the whole document (wrapped like markdown_to_html_node), chunk by chunk,
+    minified with the Minifier of the document if it has one.
+    """
+    def iter_html(self, basepath=None):
+        return self.iter_nodes_html(self,basepath,self.minifier)
+
+    """
+    Takes a basepath and a Minifier (or None).
+    Yields the html of the blocks already read (see read_all) without consuming them,
+    so a document parsed once can be rendered for several basepaths.
+    """
+    def iter_read_html(self, basepath=None, minifier=None):
+        return self.iter_nodes_html(list(self.pending),basepath,minifier)
+
+    def iter_nodes_html(self, nodes, basepath, minifier):
+        yield f"<{DOCUMENT_TAG}>"
+        for node in nodes:
+            if node.tag is None:
+                # A block from the memo, already rendered (and minified)
+                yield node.value
+            else:
+                yield from node.iter_html(basepath,minifier)
+        yield f"</{DOCUMENT_TAG}>"
+
+    """
+    Returns the table of contents of the headings read so far, the title excluded :
+    a list of links to their anchors, nested by level. Returns None without headings.
+    """
+    def table_of_contents(self):
+        items = []
+        stack = []
+        for heading in self.headings:
+            if heading is self.title_heading:
+                continue
+            while len(stack) > 0 and stack[-1][0] >= heading.level:
+                stack.pop()
+            item = ParentNode(tag='li',children=[LeafNode('a',heading.text,{"href": f"#{heading.id}"})])
+            if len(stack) == 0:
+                items.append(item)
+            else:
+                parent = stack[-1][1]
+                if len(parent.children) == 1:
+                    parent.children.append(ParentNode(tag='ul',children=[]))
+                parent.children[-1].children.append(item)
+            stack.append((heading.level, item))
+        if len(items) == 0:
+            return None
+        return ParentNode(tag='ul',children=items)
+
+"""
+Takes a raw Markdown string, representing a full document, and whether
+the headings get anchor ids.
+Returns the DocumentStream of the document, with every block already parsed :
+its title (None without h1 heading), headings, word count and html in a single parse.
+"""
+def markdown_to_document(markdown, anchors=False):
+    return DocumentStream(markdown.split("\n"),anchors).read_all()
+
+TITLE_PATTERN = re.compile(r"# (.+)")
 
 """
 Takes a raw Markdown string, representing a full document.
@@ -258,8 +630,7 @@ Returns the content of the h1 header of the file.
 Raise an exception if there is no h1 header.
 """
 def extract_title(markdown):
-    pattern = r"# (.+)"
-    matches = re.findall(pattern,markdown)
-    if len(matches) == 0:
+    match = TITLE_PATTERN.search(markdown)
+    if match is None:
         raise Exception
-    return matches[0].strip()
\ No newline at end of file
+    return match.group(1).strip()
@@ -0,0 +1,124 @@
+import ctypes
+import errno
+import os
+import shutil
+
+import assets
+
+"""
+A staged build writes into a staging directory next to the destination
+(docs.staging for docs), and only replaces the destination once the build
+succeeded. The replaced build is kept (docs.previous) for an instant rollback.
+Readers of the destination never see a half-built site, and a failed build
+leaves the previous one in place.
+
+To avoid copying the whole site at each build, the staging directory starts as
+a clone of the destination made of hardlinks : the unchanged files are shared
+between the two builds. Everything that writes into a build must therefore
+replace files (write a new file and rename it, or unlink then place) rather than
+write into them, otherwise the live build would be modified through the link.
+"""
+
+def staging_path(destination : str) -> str:
+    return os.path.normpath(destination) + ".staging"
+
+def previous_path(destination : str) -> str:
+    return os.path.normpath(destination) + ".previous"
+
+"""
+Takes a source directory and a destination directory.
+Recreates the tree of the source in the destination, with hardlinks
+to the source files where the filesystem allows it, copies otherwise.
+"""
+def clone_tree(source : str, destination : str):
+    dirs, files = assets.list_tree(source)
+    os.makedirs(destination,exist_ok=True)
+    for dir in dirs:
+        os.makedirs(os.path.join(destination,dir),exist_ok=True)
+    for file in files:
+        assets.place_file(os.path.join(source,file),os.path.join(destination,file),"hardlink")
+
+"""
+Takes a destination directory and whether its files can be reused.
+Creates a fresh staging directory, cloned from the destination when reuse is set.
+Returns the path of the staging directory.
+"""
+def prepare(destination : str, reuse : bool = True) -> str:
+    staging = staging_path(destination)
+    if os.path.exists(staging):
+        shutil.rmtree(staging)
+    if reuse and os.path.isdir(destination):
+        clone_tree(destination,staging)
+    else:
+        os.makedirs(staging)
+    return staging
+
+"""
+Takes a destination directory.
+Deletes its staging directory, after a failed build.
+"""
+def abort(destination : str):
+    staging = staging_path(destination)
+    if os.path.exists(staging):
+        shutil.rmtree(staging)
+
+# From linux/fcntl.h and linux/fs.h
+AT_FDCWD = -100
+RENAME_EXCHANGE = 2
+
+"""
+Takes two paths.
+Exchanges them atomically with renameat2(RENAME_EXCHANGE) : there is no instant
+where one of them does not exist.
+Returns False if the platform or the filesystem does not support it.
+"""
+def exchange(first : str, second : str) -> bool:
+    try:
+        renameat2 = ctypes.CDLL(None,use_errno=True).renameat2
+    except (OSError, AttributeError):
+        return False
+    result = renameat2(AT_FDCWD,os.fsencode(first),AT_FDCWD,os.fsencode(second),RENAME_EXCHANGE)
+    if result == 0:
+        return True
+    error = ctypes.get_errno()
+    if error in (errno.ENOSYS, errno.EINVAL, errno.ENOTSUP, errno.EOPNOTSUPP):
+        return False
+    raise OSError(error,os.strerror(error),first)
+
+"""
+Takes a destination directory whose staging directory holds a successful build.
+Replaces the destination by the staging directory, and keeps the replaced
+build as the previous one.
+Without renameat2, the swap is two renames and the destination is missing
+between them.
+"""
+def swap(destination : str):
+    staging = staging_path(destination)
+    previous = previous_path(destination)
+    if os.path.exists(previous):
+        shutil.rmtree(previous)
+    if os.path.exists(destination):
+        if exchange(staging,destination):
+            os.rename(staging,previous)
+            return
+        os.rename(destination,previous)
+    os.rename(staging,destination)
+
+"""
+Takes a destination directory.
+Puts the previous build back in place. The replaced build becomes the previous
+one, so rolling back again rolls forward.
+"""
+def rollback(destination : str):
+    previous = previous_path(destination)
+    if not os.path.isdir(previous):
+        raise Exception(f"No previous build of {destination} to roll back to")
+    if not os.path.exists(destination):
+        os.rename(previous,destination)
+        return
+    if exchange(previous,destination):
+        return
+    tmp = os.path.normpath(destination) + ".rollback"
+    os.rename(destination,tmp)
+    os.rename(previous,destination)
+    os.rename(tmp,previous)
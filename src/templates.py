@@ -0,0 +1,293 @@
+import os
+import re
+
+from htmlnode import rewrite_url
+import minify
+
+"""
+A template is an html file with slots, like {{ Title }} or {{ Content }},
+filled for each page.
+It can also include other files and extend a layout :
+- {% include "partials/nav.html" %} is replaced by the content of that file.
+- {% extends "base.html" %} (first tag of the file) reuses the whole layout, where
+  each {% block name %}...{% endblock %} of the layout can be redefined by the template.
+Paths are relative to the directory of the template that uses them.
+
+Templates are compiled once into a list of segments, literal strings and slots,
+so rendering a page is a single join. Compiled templates are cached by path and
+stay valid until one of the files they were built from is modified.
+The urls of the href and src attributes written in the template are rewritten
+for the basepath of the site once, when the template is bound to it (see for_basepath),
+and its literal segments are minified once as well (see minified).
+"""
+
+class TemplateError(ValueError):
+    pass
+
+"""
+A named hole of a compiled template, filled at render time.
+"""
+class Slot:
+    def __init__(self, name : str):
+        self.name = name
+
+    def __eq__(self, value):
+        return isinstance(value, Slot) and self.name == value.name
+
+    def __repr__(self):
+        return f"Slot({self.name})"
+
+"""
+A block of a layout : a named list of items that an extending template can replace.
+"""
+class Block:
+    def __init__(self, name : str, items : list):
+        self.name = name
+        self.items = items
+
+URL_ATTRIBUTE_PATTERN = re.compile(r'\b(href|src)="([^"]*)"')
+
+TOKEN_PATTERN = re.compile(r'\{\{\s*(\w+)\s*\}\}|\{%\s*(\w+)(?:\s+(?:"([^"]*)"|(\w+)))?\s*%\}')
+
+"""
+A compiled template.
+The segments are literal strings and slots, adjacent literals being merged.
+The dependencies map the path of each file the template was built from to its mtime.
+"""
+class Template:
+    def __init__(self, path : str, segments : list, dependencies : dict):
+        self.path = path
+        self.segments = segments
+        self.dependencies = dependencies
+        self.slots = [(index, segment.name) for index, segment in enumerate(segments) if isinstance(segment, Slot)]
+        self.bound = {}
+        self.minified_template = None
+        # Bytes the minification of the literal segments saves on each page (see minified)
+        self.saved = 0
+
+    """
+    Takes the basepath of the site.
+    Returns the template with the url attributes of its literal segments rewritten
+    for that basepath, compiled once per basepath.
+    """
+    def for_basepath(self, basepath : str):
+        if basepath is None or basepath == "/":
+            return self
+        if basepath not in self.bound:
+            segments = [rewrite_attributes(segment, basepath) if isinstance(segment, str) else segment for segment in self.segments]
+            self.bound[basepath] = Template(self.path, segments, self.dependencies)
+        return self.bound[basepath]
+
+    """
+    Returns the template with its literal segments minified (see minify.minify_html),
+    compiled once. The literals are minified together, so a preserved element
+    around a slot, like <pre>{{ Content }}</pre>, is left as it is.
+    """
+    def minified(self):
+        if self.minified_template is None:
+            text = "".join(segment if isinstance(segment, str) else minify.SLOT_MARK for segment in self.segments)
+            literals = minify.minify_html(text).strip().split(minify.SLOT_MARK)
+            segments = [literals[0]]
+            for (_, name), literal in zip(self.slots, literals[1:]):
+                segments.extend([Slot(name), literal])
+            template = Template(self.path, [segment for segment in segments if segment != ""], self.dependencies)
+            template.saved = sum(len(segment) for segment in self.segments if isinstance(segment, str)) - sum(len(segment) for segment in template.segments if isinstance(segment, str))
+            self.minified_template = template
+        return self.minified_template
+
+    """
+    Takes a dictionary of slot values, each one a string or an iterable of strings.
+    Yields the filled template chunk by chunk, so a large slot value (like the
+    chunks of HTMLNode.iter_html) is streamed instead of joined in memory.
+    Slots without value are left empty.
+    """
+    def iter_render(self, values : dict):
+        for segment in self.segments:
+            if isinstance(segment, str):
+                yield segment
+                continue
+            value = values.get(segment.name, "")
+            if isinstance(value, str):
+                yield value
+            else:
+                yield from value
+
+    def has_slot(self, name : str) -> bool:
+        return any(slot_name == name for _, slot_name in self.slots)
+
+    """
+    Returns True if none of the files the template was built from changed since.
+    """
+    def is_fresh(self) -> bool:
+        for path, mtime_ns in self.dependencies.items():
+            try:
+                if os.stat(path).st_mtime_ns != mtime_ns:
+                    return False
+            except FileNotFoundError:
+                return False
+        return True
+
+    def __repr__(self):
+        return f"Template({self.path}, {self.segments})"
+
+"""
+Takes some html and a basepath.
+Returns the html with the href and src urls rewritten for the basepath.
+"""
+def rewrite_attributes(html : str, basepath : str) -> str:
+    return URL_ATTRIBUTE_PATTERN.sub(lambda match: f'{match.group(1)}="{rewrite_url(match.group(2), basepath)}"', html)
+
+"""
+Takes the text of a template and its path (for the error messages).
+Returns the name of the layout it extends (or None) and its items :
+strings, slots, blocks and ("include", name) tuples.
+"""
+def parse(text : str, path : str = "<string>"):
+    root = []
+    stack = [(None, root)]
+    extends = None
+    position = 0
+    for match in TOKEN_PATTERN.finditer(text):
+        items = stack[-1][1]
+        if match.start() > position:
+            items.append(text[position:match.start()])
+        position = match.end()
+
+        slot, tag, quoted, word = match.groups()
+        argument = quoted if quoted is not None else word
+        if slot is not None:
+            items.append(Slot(slot))
+        elif tag == "include" and quoted is not None:
+            items.append(("include", quoted))
+        elif tag == "extends" and quoted is not None:
+            if extends is not None or len(stack) > 1 or any(not isinstance(item, str) or item.strip() for item in root):
+                raise TemplateError(f"{path} : extends must be the first tag of the template")
+            root.clear()
+            extends = quoted
+        elif tag == "block" and argument is not None:
+            block = Block(argument, [])
+            items.append(block)
+            stack.append((argument, block.items))
+        elif tag == "endblock" and (argument is None or argument == stack[-1][0]):
+            if len(stack) == 1:
+                raise TemplateError(f"{path} : endblock without block")
+            stack.pop()
+        else:
+            raise TemplateError(f"{path} : invalid tag {match.group(0)}")
+
+    if len(stack) > 1:
+        raise TemplateError(f"{path} : block {stack[-1][0]} is never closed")
+    if position < len(text):
+        stack[-1][1].append(text[position:])
+    return extends, root
+
+"""
+Takes a list of items.
+Returns a dictionary of every block found in it, nested ones included.
+"""
+def collect_blocks(items : list) -> dict:
+    blocks = {}
+    for item in items:
+        if isinstance(item, Block):
+            blocks[item.name] = item
+            blocks.update(collect_blocks(item.items))
+    return blocks
+
+"""
+Takes the items of a layout and the blocks redefined by an extending template.
+Returns the items of the layout with those blocks replaced.
+"""
+def override_blocks(items : list, blocks : dict) -> list:
+    result = []
+    for item in items:
+        if isinstance(item, Block):
+            if item.name in blocks:
+                result.append(blocks[item.name])
+            else:
+                result.append(Block(item.name, override_blocks(item.items, blocks)))
+        else:
+            result.append(item)
+    return result
+
+"""
+Takes the path of a template, the dependencies dictionary to fill in
+and the paths currently being loaded (to detect cycles).
+Returns the items of the template with its includes and layout resolved.
+"""
+def load_items(path : str, dependencies : dict, loading : tuple = ()) -> list:
+    path = os.path.abspath(path)
+    if path in loading:
+        raise TemplateError(f"{path} : includes or extends itself")
+    loading = loading + (path,)
+
+    dependencies[path] = os.stat(path).st_mtime_ns
+    with open(path, "r") as template_file:
+        extends, items = parse(template_file.read(), path)
+
+    directory = os.path.dirname(path)
+    items = resolve_includes(items, directory, dependencies, loading)
+    if extends is None:
+        return items
+    layout = load_items(os.path.join(directory, extends), dependencies, loading)
+    return override_blocks(layout, collect_blocks(items))
+
+"""
+Takes a list of items, the directory of their template, the dependencies
+dictionary to fill in and the paths currently being loaded.
+Returns the items with every include replaced by the items of the included file.
+"""
+def resolve_includes(items : list, directory : str, dependencies : dict, loading : tuple) -> list:
+    result = []
+    for item in items:
+        if isinstance(item, tuple):
+            result.extend(load_items(os.path.join(directory, item[1]), dependencies, loading))
+        elif isinstance(item, Block):
+            result.append(Block(item.name, resolve_includes(item.items, directory, dependencies, loading)))
+        else:
+            result.append(item)
+    return result
+
+"""
+Takes a list of resolved items.
+Returns the flat list of segments : blocks are unwrapped and adjacent strings merged.
+"""
+def flatten(items : list, segments : list = None) -> list:
+    if segments is None:
+        segments = []
+    for item in items:
+        if isinstance(item, Block):
+            flatten(item.items, segments)
+        elif isinstance(item, str):
+            if len(segments) > 0 and isinstance(segments[-1], str):
+                segments[-1] += item
+            else:
+                segments.append(item)
+        else:
+            segments.append(item)
+    return segments
+
+"""
+Takes the path of a template file.
+Returns the compiled Template.
+"""
+def compile_template(path : str) -> Template:
+    dependencies = {}
+    items = load_items(path, dependencies)
+    return Template(os.path.abspath(path), flatten(items), dependencies)
+
+cache = {}
+
+"""
+Takes the path of a template file.
+Returns its compiled Template, from the cache if none of its files changed.
+"""
+def load_template(path : str) -> Template:
+    key = os.path.abspath(path)
+    template = cache.get(key)
+    if template is None or not template.is_fresh():
+        template = compile_template(path)
+        cache[key] = template
+    return template
+
+def clear_cache():
+    cache.clear()
@@ -0,0 +1,148 @@
+import errno
+import os
+import unittest
+
+import assets
+import fixtures
+
+class TestAssets(fixtures.TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.source = os.path.join(self.tmp.name,"static")
+        self.destination = os.path.join(self.tmp.name,"public")
+        self.write("index.css","body {}",self.source)
+        self.write("images/a.png","aaaa",self.source)
+        self.write("images/b.png","bbbb",self.source)
+
+    def test_list_files(self):
+        self.assertEqual(assets.list_files(self.source),["images/a.png","images/b.png","index.css"])
+
+    def test_first_sync_copies_everything(self):
+        manifest = {}
+        report = assets.sync_tree(self.source,self.destination,manifest)
+        self.assertEqual(report.copied,["images/a.png","images/b.png","index.css"])
+        self.assertEqual(report.skipped,[])
+        self.assertEqual(report.removed,[])
+        self.assertEqual(self.read("images/a.png",self.destination),"aaaa")
+        self.assertEqual(sorted(manifest["files"]),["images/a.png","images/b.png","index.css"])
+
+    def test_second_sync_skips_unchanged(self):
+        manifest = {}
+        assets.sync_tree(self.source,self.destination,manifest)
+        self.write("images/a.png","changed",self.source)
+        report = assets.sync_tree(self.source,self.destination,manifest)
+        self.assertEqual(report.copied,["images/a.png"])
+        self.assertEqual(report.skipped,["images/b.png","index.css"])
+        self.assertEqual(self.read("images/a.png",self.destination),"changed")
+
+    def test_sync_minifies_stylesheets(self):
+        self.write("index.css","body {\n  color: red;\n}\n",self.source)
+        manifest = {}
+        report = assets.sync_tree(self.source,self.destination,manifest,minify=True)
+        self.assertEqual(self.read("index.css",self.destination),"body{color:red}")
+        self.assertEqual(report.minified,[(os.path.join(self.destination,"index.css"),8)])
+        self.assertEqual(report.methods["minify"],1)
+
+        report = assets.sync_tree(self.source,self.destination,manifest,minify=True)
+        self.assertEqual(report.copied,[])
+        report = assets.sync_tree(self.source,self.destination,manifest)
+        self.assertEqual(report.copied,["index.css"])
+        self.assertEqual(self.read("index.css",self.destination),"body {\n  color: red;\n}\n")
+
+    def test_sync_removes_vanished_files_only(self):
+        manifest = {}
+        assets.sync_tree(self.source,self.destination,manifest)
+        self.write("index.html","<p>page</p>",self.destination)
+        os.remove(os.path.join(self.source,"images/a.png"))
+        os.remove(os.path.join(self.source,"images/b.png"))
+        report = assets.sync_tree(self.source,self.destination,manifest)
+        self.assertEqual(report.removed,["images/a.png","images/b.png"])
+        self.assertFalse(os.path.exists(os.path.join(self.destination,"images")))
+        self.assertTrue(os.path.exists(os.path.join(self.destination,"index.html")))
+        self.assertEqual(sorted(manifest["files"]),["index.css"])
+
+    def test_sync_recopies_deleted_destination(self):
+        manifest = {}
+        assets.sync_tree(self.source,self.destination,manifest)
+        os.remove(os.path.join(self.destination,"index.css"))
+        report = assets.sync_tree(self.source,self.destination,manifest)
+        self.assertEqual(report.copied,["index.css"])
+
+    def test_sync_with_hash_skips_touched_files(self):
+        manifest = {}
+        assets.sync_tree(self.source,self.destination,manifest,use_hash=True)
+        path = os.path.join(self.source,"index.css")
+        stat = os.stat(path)
+        os.utime(path,ns=(stat.st_atime_ns,stat.st_mtime_ns + 10**9))
+        report = assets.sync_tree(self.source,self.destination,manifest,use_hash=True)
+        self.assertEqual(report.copied,[])
+        self.assertEqual(manifest["files"]["index.css"]["mtime_ns"],stat.st_mtime_ns + 10**9)
+
+        os.utime(path,ns=(stat.st_atime_ns,stat.st_mtime_ns + 2 * 10**9))
+        report = assets.sync_tree(self.source,self.destination,manifest)
+        self.assertEqual(report.copied,["index.css"])
+
+    def test_place_file_strategies(self):
+        source_path = os.path.join(self.source,"images/a.png")
+        os.makedirs(self.destination)
+        for strategy in assets.STRATEGIES:
+            dest_path = os.path.join(self.destination,strategy+".png")
+            method = assets.place_file(source_path,dest_path,strategy)
+            self.assertIn(method,assets.FALLBACKS[strategy])
+            self.assertEqual(self.read(strategy+".png",self.destination),"aaaa")
+
+    def test_place_file_hardlink_is_not_written_through(self):
+        source_path = os.path.join(self.source,"images/a.png")
+        os.makedirs(self.destination)
+        dest_path = os.path.join(self.destination,"a.png")
+        self.assertEqual(assets.place_file(source_path,dest_path,"hardlink"),"hardlink")
+        self.assertTrue(os.path.samefile(source_path,dest_path))
+        assets.place_file(os.path.join(self.source,"images/b.png"),dest_path,"copy")
+        self.assertEqual(self.read("images/a.png",self.source),"aaaa")
+        self.assertEqual(self.read("a.png",self.destination),"bbbb")
+
+    def test_place_file_unknown_strategy(self):
+        self.assertRaises(ValueError,assets.place_file,"a","b","teleport")
+
+    def test_sync_reports_methods(self):
+        report = assets.sync_tree(self.source,self.destination,{},strategy="copy")
+        self.assertEqual(report.methods,{"copy": 3})
+
+    def test_place_files_keeps_pair_order(self):
+        pairs = [(os.path.join(self.source,rel_path),os.path.join(self.destination,"deep","dir",rel_path)) for rel_path in assets.list_files(self.source)]
+        results = assets.place_files(pairs,"copy",jobs=4,after=lambda pair, method: pair[1])
+        self.assertEqual(results,[dest_path for _, dest_path in pairs])
+        self.assertEqual(self.read("deep/dir/images/b.png",self.destination),"bbbb")
+
+    def test_place_files_stops_trying_an_unsupported_reflink(self):
+        attempts = []
+        def failing_reflink(source_path, dest_path):
+            attempts.append(dest_path)
+            raise OSError(errno.EOPNOTSUPP,"no reflinks here")
+        pairs = [(os.path.join(self.source,rel_path),os.path.join(self.destination,rel_path)) for rel_path in assets.list_files(self.source)]
+        place_reflink = assets.PLACE_METHODS["reflink"]
+        assets.PLACE_METHODS["reflink"] = failing_reflink
+        try:
+            results = assets.place_files(pairs,"reflink",jobs=1)
+        finally:
+            assets.PLACE_METHODS["reflink"] = place_reflink
+        self.assertEqual(len(attempts),1)
+        self.assertEqual(results,["copy_file_range"] * 3)
+        self.assertEqual(self.read("images/b.png",self.destination),"bbbb")
+
+    def test_list_tree(self):
+        os.makedirs(os.path.join(self.source,"empty"))
+        dirs, files = assets.list_tree(self.source)
+        self.assertEqual(dirs,["empty","images"])
+        self.assertEqual(files,["images/a.png","images/b.png","index.css"])
+
+    def test_parallel_sync_matches_serial(self):
+        serial = assets.sync_tree(self.source,os.path.join(self.tmp.name,"serial"),{},use_hash=True,jobs=1)
+        manifest = {}
+        parallel = assets.sync_tree(self.source,self.destination,manifest,use_hash=True,jobs=8)
+        self.assertEqual(parallel.copied,serial.copied)
+        self.assertEqual(parallel.methods,serial.methods)
+        self.assertTrue(all("hash" in entry for entry in manifest["files"].values()))
+
+if __name__ == "__main__":
+    unittest.main()
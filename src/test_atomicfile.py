@@ -0,0 +1,47 @@
+import os
+import tempfile
+import unittest
+
+import atomicfile
+
+class TestAtomicFile(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name,"dir","file.html")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self):
+        with open(self.path,"r") as file:
+            return file.read()
+
+    def test_write_string_bytes_and_chunks(self):
+        atomicfile.write_file(self.path,"text")
+        self.assertEqual(self.read(),"text")
+        atomicfile.write_file(self.path,b"bytes","wb")
+        self.assertEqual(self.read(),"bytes")
+        atomicfile.write_file(self.path,iter(["a","b"]))
+        self.assertEqual(self.read(),"ab")
+        self.assertEqual(os.listdir(os.path.dirname(self.path)),["file.html"])
+
+    def test_replaces_hardlinked_file(self):
+        previous = os.path.join(self.tmp.name,"previous.html")
+        with open(previous,"w") as file:
+            file.write("previous")
+        os.makedirs(os.path.dirname(self.path))
+        os.link(previous,self.path)
+        atomicfile.write_file(self.path,"new")
+        self.assertEqual(self.read(),"new")
+        with open(previous,"r") as file:
+            self.assertEqual(file.read(),"previous")
+
+    def test_failed_write_leaves_no_tmp_file(self):
+        def chunks():
+            yield "start"
+            raise ValueError("rendering failed")
+        self.assertRaises(ValueError,atomicfile.write_file,self.path,chunks())
+        self.assertEqual(os.listdir(os.path.dirname(self.path)),[])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+
+import blockmemo
+import splitmarkdown as sp
+
+class TestBlockMemo(unittest.TestCase):
+    def render(self, markdown, memo, basepath = "/site/"):
+        document = sp.DocumentStream(markdown.split("\n"),memo=memo,basepath=basepath)
+        return "".join(document.iter_html(basepath)), document
+
+    def test_only_changed_blocks_are_rendered(self):
+        memo = blockmemo.BlockMemo()
+        markdown = "# Title\n\nFirst [link](/a)\n\n- one\n- two\n\n```\ncode words\n```"
+        html, document = self.render(markdown,memo)
+        self.assertEqual(html,"".join(sp.DocumentStream(markdown.split("\n")).iter_html("/site/")))
+        self.assertEqual((memo.hits,memo.misses),(0,3))
+        self.assertEqual(document.word_count,4)
+
+        memo.trim()
+        html, document = self.render(markdown.replace("First","Changed"),memo)
+        self.assertIn('<p>Changed <a href="/site/a">link</a></p>',html)
+        self.assertEqual((memo.hits,memo.misses),(2,1))
+        self.assertEqual(document.word_count,4)
+        self.assertEqual(document.title,"Title")
+
+    def test_basepath_is_part_of_the_key(self):
+        memo = blockmemo.BlockMemo()
+        self.render("[link](/a)",memo,"/one/")
+        html, _ = self.render("[link](/a)",memo,"/two/")
+        self.assertEqual(html,'<div><p><a href="/two/a">link</a></p></div>')
+        self.assertEqual(memo.hits,0)
+
+    def test_trim_forgets_unused_entries(self):
+        memo = blockmemo.BlockMemo(max_entries=1)
+        self.render("a\n\nb",memo)
+        memo.trim()
+        self.assertEqual(len(memo.entries),2)
+        self.render("a",memo)
+        memo.trim()
+        self.assertEqual(len(memo.entries),1)
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp,"blocks.json.z")
+            memo = blockmemo.BlockMemo()
+            self.render("some text",memo)
+            blockmemo.save_memo(path,memo)
+            loaded = blockmemo.load_memo(path)
+            self.assertEqual(loaded.entries,memo.entries)
+            with open(path,"wb") as memo_file:
+                memo_file.write(b"garbage")
+            self.assertEqual(blockmemo.load_memo(path).entries,{})
+
+if __name__ == "__main__":
+    unittest.main()
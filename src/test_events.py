@@ -0,0 +1,75 @@
+import io
+import json
+import unittest
+
+import events
+
+class ListSink:
+    def __init__(self, level):
+        self.level = level
+        self.events = []
+
+    def handle(self, event):
+        self.events.append(event)
+
+class TestEvents(unittest.TestCase):
+    def tearDown(self):
+        events.set_sinks(events.SINKS["summary"]())
+
+    def test_levels(self):
+        summary = ListSink(events.SUMMARY)
+        events.set_sinks([summary])
+        self.assertFalse(events.enabled(events.DETAIL))
+        started = events.start("pages",2)
+        events.file("finish","pages","a.html","Generated a.html")
+        events.finish("pages",started,"2 generated",generated=2)
+        self.assertEqual([event.kind for event in summary.events],["start","finish"])
+        self.assertEqual(summary.events[1].data,{"generated": 2})
+        self.assertGreaterEqual(summary.events[1].seconds,0)
+
+        detail = ListSink(events.DETAIL)
+        events.set_sinks([summary,detail])
+        self.assertTrue(events.enabled(events.DETAIL))
+        events.file("skip","pages","b.html","Skipped b.html")
+        self.assertEqual(len(summary.events),2)
+        self.assertEqual(detail.events[0].subject,"b.html")
+
+    def test_text_sinks(self):
+        out = io.StringIO()
+        events.set_sinks([events.TextSink(events.SUMMARY,out)])
+        events.file("finish","pages","a.html","Generated a.html")
+        events.info("pages","Block memo : 1 hits")
+        events.error("pages","broken.md could not be generated","broken.md")
+        self.assertEqual(out.getvalue(),"Block memo : 1 hits\nError : broken.md could not be generated\n")
+
+        out = io.StringIO()
+        events.set_sinks([events.TextSink(events.ERROR,out)])
+        events.info("pages","Block memo : 1 hits")
+        events.error("watch","Build failed")
+        self.assertEqual(out.getvalue(),"Error : Build failed\n")
+
+    def test_json_lines_sink(self):
+        out = io.StringIO()
+        events.set_sinks([events.JsonLinesSink(out)])
+        events.file("finish","assets","public/a.png","Copied a.png")
+        events.finish("assets",events.start("assets"),"done",copied=1)
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([line["kind"] for line in lines],["finish","start","finish"])
+        self.assertEqual(lines[0]["subject"],"public/a.png")
+        self.assertEqual(lines[0]["level"],"detail")
+        self.assertEqual(lines[2]["copied"],1)
+
+    def test_progress_sink(self):
+        out = io.StringIO()
+        bar = io.StringIO()
+        events.set_sinks([events.ProgressSink(out,bar,width=4)])
+        started = events.start("pages",2)
+        events.file("finish","pages","a.html","Generated a.html")
+        events.file("skip","pages","b.html","Skipped b.html")
+        events.finish("pages",started,"1 generated, 1 skipped")
+        self.assertTrue(bar.getvalue().startswith("\rpages [##..] 1/2"))
+        self.assertIn("\rpages [####] 2/2",bar.getvalue())
+        self.assertTrue(out.getvalue().startswith("1 generated, 1 skipped ("))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import io
+import os
+import tempfile
+import unittest
+
+import frontmatter as fm
+import splitmarkdown as sp
+
+class TestFrontMatter(unittest.TestCase):
+    def test_parse_value(self):
+        self.assertEqual(fm.parse_value(" Tom Bombadil "),"Tom Bombadil")
+        self.assertEqual(fm.parse_value('"a: b"'),"a: b")
+        self.assertEqual(fm.parse_value("[tolkien, 'books', ]"),["tolkien","books"])
+        self.assertEqual(fm.parse_value("[]"),[])
+
+    def test_read_front_matter(self):
+        fp = io.StringIO("---\ntitle: Tom\ndate: 2024-03-01\ntags: [a, b]\n---\n# Heading\n")
+        metadata, lines = fm.read_front_matter(fp)
+        self.assertEqual(metadata,{"title": "Tom", "date": "2024-03-01", "tags": ["a","b"]})
+        self.assertEqual(list(lines),["# Heading\n"])
+
+    def test_without_front_matter(self):
+        metadata, lines = fm.read_front_matter(["# Heading", "", "text"])
+        self.assertEqual(metadata,{})
+        self.assertEqual(list(lines),["# Heading", "", "text"])
+        self.assertEqual(fm.read_front_matter([])[0],{})
+
+    def test_unclosed_front_matter(self):
+        metadata, lines = fm.read_front_matter(["---", "title: Tom", "# Tom"])
+        self.assertEqual((metadata,list(lines)),({},["---", "title: Tom", "# Tom"]))
+
+    def test_read_metadata_stops_early(self):
+        read = []
+        def lines():
+            for line in ["---\n", "date: 2024\n", "---\n", "```\n", "# code\n", "```\n", "\n", "# Title\n", "\n", "never read\n"]:
+                read.append(line)
+                yield line
+        metadata, rest = fm.read_front_matter(lines())
+        self.assertEqual(sp.find_title(rest),"Title")
+        self.assertNotIn("never read\n",read)
+
+    def test_read_metadata(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp,"page.md")
+            with open(path,"w") as file:
+                file.write("---\ntags: tolkien\n---\n\n# Tom\n\nBody")
+            self.assertEqual(fm.read_metadata(path),{"tags": "tolkien", "title": "Tom"})
+
+    def test_title_matches_the_page_title(self):
+        for markdown in ["# x\ntext\n\n# Real", "## Sub\n\n# Real", "```\n# code\n```\n\n# Real"]:
+            lines = markdown.split("\n")
+            self.assertEqual(sp.find_title(lines),"Real")
+            self.assertEqual(sp.markdown_to_document(markdown).title,"Real")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,9 @@
 import unittest
 
-from htmlnode import HTMLNode
+from htmlnode import HTMLNode, rewrite_url
+from leafnode import LeafNode
+from minify import Minifier
+from parentnode import ParentNode
 
 
 class TestHTMLNode(unittest.TestCase):
@@ -20,7 +23,8 @@ class TestHTMLNode(unittest.TestCase):
         
     def test_to_html_without_tag(self):
         node = HTMLNode()
-        self.assertRaises(NotImplementedError,node.to_html)    
+        self.assertRaises(NotImplementedError,node.to_html)
+        self.assertRaises(NotImplementedError,lambda: list(node.iter_html()))
     
     def test_props_to_html(self):
         node = HTMLNode(tag='div')
@@ -32,6 +36,20 @@ class TestHTMLNode(unittest.TestCase):
         node = HTMLNode(tag='input', value=None, children=None, props={'type': 'text', 'placeholder': 'Enter text'})
         self.assertEqual(node.props_to_html(), ' type="text" placeholder="Enter text"')
     
+    def test_props_to_html_with_basepath(self):
+        node = HTMLNode(tag='img', value=None, children=None, props={'src': '/images/a.png', 'alt': '/not/an/url'})
+        self.assertEqual(node.props_to_html('/site/'), ' src="/site/images/a.png" alt="/not/an/url"')
+        self.assertEqual(node.props_to_html(), ' src="/images/a.png" alt="/not/an/url"')
+    
+    def test_rewrite_url(self):
+        self.assertEqual(rewrite_url('/blog/tom', '/site/'), '/site/blog/tom')
+        self.assertEqual(rewrite_url('/', '/site/'), '/site/')
+        self.assertEqual(rewrite_url('https://www.boot.dev', '/site/'), 'https://www.boot.dev')
+        self.assertEqual(rewrite_url('//cdn.example.com/a.js', '/site/'), '//cdn.example.com/a.js')
+        self.assertEqual(rewrite_url('#anchor', '/site/'), '#anchor')
+        self.assertEqual(rewrite_url('/blog', '/'), '/blog')
+        self.assertEqual(rewrite_url('/blog', None), '/blog')
+    
     def test_repr(self):
         node = HTMLNode(tag='div', value='Content', children=None, props={'class': 'container'})
         self.assertEqual(repr(node), 'HTMLNode(tag=div, value=Content, children=None, props= class="container")')
@@ -39,5 +57,27 @@ class TestHTMLNode(unittest.TestCase):
         node = HTMLNode(tag='span', value=None, children=[HTMLNode(tag='strong', value='Bold Text')], props={'style': 'color: red;'})
         self.assertEqual(repr(node), 'HTMLNode(tag=span, value=None, children=[HTMLNode(tag=strong, value=Bold Text, children=None, props=)], props= style="color: red;")')
     
+    def test_compact_nodes(self):
+        level = 2
+        node = HTMLNode(tag=f'h{level}', value='Title', props={})
+        self.assertIs(node.tag, 'h2')
+        self.assertIsNone(node.props)
+        self.assertFalse(hasattr(node, '__dict__'))
+
+    def test_iter_html_minified(self):
+        node = ParentNode('div', [
+            ParentNode('p', [LeafNode(None, 'some\n  text '), LeafNode('b', 'bold')]),
+            ParentNode('pre', [LeafNode('code', 'a\n  b')]),
+        ])
+        minifier = Minifier()
+        self.assertEqual(''.join(node.iter_html(None, minifier)), '<div><p>some text <b>bold</b></p><pre><code>a\n  b</code></pre></div>')
+        self.assertEqual(minifier.saved, 2)
+
+    def test_iter_html_minified_keeps_attributes(self):
+        node = ParentNode('p', [LeafNode('img', '', {'src': '/a  b.png', 'alt': 'an\n  image'}), LeafNode('a', 'a  link', {'title': 'a  title'})])
+        minifier = Minifier()
+        self.assertEqual(''.join(node.iter_html(None, minifier)), '<p><img src="/a  b.png" alt="an\n  image"></img><a title="a  title">a link</a></p>')
+        self.assertEqual(minifier.saved, 1)
+    
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
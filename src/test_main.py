@@ -0,0 +1,300 @@
+import contextlib
+import io
+import os
+import unittest
+
+import events
+import fixtures
+import main
+import parsecache
+import templates
+
+class TestMain(fixtures.TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.tmp.name,"content")
+        self.destination = os.path.join(self.tmp.name,"public")
+        self.manifest_path = os.path.join(self.tmp.name,".build","public-pages.json")
+        self.template = self.write("template.html","<title>{{ Title }}</title>{{ Content }}")
+        self.write("content/index.md","# Home\n\n[link](/blog)")
+        self.write("content/blog/index.md","# Blog")
+        templates.clear_cache()
+
+    def write(self, rel_path, content):
+        path = super().write(rel_path,content)
+        stat = os.stat(path)
+        os.utime(path,ns=(stat.st_atime_ns,stat.st_mtime_ns + 10**9))
+        return path
+
+    def read(self, rel_path):
+        return super().read(rel_path,self.destination)
+
+    def build(self, basepath = "/"):
+        return main.build_pages(self.content,self.template,self.destination,basepath,self.manifest_path)
+
+    def test_generate_page(self):
+        self.build("/site/")
+        self.assertEqual(self.read("index.html"),'<title>Home</title><div><h1>Home</h1><p><a href="/site/blog">link</a></p></div>')
+
+    def test_basepath_is_not_applied_inside_code(self):
+        self.write("content/index.md",'# Home\n\n```\n<a href="/blog">\n```\n\n![img](/images/a.png)')
+        self.build("/site/")
+        self.assertEqual(self.read("index.html"),'<title>Home</title><div><h1>Home</h1><pre><code><a href="/blog">\n</code></pre><p><img src="/site/images/a.png" alt="img"></img></p></div>')
+
+    def test_table_of_contents_slot(self):
+        self.write("template.html","<nav>{{ TableOfContents }}</nav>{{ Content }}")
+        self.write("content/index.md","# Home\n\n## Intro\n\n### Details\n\n## Intro")
+        self.build()
+        self.assertEqual(self.read("index.html"),'<nav><ul><li><a href="#intro">Intro</a><ul><li><a href="#details">Details</a></li></ul></li><li><a href="#intro-1">Intro</a></li></ul></nav>'
+            '<div><h1 id="home">Home</h1><h2 id="intro">Intro</h2><h3 id="details">Details</h3><h2 id="intro-1">Intro</h2></div>')
+
+    def test_minified_build(self):
+        self.write("template.html","<html>\n  <title>{{ Title }}</title>\n  {{ Content }}\n</html>\n")
+        self.write("content/index.md","# Home\n\nsome\n  text\n\n```\na\n  b\n```")
+        manifest = main.build_pages(self.content,self.template,self.destination,"/",self.manifest_path,minify=True)
+        self.assertEqual(self.read("index.html"),'<html><title>Home</title><div><h1>Home</h1><p>some text</p><pre><code>a\n  b\n</code></pre></div></html>')
+        self.assertEqual(manifest.generated,["index.html","blog/index.html"])
+
+        manifest = self.build()
+        self.assertEqual(manifest.generated,["index.html","blog/index.html"])
+        self.assertIn("\n  <title>",self.read("index.html"))
+
+    def test_front_matter_listing_tags_and_feed(self):
+        self.write("content/index.md","---\ntitle: Site\nlist: blog\n---\n# Home")
+        self.write("content/blog/index.md","---\ndate: 2024-02-01\ntags: [news]\n---\n# Blog")
+        self.build()
+        self.assertEqual(self.read("index.html"),'<title>Site</title><div><h1>Home</h1></div><ul class="page-list"><li><a href="/blog/">Blog</a> <time datetime="2024-02-01">2024-02-01</time></li></ul>')
+        self.assertEqual(self.read("blog/index.html"),'<title>Blog</title><div><h1>Blog</h1></div>')
+        self.assertEqual(self.read("tags/news.html"),'<title>news</title><ul class="page-list"><li><a href="/blog/">Blog</a> <time datetime="2024-02-01">2024-02-01</time></li></ul>')
+        self.assertIn("<item><title>Blog</title><link>/blog/</link>",self.read("feed.xml"))
+        main.build_pages(self.content,self.template,self.destination,"/site/",self.manifest_path,site_url="https://example.org")
+        self.assertIn("<item><title>Blog</title><link>https://example.org/site/blog/</link>",self.read("feed.xml"))
+        self.write("content/index.md","---\ntitle: Site\nlist: blog\nurl: https://home.example\n---\n# Home")
+        self.build()
+        self.assertIn("<link>https://home.example/blog/</link>",self.read("feed.xml"))
+
+        self.write("content/blog/index.md","---\ndate: 2024-02-01\n---\n# Renamed")
+        manifest = main.build_pages(self.content,self.template,self.destination,"/",self.manifest_path,only={os.path.join(self.content,"blog/index.md")})
+        self.assertIn("index.html",manifest.generated)
+        self.assertIn("Renamed",self.read("index.html"))
+        self.assertFalse(os.path.exists(os.path.join(self.destination,"tags/news.html")))
+
+    def test_unclosed_front_matter_is_content(self):
+        self.write("content/index.md","---\n\n# Home")
+        self.build()
+        self.assertEqual(self.read("index.html"),"<title>Home</title><div><p>---</p><h1>Home</h1></div>")
+
+    def test_build_reports_events(self):
+        reported = []
+        sink = events.TextSink(events.DETAIL)
+        sink.handle = reported.append
+        events.set_sinks([sink])
+        self.build()
+        self.build()
+        pages = [(event.kind, event.subject) for event in reported if event.stage == "pages" and event.level == events.DETAIL]
+        index = os.path.join(self.destination,"index.html")
+        self.assertEqual(pages[0],("finish",index))
+        self.assertIn(("skip",index),pages)
+        finished = [event for event in reported if event.kind == "finish" and event.level == events.SUMMARY]
+        self.assertEqual([event.data for event in finished],[{"generated": 2, "skipped": 0, "removed": 0},{"generated": 0, "skipped": 2, "removed": 0}])
+
+    def test_incremental_build(self):
+        manifest = self.build()
+        self.assertEqual(manifest.generated,["index.html","blog/index.html"])
+
+        manifest = self.build()
+        self.assertEqual(manifest.generated,[])
+        self.assertEqual(manifest.skipped,["index.html","blog/index.html"])
+
+        self.write("content/blog/index.md","# New blog")
+        manifest = self.build()
+        self.assertEqual(manifest.generated,["blog/index.html"])
+
+        manifest = self.build("/site/")
+        self.assertEqual(manifest.generated,["index.html","blog/index.html"])
+
+    def test_build_only_some_pages(self):
+        self.build()
+        self.write("content/index.md","# New home")
+        self.write("content/blog/index.md","# New blog")
+        self.write("content/new.md","# New page")
+        manifest = main.build_pages(self.content,self.template,self.destination,"/",self.manifest_path,only={os.path.join(self.content,"blog","index.md")})
+        self.assertEqual(manifest.generated,["new.html","blog/index.html"])
+        self.assertEqual(manifest.skipped,["index.html"])
+        self.assertEqual(self.read("index.html"),'<title>Home</title><div><h1>Home</h1><p><a href="/blog">link</a></p></div>')
+
+    def test_template_change_invalidates_its_pages_only(self):
+        self.write("content/blog/_template.html","<main>{{ Content }}</main>")
+        self.build()
+        self.write("content/blog/_template.html","<article>{{ Content }}</article>")
+        manifest = self.build()
+        self.assertEqual(manifest.generated,["blog/index.html"])
+        self.assertEqual(self.read("blog/index.html"),"<article><div><h1>Blog</h1></div></article>")
+
+    def test_vanished_page_is_removed(self):
+        self.build()
+        os.remove(os.path.join(self.content,"blog","index.md"))
+        manifest = self.build()
+        self.assertEqual(manifest.stale(),["blog/index.html"])
+        self.assertFalse(os.path.exists(os.path.join(self.destination,"blog")))
+
+    def test_discover_pages(self):
+        self.write("content/blog/_template.html","{{ Content }}")
+        self.write("content/_partials/nav.html","<nav></nav>")
+        self.write("content/blog/cover.png","not a page")
+        self.write("content/cmd.md","# Commands")
+        pages = main.discover_pages(self.content,self.template,self.destination)
+        self.assertEqual(pages,[
+            (os.path.join(self.content,"cmd.md"),self.template,os.path.join(self.destination,"cmd.html")),
+            (os.path.join(self.content,"index.md"),self.template,os.path.join(self.destination,"index.html")),
+            (os.path.join(self.content,"blog","index.md"),os.path.join(self.content,"blog","_template.html"),os.path.join(self.destination,"blog","index.html")),
+        ])
+
+    def test_output_name_keeps_md_inside_paths(self):
+        self.write("content/cmd/readme.md","# Commands")
+        self.write("content/mdbook.md","# Book")
+        self.build()
+        self.assertEqual(self.read(os.path.join("cmd","readme.html")),"<title>Commands</title><div><h1>Commands</h1></div>")
+        self.assertTrue(os.path.isfile(os.path.join(self.destination,"mdbook.html")))
+
+    def test_page_chooses_its_template(self):
+        self.write("content/blog/_wide.html","<main>{{ Content }}</main>")
+        self.write("content/blog/index.md","---\ntemplate: _wide.html\n---\n# Blog")
+        manifest = self.build()
+        self.assertEqual(self.read(os.path.join("blog","index.html")),"<main><div><h1>Blog</h1></div></main>")
+        self.assertEqual(self.read("index.html"),'<title>Home</title><div><h1>Home</h1><p><a href="/blog">link</a></p></div>')
+
+        self.write("content/blog/_wide.html","<section>{{ Content }}</section>")
+        manifest = self.build()
+        self.assertEqual(manifest.generated,["blog/index.html"])
+
+    def test_parallel_build_matches_serial(self):
+        for i in range(10):
+            self.write(f"content/posts/post{i}.md",f"# Post {i}\n\nSome **text** and a [link](/posts/post{i + 1}).")
+        self.build("/site/")
+        serial = {rel_path: self.read(rel_path) for rel_path in ["index.html","blog/index.html","posts/post3.html"]}
+
+        manifest = main.build_pages(self.content,self.template,self.destination,"/site/",self.manifest_path,force=True,jobs=3)
+        self.assertEqual(len(manifest.generated),12)
+        self.assertEqual({rel_path: self.read(rel_path) for rel_path in serial},serial)
+
+    def test_parse_cache_skips_parsing(self):
+        cache = parsecache.ParseCache(os.path.join(self.tmp.name,"cache"))
+        main.build_pages(self.content,self.template,self.destination,"/site/",self.manifest_path,cache=cache)
+        expected = self.read("index.html")
+        self.assertEqual((cache.hits,cache.misses),(0,2))
+
+        for jobs in (1,3):
+            cache = parsecache.ParseCache(os.path.join(self.tmp.name,"cache"))
+            main.build_pages(self.content,self.template,self.destination,"/site/",self.manifest_path,force=True,jobs=jobs,cache=cache)
+            self.assertEqual((cache.hits,cache.misses),(2,0))
+            self.assertEqual(self.read("index.html"),expected)
+
+    def test_parallel_build_in_batches(self):
+        for i in range(7):
+            self.write(f"content/posts/post{i}.md",f"# Post {i}")
+        pages_per_job = main.PAGES_PER_JOB
+        main.PAGES_PER_JOB = 1
+        try:
+            manifest = main.build_pages(self.content,self.template,self.destination,"/",self.manifest_path,jobs=2)
+        finally:
+            main.PAGES_PER_JOB = pages_per_job
+        self.assertEqual(len(manifest.generated),9)
+        self.assertEqual(self.read(os.path.join("posts","post6.html")),"<title>Post 6</title><div><h1>Post 6</h1></div>")
+
+    def test_parallel_build_reports_errors_in_order(self):
+        self.write("content/a_broken.md","no title here")
+        self.write("content/z_broken.md","no title either")
+        with self.assertRaises(Exception) as context:
+            main.build_pages(self.content,self.template,self.destination,"/",self.manifest_path,jobs=2)
+        message = str(context.exception)
+        self.assertTrue(message.startswith("2 page(s) could not be generated"))
+        self.assertLess(message.index("a_broken.md"),message.index("z_broken.md"))
+        self.assertTrue(os.path.exists(os.path.join(self.destination,"index.html")))
+
+    def test_build_several_targets_parses_once(self):
+        other_template = self.write("other.html","<h1>{{ Title }}</h1>{{ Content }}")
+        docs = os.path.join(self.tmp.name,"docs")
+        outputs = [(main.Target(self.destination,"/site/"),self.destination),(main.Target(docs,"/",other_template),docs)]
+        parsed = []
+        parse_document = main.parse_document
+        main.parse_document = lambda *args: parsed.append(args[0]) or parse_document(*args)
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        try:
+            manifests = main.build_pages_targets(self.content,self.template,outputs)
+        finally:
+            main.parse_document = parse_document
+            os.chdir(cwd)
+        self.assertEqual(len(parsed),2)
+        self.assertEqual([manifest.generated for manifest in manifests],[["index.html","blog/index.html"]] * 2)
+        self.assertEqual(self.read("index.html"),'<title>Home</title><div><h1>Home</h1><p><a href="/site/blog">link</a></p></div>')
+        with open(os.path.join(docs,"index.html"),"r") as file:
+            self.assertEqual(file.read(),'<h1>Home</h1><div><h1>Home</h1><p><a href="/blog">link</a></p></div>')
+
+    def test_target_rejected_by_rollback_and_watch(self):
+        with contextlib.redirect_stderr(io.StringIO()) as stderr:
+            self.assertRaises(SystemExit,main.parse_args,["--rollback","--target","docs:/site/"])
+            self.assertRaises(SystemExit,main.parse_args,["--target","docs:/site/"],True)
+        self.assertIn("--target cannot be used with --rollback",stderr.getvalue())
+        self.assertIn("--target cannot be used with watch",stderr.getvalue())
+        self.assertEqual(main.parse_args(["--target","docs:/site/"]).target[0].destination,"docs")
+
+    def test_parse_target(self):
+        target = main.parse_target("docs:/site/:other.html")
+        self.assertEqual((target.destination,target.basepath,target.template_path),("docs","/site/","other.html"))
+        self.assertIsNone(main.parse_target("public:/").template_path)
+        self.assertRaises(Exception,main.parse_target,"public")
+
+    def test_write_page_replaces_hardlinked_file(self):
+        previous = self.write("previous.html","previous build")
+        dest_path = os.path.join(self.destination,"index.html")
+        os.makedirs(self.destination)
+        os.link(previous,dest_path)
+        main.write_page(dest_path,iter(["new ","build"]))
+        self.assertEqual(self.read("index.html"),"new build")
+        with open(previous,"r") as file:
+            self.assertEqual(file.read(),"previous build")
+
+    def test_write_page_removes_tmp_file_on_error(self):
+        def chunks():
+            yield "start"
+            raise ValueError("rendering failed")
+        dest_path = os.path.join(self.destination,"index.html")
+        self.assertRaises(ValueError,main.write_page,dest_path,chunks())
+        self.assertEqual(os.listdir(self.destination),[])
+
+    def test_staged_build(self):
+        self.write("static/index.css","body {}")
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        try:
+            args = main.parse_args(["/","public"])
+            self.assertTrue(args.sync)
+            main.build(args)
+            self.assertEqual(self.read("index.css"),"body {}")
+            self.assertTrue(os.path.exists(os.path.join(".build","public-pages.json")))
+
+            self.write("content/index.md","no title anymore")
+            self.assertRaises(Exception,main.build,args)
+            self.assertFalse(os.path.exists("public.staging"))
+            self.assertEqual(self.read("index.html"),'<title>Home</title><div><h1>Home</h1><p><a href="/blog">link</a></p></div>')
+
+            self.write("content/index.md","# New home")
+            main.build(args)
+            self.assertEqual(self.read("index.html"),"<title>New home</title><div><h1>New home</h1></div>")
+            self.assertTrue(os.path.samefile(os.path.join("public","index.css"),os.path.join("public.previous","index.css")))
+
+            main.rollback(args)
+            self.assertEqual(self.read("index.html"),'<title>Home</title><div><h1>Home</h1><p><a href="/blog">link</a></p></div>')
+            self.assertFalse(os.path.exists(os.path.join(".build","public-pages.json")))
+
+            clean = main.parse_args(["/","public","--clean"])
+            self.assertFalse(clean.sync)
+            main.build(clean)
+            self.assertFalse(os.path.samefile(os.path.join("public","index.css"),os.path.join("public.previous","index.css")))
+        finally:
+            os.chdir(cwd)
+
+if __name__ == "__main__":
+    unittest.main()
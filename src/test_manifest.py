@@ -0,0 +1,63 @@
+import hashlib
+import os
+import tempfile
+import unittest
+
+import manifest as mf
+import templates
+
+TITLE_HASH = hashlib.sha256(b"# Title").hexdigest()
+OTHER_HASH = hashlib.sha256(b"# Other").hexdigest()
+
+class TestManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_load_and_save(self):
+        path = os.path.join(self.tmp.name,"build","manifest.json")
+        self.assertEqual(mf.load_manifest(path),{})
+        mf.save_manifest(path,{"files": {"a": 1}})
+        self.assertEqual(mf.load_manifest(path),{"files": {"a": 1}})
+        self.assertEqual(os.listdir(os.path.dirname(path)),["manifest.json"])
+
+        with open(path,"w") as file:
+            file.write("{ not json")
+        self.assertEqual(mf.load_manifest(path),{})
+
+    def test_file_hash(self):
+        path = os.path.join(self.tmp.name,"file")
+        with open(path,"wb") as file:
+            file.write(b"abc")
+        self.assertEqual(mf.file_hash(path),"ba7816bf8f01cfea414140de5dae2223b00361a396177a9cb410ff61f20015ad")
+
+    def test_page_manifest(self):
+        template_path = os.path.join(self.tmp.name,"template.html")
+        with open(template_path,"w") as file:
+            file.write("{{ Content }}")
+        template = templates.compile_template(template_path)
+        destination = os.path.join(self.tmp.name,"public")
+        dest_path = os.path.join(destination,"index.html")
+
+        manifest = mf.PageManifest({},destination,1)
+        entry = manifest.entry_for_hash(TITLE_HASH,template,"/")
+        self.assertFalse(manifest.is_up_to_date(dest_path,entry))
+        manifest.record(dest_path,entry,True)
+        self.assertEqual(manifest.generated,["index.html"])
+
+        os.makedirs(destination)
+        with open(dest_path,"w") as file:
+            file.write("<h1>Title</h1>")
+        manifest = mf.PageManifest(manifest.to_dict(),destination,1)
+        self.assertTrue(manifest.is_up_to_date(dest_path,manifest.entry_for_hash(TITLE_HASH,template,"/")))
+        self.assertFalse(manifest.is_up_to_date(dest_path,manifest.entry_for_hash(OTHER_HASH,template,"/")))
+        self.assertFalse(manifest.is_up_to_date(dest_path,manifest.entry_for_hash(TITLE_HASH,template,"/docs/")))
+        self.assertEqual(manifest.stale(),["index.html"])
+
+        manifest = mf.PageManifest({"pages": manifest.previous},destination,2)
+        self.assertFalse(manifest.is_up_to_date(dest_path,manifest.entry_for_hash(TITLE_HASH,template,"/")))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,25 @@
+import unittest
+
+import minify
+
+class TestMinify(unittest.TestCase):
+    def test_minifier_counts_saved_bytes(self):
+        minifier = minify.Minifier()
+        self.assertEqual(minifier.text("<p>a  line\n  break</p>"),"<p>a line break</p>")
+        self.assertEqual(minifier.text("a\u00a0 b"),"a\u00a0 b")
+        self.assertEqual(minifier.saved,3)
+
+    def test_minify_html_keeps_preserved_elements(self):
+        html = "<body>\n  <p>some\n  text</p>\n  <pre>a\n  b</pre>\n</body>\n"
+        self.assertEqual(minify.minify_html(html),"<body><p>some text</p><pre>a\n  b</pre></body> ")
+
+    def test_minify_html_keeps_a_space_between_inline_tags(self):
+        html = '<nav>\n  <a href="/">Home</a>\n  <a href="/blog">Blog</a>\n</nav>\n<p>\0\n\0</p>\n<textarea>a</textarea>\n<b>b</b>'
+        self.assertEqual(minify.minify_html(html),'<nav><a href="/">Home</a> <a href="/blog">Blog</a></nav><p>\0 \0</p><textarea>a</textarea> <b>b</b>')
+
+    def test_minify_css(self):
+        css = '/* theme */\nbody {\n  color: red;\n  font-family: "A  B", serif;\n}\n\na:hover , b { margin: 0 auto; }\n'
+        self.assertEqual(minify.minify_css(css),'body{color:red;font-family:"A  B",serif}a:hover,b{margin:0 auto}')
+
+if __name__ == "__main__":
+    unittest.main()
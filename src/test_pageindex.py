@@ -0,0 +1,50 @@
+import unittest
+
+import pageindex as pi
+
+class TestPageIndex(unittest.TestCase):
+    def setUp(self):
+        self.pages = [
+            pi.PageInfo("content/index.md","public/index.html","/",{"title": "Home", "list": "blog"}),
+            pi.PageInfo("content/blog/tom/index.md","public/blog/tom/index.html","/blog/tom/",{"title": "Tom", "date": "2024-01-02", "tags": ["tolkien","characters"]}),
+            pi.PageInfo("content/blog/elf/index.md","public/blog/elf/index.html","/blog/elf/",{"title": "Elf", "date": "2024-03-01", "tags": "tolkien"}),
+            pi.PageInfo("content/blog/draft.md","public/blog/draft.html","/blog/draft.html",{"title": "Draft"}),
+        ]
+        self.index = pi.PageIndex(self.pages,"content")
+
+    def test_page_url(self):
+        self.assertEqual(pi.page_url("public/index.html","public"),"/")
+        self.assertEqual(pi.page_url("public/blog/tom/index.html","public"),"/blog/tom/")
+        self.assertEqual(pi.page_url("public/contact.html","public"),"/contact.html")
+
+    def test_listing(self):
+        self.assertEqual([page.title for page in self.index.listing("content/index.md")],["Elf","Tom","Draft"])
+        self.assertIsNone(self.index.listing("content/blog/tom/index.md"))
+
+    def test_tags(self):
+        tags = self.index.tags()
+        self.assertEqual(list(tags),["characters","tolkien"])
+        self.assertEqual([page.title for page in tags["tolkien"]],["Elf","Tom"])
+
+    def test_listing_html(self):
+        html = pi.listing_html(self.index.dated(),"/site/")
+        self.assertEqual(html,'<ul class="page-list"><li><a href="/site/blog/elf/">Elf</a> <time datetime="2024-03-01">2024-03-01</time></li>'
+            '<li><a href="/site/blog/tom/">Tom</a> <time datetime="2024-01-02">2024-01-02</time></li></ul>')
+
+    def test_listing_hash(self):
+        listing = self.index.listing("content/index.md")
+        before = pi.listing_hash(listing)
+        self.assertEqual(before,pi.listing_hash(self.index.listing("content/index.md")))
+        listing[0].title = "Glorfindel"
+        self.assertNotEqual(before,pi.listing_hash(listing))
+
+    def test_feed(self):
+        feed = pi.feed_xml("Home & co",self.index.dated(),"/site/")
+        self.assertIn("<title>Home &amp; co</title><link>/site/</link>",feed)
+        self.assertIn("<item><title>Elf</title><link>/site/blog/elf/</link><pubDate>Fri, 01 Mar 2024 00:00:00 +0000</pubDate></item>",feed)
+        feed = pi.feed_xml("Home",self.index.dated(),"/site/","https://example.org/")
+        self.assertIn("<link>https://example.org/site/</link>",feed)
+        self.assertIn("<link>https://example.org/site/blog/elf/</link>",feed)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,4 @@
+import io
 import unittest
 
 from parentnode import ParentNode
@@ -42,4 +43,27 @@ class TestParentNode(unittest.TestCase):
     def test_to_html_without_children(self):
         node = ParentNode("div",None)
         node = ParentNode(None,[])
-        self.assertRaises(ValueError,node.to_html)
\ No newline at end of file
+        self.assertRaises(ValueError,node.to_html)
+    
+    def test_iter_html(self):
+        node = ParentNode("p",[LeafNode("b","Bold"),ParentNode("span",[LeafNode(None,"text")],{"class":"c"})])
+        self.assertEqual(list(node.iter_html()),['<p>','<b>Bold</b>','<span class="c">','text','</span>','</p>'])
+    
+    def test_write_html(self):
+        node = ParentNode("div",[ParentNode("p",[LeafNode("i","a"),LeafNode(None,"b")]),LeafNode("code","c")])
+        output = io.StringIO()
+        node.write_html(output)
+        self.assertEqual(output.getvalue(),node.to_html())
+        self.assertEqual(output.getvalue(),"<div><p><i>a</i>b</p><code>c</code></div>")
+    
+    def test_to_html_deep_nesting(self):
+        node = LeafNode(None,"deep")
+        for _ in range(50000):
+            node = ParentNode("span",[node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<span><span>"))
+        self.assertEqual(len(html),4 + 50000 * len("<span></span>"))
+    
+    def test_iter_html_invalid_child(self):
+        node = ParentNode("div",[ParentNode("p",None)])
+        self.assertRaises(ValueError,node.to_html)
@@ -0,0 +1,51 @@
+import os
+import tempfile
+import unittest
+
+import parsecache as pc
+
+class TestParseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = pc.ParseCache(os.path.join(self.tmp.name,"cache"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_put_and_get(self):
+        key = self.cache.key("abc","/",False)
+        self.assertIsNone(self.cache.get(key))
+        body = {"title": "T", "content": "<div></div>", "toc": None}
+        self.cache.put(key,body)
+        self.assertEqual(self.cache.get(key),body)
+        self.assertEqual((self.cache.hits,self.cache.misses),(1,1))
+        self.assertEqual(os.listdir(self.cache.directory),[key + pc.ENTRY_SUFFIX])
+
+    def test_key(self):
+        key = self.cache.key("abc","/",False)
+        self.assertNotEqual(key,self.cache.key("abd","/",False))
+        self.assertNotEqual(key,self.cache.key("abc","/site/",False))
+        self.assertNotEqual(key,self.cache.key("abc","/",True))
+
+    def test_corrupted_entry_is_a_miss(self):
+        key = self.cache.key("abc","/",False)
+        self.cache.put(key,{"title": "T"})
+        with open(self.cache.path(key),"wb") as entry_file:
+            entry_file.write(b"not zlib")
+        self.assertIsNone(self.cache.get(key))
+        self.assertFalse(os.path.exists(self.cache.path(key)))
+
+    def test_prune_removes_least_recently_used(self):
+        keys = [self.cache.key(str(i),"/",False) for i in range(3)]
+        for i, key in enumerate(keys):
+            self.cache.put(key,{"content": "x" * 100})
+            os.utime(self.cache.path(key),ns=(0,i * 10**9))
+        self.cache.get(keys[0])
+        self.cache.max_bytes = 2 * os.path.getsize(self.cache.path(keys[0]))
+        self.assertEqual(self.cache.prune(),1)
+        self.assertIsNone(self.cache.get(keys[1]))
+        self.assertIsNotNone(self.cache.get(keys[0]))
+        self.assertIsNotNone(self.cache.get(keys[2]))
+
+if __name__ == "__main__":
+    unittest.main()
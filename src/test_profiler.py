@@ -0,0 +1,56 @@
+import json
+import os
+import unittest
+
+import fixtures
+import main
+import profiler
+import splitmarkdown as sp
+import templates
+
+class TestProfiler(fixtures.TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.tmp.name,"content")
+        self.destination = os.path.join(self.tmp.name,"public")
+        self.template = self.write("template.html","<title>{{ Title }}</title>{{ Content }}")
+        self.write("content/index.md","# Home\n\nSome **bold** text and a [link](/blog).\n\n- a\n- b")
+        self.write("content/blog/index.md","# Blog")
+        templates.clear_cache()
+
+    def test_profiled_build(self):
+        text_to_children = sp.text_to_children
+        profile = profiler.Profiler()
+        with profile.installed(main):
+            self.assertIsNot(sp.text_to_children,text_to_children)
+            main.build_pages(self.content,self.template,self.destination,"/",os.path.join(self.tmp.name,"pages.json"))
+        self.assertIs(sp.text_to_children,text_to_children)
+        self.assertIsInstance(sp.INLINE_MARKER_PATTERN,type(sp.TITLE_PATTERN))
+
+        report = profile.report(top=1)
+        for stage in ("discover","read","split","classify","inline","serialize","template","write","page"):
+            self.assertIn(stage,report["stages"])
+        self.assertEqual(report["stages"]["write"]["calls"],2)
+        self.assertGreater(report["regex_calls"]["INLINE_MARKER_PATTERN"],0)
+        self.assertGreater(report["node_allocations"]["ParentNode"],0)
+        self.assertEqual(len(report["slowest_pages"]),1)
+        self.assertEqual(sorted(page["page"] for page in report["pages"]),[os.path.join(self.content,"blog/index.md"),os.path.join(self.content,"index.md")])
+        covered = sum(stage["seconds"] for stage in report["stages"].values())
+        self.assertLessEqual(covered,report["total_seconds"] + 1e-6)
+
+        path = os.path.join(self.tmp.name,"profile.json")
+        profile.save(path)
+        with open(path) as report_file:
+            self.assertEqual(json.load(report_file)["stages"].keys(),report["stages"].keys())
+        self.assertIn("Slowest pages :",profile.summary())
+
+    def test_timed_stages_are_exclusive(self):
+        profile = profiler.Profiler()
+        outer = profile.timed("outer",lambda: list(profile.timed_iter("inner",range(3))))
+        self.assertEqual(outer(),[0,1,2])
+        self.assertEqual(profile.stages["outer"][1],1)
+        self.assertEqual(profile.stages["inner"][1],4)
+        self.assertEqual(profile.stack,[])
+
+if __name__ == "__main__":
+    unittest.main()
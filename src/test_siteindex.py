@@ -0,0 +1,55 @@
+import os
+import unittest
+
+import assets
+import fixtures
+import siteindex as si
+
+class TestSiteIndex(fixtures.TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.root = self.tmp.name
+        for rel_path in ["index.md","notes.txt","_draft.md","blog/_template.html","blog/post.md","blog/cover.png","blog/old/post.md","_partials/nav.html","md/readme.md"]:
+            self.write(rel_path,"# Title")
+
+    def test_content_kinds_and_routes(self):
+        site = si.scan(self.root,content=True)
+        self.assertEqual([(entry.path,entry.kind,entry.route) for entry in site.entries],[
+            ("index.md",si.PAGE,"index.html"),
+            ("notes.txt",si.ASSET,"notes.txt"),
+            (os.path.join("blog","_template.html"),si.TEMPLATE,None),
+            (os.path.join("blog","cover.png"),si.ASSET,os.path.join("blog","cover.png")),
+            (os.path.join("blog","post.md"),si.PAGE,os.path.join("blog","post.html")),
+            (os.path.join("blog","old","post.md"),si.PAGE,os.path.join("blog","old","post.html")),
+            (os.path.join("md","readme.md"),si.PAGE,os.path.join("md","readme.html")),
+        ])
+        self.assertEqual(site.entry("index.md").stat().st_size,len("# Title"))
+
+    def test_follows_symlinked_directories_without_looping(self):
+        os.symlink(os.path.join(self.root,"blog"),os.path.join(self.root,"linked"))
+        os.symlink(self.root,os.path.join(self.root,"blog","root"))
+        site = si.scan(self.root,content=True)
+        self.assertIn(os.path.join("blog","post.md"),site.files())
+        self.assertIn(os.path.join("linked","old","post.md"),site.files())
+        self.assertEqual(site.entry(os.path.join("linked","post.md")).route,os.path.join("linked","post.html"))
+        self.assertFalse(any("root" in path for path in site.files()))
+
+    def test_static_tree_matches_list_tree(self):
+        site = si.scan(self.root)
+        self.assertEqual(site.tree(),assets.list_tree(self.root))
+        self.assertTrue(all(entry.kind == si.ASSET and entry.route == entry.path for entry in site.entries))
+
+    def test_include_and_exclude(self):
+        site = si.scan(self.root,exclude=["old","*.png"],content=True)
+        self.assertEqual([entry.path for entry in site.of_kind(si.PAGE)],["index.md",os.path.join("blog","post.md"),os.path.join("md","readme.md")])
+        self.assertNotIn(os.path.join("blog","old"),site.dirs)
+        self.assertIsNone(site.entry(os.path.join("blog","cover.png")))
+
+        site = si.scan(self.root,include=["blog/*"],content=True)
+        self.assertEqual([entry.path for entry in site.entries],[os.path.join("blog","_template.html"),os.path.join("blog","cover.png"),os.path.join("blog","post.md"),os.path.join("blog","old","post.md")])
+
+    def test_missing_root(self):
+        self.assertRaises(FileNotFoundError,si.scan,os.path.join(self.root,"missing"))
+
+if __name__ == "__main__":
+    unittest.main()
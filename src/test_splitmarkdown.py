@@ -1,3 +1,4 @@
+import io
 import unittest
 
 from textnode import TextNode, TextType
@@ -205,6 +206,43 @@ class TestSplitMarkdown(unittest.TestCase):
         result = sp.text_to_textnodes(text)
         self.assertEqual(result, textnodes)
     
+    def test_text_to_textnodes_single_pass(self):
+        result = sp.text_to_textnodes("**bold _and italic_ text** then `code with **stars** and _underscores_`")
+        self.assertEqual(result,[
+            TextNode("bold ",TextType.BOLD),
+            TextNode("and italic",TextType.ITALIC),
+            TextNode(" text",TextType.BOLD),
+            TextNode(" then ",TextType.TEXT),
+            TextNode("code with **stars** and _underscores_",TextType.CODE),
+        ])
+        
+        result = sp.text_to_textnodes("A [link](https://example.com/snake_case_url) and **[bold link](url)**")
+        self.assertEqual(result,[
+            TextNode("A ",TextType.TEXT),
+            TextNode("link",TextType.LINK,"https://example.com/snake_case_url"),
+            TextNode(" and ",TextType.TEXT),
+            TextNode("bold link",TextType.LINK,"url"),
+        ])
+        
+        result = sp.text_to_textnodes("Not an image ![](url) nor [a link] but ![an image](url)")
+        self.assertEqual(result,[
+            TextNode("Not an image ![](url) nor [a link] but ",TextType.TEXT),
+            TextNode("an image",TextType.IMAGE,"url"),
+        ])
+        
+        result = sp.text_to_textnodes("_a **b** c_")
+        self.assertEqual(result,[TextNode("a ",TextType.ITALIC),TextNode("b",TextType.BOLD),TextNode(" c",TextType.ITALIC)])
+        
+        result = sp.text_to_textnodes("[a](b (c)) and ![d](e_(f).png)")
+        self.assertEqual(result,[
+            TextNode("a",TextType.LINK,"b (c)"),
+            TextNode(" and ",TextType.TEXT),
+            TextNode("d",TextType.IMAGE,"e_(f).png"),
+        ])
+        
+        self.assertEqual(sp.text_to_textnodes(""),[])
+        self.assertEqual(sp.text_to_textnodes("unclosed **bold"),[TextNode("unclosed ",TextType.TEXT),TextNode("bold",TextType.BOLD)])
+    
     def test_markdown_to_blocks(self):
         md = """
 This is **bolded** paragraph
@@ -506,7 +544,76 @@ And then a [link](url2)
         node = sp.markdown_to_html_node(md)
         html = node.to_html()
         self.assertEqual(html,'<div><p><img src="url" alt="An image"></img> to begin \na paragraph</p><p>This is a <b>second</b> <i>paragraph</i>.</p><p>And then a <a href="url2">link</a></p></div>')
-    
+
+    def test_code_fence_keeps_blank_lines(self):
+        md = "```python\ndef f():\n\n    return 1\n```\n\nAfter"
+        html = sp.markdown_to_html_node(md).to_html()
+        self.assertEqual(html,'<div><pre><code>def f():\n\n    return 1\n</code></pre><p>After</p></div>')
+
+    def test_unclosed_code_fence_splits_on_blank_lines(self):
+        md = "```python\ndef f():\n\n# Title\n\n- a\n- b"
+        self.assertEqual(sp.markdown_to_blocks(md),["```python\ndef f():","# Title","- a\n- b"])
+        html = sp.markdown_to_html_node(md).to_html()
+        self.assertEqual(html,'<div><p><code>python\ndef f():</code></p><h1>Title</h1><ul><li>a</li><li>b</li></ul></div>')
+
+    def test_ordered_list_beyond_nine_items(self):
+        md = "\n".join(f"{i}. item {i}" for i in range(1,12))
+        self.assertEqual(sp.block_to_block_type(md),sp.BlockType.ORDERED_LIST)
+        html = sp.markdown_to_html_node(md).to_html()
+        self.assertTrue(html.endswith('<li>item 10</li><li>item 11</li></ol></div>'))
+
+    def test_iter_blocks_reads_lines(self):
+        lines = ["# Title\n", "   \n", "- a\n", "- b  \n", "\n", "\n", "text\n"]
+        self.assertEqual(
+            list(sp.iter_blocks(lines)),
+            [
+                (sp.BlockType.HEADING, ["# Title"]),
+                (sp.BlockType.UNORDERED_LIST, ["- a", "- b"]),
+                (sp.BlockType.PARAGRAPH, ["text"]),
+            ],
+        )
+
+    def test_iter_html_nodes_from_file(self):
+        fp = io.StringIO("# Title\n\nSome **text**\n\n- a\n- b\n")
+        html = [node.to_html() for node in sp.iter_html_nodes(fp)]
+        self.assertEqual(html,["<h1>Title</h1>","<p>Some <b>text</b></p>","<ul><li>a</li><li>b</li></ul>"])
+
+    def test_document_stream_reads_lazily(self):
+        read = []
+        def lines():
+            for line in ["Intro\n", "\n", "# Title\n", "\n", "After\n"]:
+                read.append(line)
+                yield line
+        document = sp.DocumentStream(lines())
+        self.assertEqual(document.read_title(),"Title")
+        self.assertNotIn("After\n",read)
+        self.assertEqual("".join(document.iter_html()),"<div><p>Intro</p><h1>Title</h1><p>After</p></div>")
+
+    def test_document_stream_renders_read_blocks_for_several_basepaths(self):
+        document = sp.DocumentStream(["# Title", "", "[link](/blog)"]).read_all()
+        self.assertEqual("".join(document.iter_read_html("/site/")),'<div><h1>Title</h1><p><a href="/site/blog">link</a></p></div>')
+        self.assertEqual("".join(document.iter_read_html("/")),'<div><h1>Title</h1><p><a href="/blog">link</a></p></div>')
+        self.assertEqual(len(document.pending),2)
+
+    def test_document_stream_without_title(self):
+        document = sp.DocumentStream(["## Not a title", "", "```", "# Nor this", "```"])
+        self.assertRaises(Exception,document.read_title)
+
+    def test_markdown_to_document(self):
+        md = "Intro with **four words**\n\n```\n# not a heading\n```\n\n# The _Title_\n\n## Sub: part 1\n\n## Sub: part 1"
+        document = sp.markdown_to_document(md)
+        self.assertEqual(document.title,"The _Title_")
+        self.assertEqual(document.headings,[sp.Heading(1,"The Title","the-title"),sp.Heading(2,"Sub: part 1","sub-part-1"),sp.Heading(2,"Sub: part 1","sub-part-1-1")])
+        self.assertEqual(document.word_count,4 + 2 + 3 + 3)
+        self.assertEqual("".join(document.iter_html()),sp.markdown_to_html_node(md).to_html())
+
+    def test_document_anchors(self):
+        document = sp.markdown_to_document("# Title\n\n## A\n\n#### B\n\n## C",anchors=True)
+        html = "".join(document.iter_html())
+        self.assertEqual(html,'<div><h1 id="title">Title</h1><h2 id="a">A</h2><h4 id="b">B</h4><h2 id="c">C</h2></div>')
+        self.assertEqual(document.table_of_contents().to_html(),'<ul><li><a href="#a">A</a><ul><li><a href="#b">B</a></li></ul></li><li><a href="#c">C</a></li></ul>')
+        self.assertIsNone(sp.markdown_to_document("# Only a title").table_of_contents())
+
     def test_extract_title(self):
         md = """
 Raw text
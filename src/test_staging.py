@@ -0,0 +1,56 @@
+import os
+import unittest
+
+import fixtures
+import staging
+
+class TestStaging(fixtures.TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.destination = os.path.join(self.tmp.name,"docs")
+        self.write("docs/index.html","old")
+        self.write("docs/images/a.png","aaaa")
+
+    def test_prepare_clones_with_hardlinks(self):
+        path = staging.prepare(self.destination)
+        self.assertEqual(path,self.destination + ".staging")
+        self.assertTrue(os.path.samefile(os.path.join(path,"images","a.png"),os.path.join(self.destination,"images","a.png")))
+
+        empty = staging.prepare(self.destination,reuse=False)
+        self.assertEqual(os.listdir(empty),[])
+
+    def test_swap_and_rollback(self):
+        path = staging.prepare(self.destination)
+        os.remove(os.path.join(path,"index.html"))
+        self.write("docs.staging/index.html","new")
+        self.assertEqual(self.read("docs/index.html"),"old")
+
+        staging.swap(self.destination)
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(self.read("docs/index.html"),"new")
+        self.assertEqual(self.read("docs.previous/index.html"),"old")
+
+        staging.rollback(self.destination)
+        self.assertEqual(self.read("docs/index.html"),"old")
+        staging.rollback(self.destination)
+        self.assertEqual(self.read("docs/index.html"),"new")
+
+    def test_swap_without_destination(self):
+        other = os.path.join(self.tmp.name,"public")
+        staging.prepare(other)
+        self.write("public.staging/index.html","first")
+        staging.swap(other)
+        self.assertEqual(self.read("public/index.html"),"first")
+        self.assertFalse(os.path.exists(other + ".previous"))
+
+    def test_abort(self):
+        staging.prepare(self.destination)
+        staging.abort(self.destination)
+        self.assertFalse(os.path.exists(self.destination + ".staging"))
+        self.assertEqual(self.read("docs/index.html"),"old")
+
+    def test_rollback_without_previous(self):
+        self.assertRaises(Exception,staging.rollback,self.destination)
+
+if __name__ == "__main__":
+    unittest.main()
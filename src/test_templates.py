@@ -0,0 +1,79 @@
+import os
+import unittest
+
+import fixtures
+import templates
+from templates import Slot, TemplateError
+
+class TestTemplates(fixtures.TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        templates.clear_cache()
+
+    def render(self, template, values):
+        return "".join(template.iter_render(values))
+
+    def test_compile_slots(self):
+        path = self.write("template.html","<title>{{ Title }}</title><article>{{Content}}</article>")
+        template = templates.compile_template(path)
+        self.assertEqual(template.segments,["<title>",Slot("Title"),"</title><article>",Slot("Content"),"</article>"])
+        self.assertEqual(self.render(template,{"Title": "T", "Content": "<p>c</p>"}),"<title>T</title><article><p>c</p></article>")
+        self.assertEqual(self.render(template,{"Title": "T"}),"<title>T</title><article></article>")
+        self.assertTrue(template.has_slot("Content"))
+        self.assertFalse(template.has_slot("TableOfContents"))
+
+    def test_include(self):
+        self.write("partials/nav.html","<nav>{{ Title }}</nav>")
+        path = self.write("template.html",'<body>{% include "partials/nav.html" %}{{ Content }}</body>')
+        template = templates.compile_template(path)
+        self.assertEqual(self.render(template,{"Title": "T", "Content": "c"}),"<body><nav>T</nav>c</body>")
+        self.assertEqual(len(template.dependencies),2)
+
+    def test_extends(self):
+        self.write("base.html","<head>{% block head %}<title>{{ Title }}</title>{% endblock %}</head><body>{% block body %}default{% endblock %}</body>")
+        self.write("middle.html",'{% extends "base.html" %}{% block body %}<main>{% block main %}{% endblock %}</main>{% endblock %}')
+        path = self.write("page.html",'{% extends "middle.html" %}\n{% block main %}{{ Content }}{% endblock main %}')
+        template = templates.compile_template(path)
+        self.assertEqual(self.render(template,{"Title": "T", "Content": "c"}),"<head><title>T</title></head><body><main>c</main></body>")
+        self.assertEqual(len(template.dependencies),3)
+
+    def test_for_basepath(self):
+        path = self.write("template.html",'<link href="/index.css" rel="stylesheet" /><a href="https://x.org">{{ Content }}</a>')
+        template = templates.compile_template(path)
+        bound = template.for_basepath("/site/")
+        self.assertIs(template.for_basepath("/site/"),bound)
+        self.assertIs(template.for_basepath("/"),template)
+        self.assertEqual(self.render(bound,{"Content": 'href="/kept"'}),'<link href="/site/index.css" rel="stylesheet" /><a href="https://x.org">href="/kept"</a>')
+
+    def test_minified(self):
+        path = self.write("template.html","<html>\n  <title> {{ Title }} </title>\n  <pre>\n{{ Content }}\n</pre>\n</html>\n")
+        template = templates.compile_template(path)
+        minified = template.minified()
+        self.assertIs(template.minified(),minified)
+        self.assertEqual(minified.segments,["<html><title> ",Slot("Title")," </title><pre>\n",Slot("Content"),"\n</pre></html>"])
+        self.assertEqual(minified.saved,8)
+        self.assertEqual(self.render(minified,{"Title": "T", "Content": "c"}),"<html><title> T </title><pre>\nc\n</pre></html>")
+
+    def test_errors(self):
+        self.assertRaises(TemplateError,templates.parse,"{% block a %}never closed")
+        self.assertRaises(TemplateError,templates.parse,"{% endblock %}")
+        self.assertRaises(TemplateError,templates.parse,"{% unknown %}")
+        self.assertRaises(TemplateError,templates.parse,'text {% extends "base.html" %}')
+        path = self.write("loop.html",'{% include "loop.html" %}')
+        self.assertRaises(TemplateError,templates.compile_template,path)
+
+    def test_cache(self):
+        self.write("partials/footer.html","<footer></footer>")
+        path = self.write("template.html",'{{ Content }}{% include "partials/footer.html" %}')
+        template = templates.load_template(path)
+        self.assertIs(templates.load_template(path),template)
+
+        footer = self.write("partials/footer.html","<footer>new</footer>")
+        stat = os.stat(footer)
+        os.utime(footer,ns=(stat.st_atime_ns,stat.st_mtime_ns + 10**9))
+        reloaded = templates.load_template(path)
+        self.assertIsNot(reloaded,template)
+        self.assertEqual(self.render(reloaded,{"Content": "c"}),"c<footer>new</footer>")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import unittest
+
+import fixtures
+import watch
+
+class TestWatch(fixtures.TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.tmp.name,"content")
+        self.static = os.path.join(self.tmp.name,"static")
+        self.write("content/index.md","# Home")
+        self.write("static/index.css","body {}")
+
+    def test_polling_watcher(self):
+        watcher = watch.PollingWatcher([self.content,self.static],interval=0.01)
+        self.assertEqual(watcher.changes(0),set())
+
+        added = self.write("content/blog/index.md","# Blog")
+        modified = self.write("static/index.css","body { margin: 0 }")
+        os.remove(os.path.join(self.content,"index.md"))
+        self.assertEqual(watcher.changes(0),{added,modified,os.path.join(self.content,"index.md")})
+        self.assertEqual(watcher.changes(0.02),set())
+
+    def test_polling_watcher_single_file(self):
+        template = self.write("template.html","{{ Content }}")
+        self.write("other.html","")
+        watcher = watch.PollingWatcher([template],interval=0.01)
+        self.write("other.html","changed")
+        self.assertEqual(watcher.changes(0),set())
+        self.write("template.html","<main>{{ Content }}</main>")
+        self.assertEqual(watcher.changes(0),{template})
+
+    def test_wait_for_changes_debounces(self):
+        class FakeWatcher:
+            def __init__(self):
+                self.batches = [{"a"},{"b"},{"a","c"},set(),{"d"}]
+            def changes(self, timeout):
+                return self.batches.pop(0)
+        watcher = FakeWatcher()
+        self.assertEqual(watch.wait_for_changes(watcher,0),{"a","b","c"})
+        self.assertEqual(watcher.batches,[{"d"}])
+
+    def test_classify_changes(self):
+        page = os.path.join(self.content,"blog","index.md")
+        pages, static, other = watch.classify_changes({page},self.content,self.static)
+        self.assertEqual((pages,static,other),({page},False,False))
+
+        changed = {os.path.join(self.static,"index.css"),os.path.join(self.content,"blog","_template.html")}
+        pages, static, other = watch.classify_changes(changed,self.content,self.static)
+        self.assertEqual((pages,static,other),(set(),True,True))
+
+        changed = {os.path.join(self.content,"_partials","nav.md"),os.path.join(self.tmp.name,"template.html")}
+        pages, static, other = watch.classify_changes(changed,self.content,self.static)
+        self.assertEqual((pages,static,other),(set(),False,True))
+
+    def test_inject_reload_script(self):
+        self.assertEqual(watch.inject_reload_script("<body><p>a</p></body>"),"<body><p>a</p>"+watch.RELOAD_SCRIPT+"</body>")
+        self.assertEqual(watch.inject_reload_script("<p>a</p>"),"<p>a</p>"+watch.RELOAD_SCRIPT)
+
+    def test_reload_notifier(self):
+        notifier = watch.ReloadNotifier()
+        self.assertEqual(notifier.wait(0,0),0)
+        notifier.notify()
+        self.assertEqual(notifier.wait(0,1),1)
+
+if __name__ == "__main__":
+    unittest.main()
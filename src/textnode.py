@@ -10,7 +10,29 @@ class TextType(Enum):
     LINK = 'link'
     IMAGE = 'image'
     
+def link_props(node):
+    return {"href": node.url}
+
+def image_props(node):
+    return {"src": node.url, "alt": node.text}
+
+"""
+The html of each text type : its tag, the function returning the attributes of
+its node (None without attributes) and whether the text is the content of the node
+(the text of an image is its alt attribute).
+"""
+TEXT_TYPE_HTML = {
+    TextType.TEXT: (None, None, True),
+    TextType.BOLD: ("b", None, True),
+    TextType.ITALIC: ("i", None, True),
+    TextType.CODE: ("code", None, True),
+    TextType.LINK: ("a", link_props, True),
+    TextType.IMAGE: ("img", image_props, False),
+}
+
 class TextNode:
+    __slots__ = ("text", "text_type", "url")
+    
     def __init__(self, text, type, url = None):
         self.text = text
         self.text_type = type
@@ -23,17 +45,8 @@ class TextNode:
         return f"TextNode({self.text}, {self.text_type.value}, {self.url})"
     
     def text_node_to_html_node(self):
-        if self.text_type == TextType.TEXT :
-            return LeafNode(tag=None,value=self.text)
-        elif self.text_type == TextType.BOLD :
-            return LeafNode(tag="b",value=self.text)
-        elif self.text_type == TextType.ITALIC :
-            return LeafNode(tag="i",value=self.text)
-        elif self.text_type == TextType.CODE :
-            return LeafNode(tag="code",value=self.text)
-        elif self.text_type == TextType.LINK :
-            return LeafNode(tag="a",value=self.text,props={"href":self.url})
-        elif self.text_type == TextType.IMAGE :
-            return LeafNode(tag="img",value="",props={"src":self.url, "alt":self.text})
-        else :
-            raise Exception
\ No newline at end of file
+        entry = TEXT_TYPE_HTML.get(self.text_type)
+        if entry is None :
+            raise Exception
+        tag, props, has_text = entry
+        return LeafNode(tag,self.text if has_text else "",None if props is None else props(self))
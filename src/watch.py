@@ -0,0 +1,334 @@
+import functools
+import os
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import inotify_simple
+except ImportError:
+    inotify_simple = None
+
+import events
+import templates
+
+"""
+The watch command builds the site, serves the destination directory and then
+waits for changes of the content, the static files and the templates.
+Bursts of changes (an editor saving several files, a git checkout...) are
+debounced into a single rebuild, which only regenerates what is affected :
+- a changed markdown file regenerates its page only,
+- a changed static file is synced,
+- a changed template regenerates the pages that use it (see PageManifest).
+Then the open browser tabs are told to reload.
+
+Changes are read from inotify when the inotify_simple package is installed,
+otherwise the watched files are polled with stat.
+"""
+
+############################################ Watchers
+
+"""
+Takes a list of directories and files to watch.
+Returns a dictionary mapping every file path below them to its (mtime, size).
+"""
+def snapshot(paths : list[str]) -> dict:
+    state = {}
+    for path in paths:
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            state[os.path.abspath(path)] = (stat.st_mtime_ns, stat.st_size)
+            continue
+        for dirpath, dirnames, filenames in os.walk(path):
+            for filename in filenames:
+                file_path = os.path.abspath(os.path.join(dirpath, filename))
+                try:
+                    stat = os.stat(file_path)
+                except FileNotFoundError:
+                    continue
+                state[file_path] = (stat.st_mtime_ns, stat.st_size)
+    return state
+
+"""
+Watches files by comparing snapshots of their stat, every interval seconds.
+"""
+class PollingWatcher:
+    def __init__(self, paths : list[str], interval : float = 0.5):
+        self.paths = list(paths)
+        self.interval = interval
+        self.state = snapshot(self.paths)
+
+    def watch(self, path : str):
+        if path not in self.paths:
+            self.paths.append(path)
+            self.state.update(snapshot([path]))
+
+    """
+    Takes a timeout in seconds (None to wait forever).
+    Returns the set of the paths added, modified or removed since the previous call,
+    as soon as there is at least one, or an empty set when the timeout expires.
+    """
+    def changes(self, timeout : float = None) -> set[str]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            state = snapshot(self.paths)
+            changed = {path for path in state.keys() | self.state.keys() if state.get(path) != self.state.get(path)}
+            self.state = state
+            if len(changed) > 0:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            delay = self.interval if deadline is None else min(self.interval, max(0, deadline - time.monotonic()))
+            time.sleep(delay)
+
+    def close(self):
+        pass
+
+"""
+Watches files with inotify : the kernel tells which files changed, nothing is scanned.
+Directories are watched recursively, new subdirectories included. Single files are
+watched through their parent directory.
+"""
+class InotifyWatcher:
+    def __init__(self, paths : list[str]):
+        self.inotify = inotify_simple.INotify()
+        flags = inotify_simple.flags
+        self.mask = flags.CREATE | flags.MODIFY | flags.CLOSE_WRITE | flags.DELETE | flags.MOVED_FROM | flags.MOVED_TO
+        self.directories = {}
+        self.files = {}
+        for path in paths:
+            self.watch(path)
+
+    def watch(self, path : str):
+        path = os.path.abspath(path)
+        if os.path.isdir(path):
+            for dirpath, dirnames, filenames in os.walk(path):
+                self.add_directory(dirpath, None)
+        else:
+            directory = os.path.dirname(path)
+            self.add_directory(directory, os.path.basename(path))
+
+    """
+    Takes a directory and the only file name to report in it (None for all).
+    """
+    def add_directory(self, directory : str, filename : str):
+        descriptor = self.inotify.add_watch(directory, self.mask)
+        names = self.files.get(descriptor, set())
+        if filename is None or names is None:
+            self.files[descriptor] = None
+        else:
+            self.files[descriptor] = names | {filename}
+        self.directories[descriptor] = directory
+
+    def changes(self, timeout : float = None) -> set[str]:
+        changed = set()
+        events = self.inotify.read(timeout=None if timeout is None else int(timeout * 1000))
+        for event in events:
+            directory = self.directories.get(event.wd)
+            if directory is None or len(event.name) == 0:
+                continue
+            names = self.files.get(event.wd)
+            if names is not None and event.name not in names:
+                continue
+            path = os.path.join(directory, event.name)
+            if event.mask & inotify_simple.flags.ISDIR:
+                if event.mask & (inotify_simple.flags.CREATE | inotify_simple.flags.MOVED_TO):
+                    self.watch(path)
+                    changed.update(snapshot([path]))
+                continue
+            changed.add(path)
+        return changed
+
+    def close(self):
+        self.inotify.close()
+
+"""
+Takes a list of directories and files to watch and the polling interval.
+Returns an inotify watcher if possible, a polling one otherwise.
+"""
+def make_watcher(paths : list[str], interval : float = 0.5):
+    if inotify_simple is not None:
+        try:
+            return InotifyWatcher(paths)
+        except OSError:
+            pass
+    return PollingWatcher(paths, interval)
+
+"""
+Takes a watcher and a debounce delay in seconds.
+Waits for a first change, then keeps collecting changes until none happened
+during the delay.
+Returns the set of every changed path.
+"""
+def wait_for_changes(watcher, debounce : float = 0.1) -> set[str]:
+    changed = watcher.changes(None)
+    while True:
+        more = watcher.changes(debounce)
+        if len(more) == 0:
+            return changed
+        changed |= more
+
+############################################ Rebuild
+
+"""
+Takes a set of changed paths, the content directory and the static directory.
+Returns the changed markdown pages, whether static files changed, and whether
+anything else changed (templates, partials...), which needs every page to be checked.
+"""
+def classify_changes(changed : set[str], content_dir : str, static_dir : str):
+    content_dir = os.path.abspath(content_dir) + os.sep
+    static_dir = os.path.abspath(static_dir) + os.sep
+    pages = set()
+    static = False
+    other = False
+    for path in changed:
+        path = os.path.abspath(path)
+        if path.startswith(static_dir):
+            static = True
+        elif path.startswith(content_dir) and path.endswith(".md") and not any(part.startswith("_") for part in path[len(content_dir):].split(os.sep)):
+            pages.add(path)
+        else:
+            other = True
+    return pages, static, other
+
+"""
+Returns the paths of every file the cached templates were compiled from.
+"""
+def template_files() -> set[str]:
+    files = set()
+    for template in templates.cache.values():
+        files.update(template.dependencies)
+    return files
+
+############################################ Live reload server
+
+RELOAD_PATH = "/__livereload"
+RELOAD_SCRIPT = f'<script>new EventSource("{RELOAD_PATH}").onmessage = () => location.reload();</script>'
+
+"""
+Counts the rebuilds and wakes up the clients waiting for the next one.
+"""
+class ReloadNotifier:
+    def __init__(self):
+        self.version = 0
+        self.condition = threading.Condition()
+
+    def notify(self):
+        with self.condition:
+            self.version += 1
+            self.condition.notify_all()
+
+    """
+    Takes the last version a client saw and a timeout in seconds.
+    Returns the current version, as soon as it differs or when the timeout expires.
+    """
+    def wait(self, version : int, timeout : float) -> int:
+        with self.condition:
+            self.condition.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+"""
+Takes an html page.
+Returns it with the live reload script added at the end of its body.
+"""
+def inject_reload_script(html : str) -> str:
+    index = html.rfind("</body>")
+    if index == -1:
+        return html + RELOAD_SCRIPT
+    return html[:index] + RELOAD_SCRIPT + html[index:]
+
+"""
+Serves the destination directory like python3 -m http.server, adds the
+live reload script to the html pages and streams the reload events
+(server-sent events) to the pages.
+"""
+class LiveReloadHandler(SimpleHTTPRequestHandler):
+    def __init__(self, *args, notifier : ReloadNotifier = None, **kwargs):
+        self.notifier = notifier
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        if self.path == RELOAD_PATH:
+            self.stream_reloads()
+            return
+        path = self.translate_path(self.path)
+        if os.path.isdir(path) and self.path.endswith("/"):
+            path = os.path.join(path, "index.html")
+        if not path.endswith(".html") or not os.path.isfile(path):
+            super().do_GET()
+            return
+        with open(path, "r") as html_file:
+            body = inject_reload_script(html_file.read()).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def stream_reloads(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        version = self.notifier.version
+        try:
+            while True:
+                current = self.notifier.wait(version, 15)
+                if current != version:
+                    version = current
+                    self.wfile.write(b"data: reload\n\n")
+                else:
+                    # A comment, so a closed tab is noticed by the failed write
+                    self.wfile.write(b": ping\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            return
+
+    def log_message(self, format, *args):
+        pass
+
+"""
+Takes a directory, a port and a ReloadNotifier.
+Starts serving the directory in a background thread and returns the server.
+"""
+def serve(directory : str, port : int, notifier : ReloadNotifier):
+    handler = functools.partial(LiveReloadHandler, directory=directory, notifier=notifier)
+    server = ThreadingHTTPServer(("", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+############################################ Watch command
+
+"""
+Takes the parsed command line arguments, the build function of main
+and the content directory, static directory and template path.
+Builds the whole site, serves it, then rebuilds what changes until interrupted.
+"""
+def run(args, build, content_dir : str, static_dir : str, template_path : str):
+    build(args)
+    notifier = ReloadNotifier()
+    server = serve(args.destination, args.port, notifier)
+    events.info("watch",f"Serving {args.destination} on http://localhost:{args.port}/ , watching for changes...")
+
+    watcher = make_watcher([content_dir, static_dir, template_path], args.interval)
+    for path in template_files():
+        watcher.watch(path)
+    try:
+        while True:
+            changed = wait_for_changes(watcher)
+            pages, static, other = classify_changes(changed, content_dir, static_dir)
+            try:
+                build(args, static=static, pages=True if other else pages)
+            except Exception as error:
+                events.error("watch",f"Build failed : {error}")
+                continue
+            for path in template_files():
+                watcher.watch(path)
+            notifier.notify()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+        server.shutdown()